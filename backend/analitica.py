@@ -0,0 +1,181 @@
+# Distribuciones de USD/m², spread tasación-publicación y días hasta publicar
+#
+# Cada métrica se guarda como histograma en rollups_distribucion: una fila por
+# (dimensión, valor, métrica, bucket) con la cantidad de inmuebles. Los buckets son
+# logarítmicos para USD/m² (2% de ancho relativo) y lineales para spread y días.
+# Las medianas y percentiles se leen sumando buckets, sin recorrer el inventario, y
+# cada alta o cambio de estado ajusta solo los buckets de la fila antes y después
+# (se engancha en estadisticas.registrar_cambios, dentro de la misma transacción).
+#
+# Uso: python analitica.py  (reconstruye los histogramas desde cero)
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from typing import Optional
+import math
+import models
+import estadisticas
+
+# dimensión: función que da el grupo de una fila ("total" agrupa todo el inventario en "Total")
+DIMENSIONES = {
+    "total": lambda fila: "Total",
+    "ciudad": lambda fila: fila.get("ciudad"),
+    "segmento": lambda fila: fila.get("segmento"),
+    "emprendimiento": lambda fila: fila.get("emprendimiento"),
+    "tipo": lambda fila: fila.get("tipo_inmueble"),
+    "mes": lambda fila: fila["fecha_tasacion"].strftime("%Y-%m") if fila.get("fecha_tasacion") else None,
+}
+
+def _por_m2(valor: str, superficie: str):
+    def calcular(fila: dict) -> Optional[float]:
+        if fila.get(valor) and fila.get(superficie):
+            return fila[valor] / fila[superficie]
+        return None
+    return calcular
+
+def _spread(fila: dict) -> Optional[float]:
+    if fila.get("valor_tasacion") and fila.get("valor_publicacion") is not None:
+        return (fila["valor_publicacion"] / fila["valor_tasacion"] - 1) * 100
+    return None
+
+def _dias_a_publicacion(fila: dict) -> Optional[float]:
+    if fila.get("fecha_tasacion") and fila.get("fecha_publicacion"):
+        return (fila["fecha_publicacion"] - fila["fecha_tasacion"]).days
+    return None
+
+# métrica: (función de la fila, escala, ancho del bucket)
+# log: el bucket b cubre [ancho**b, ancho**(b+1)); lineal: [b*ancho, (b+1)*ancho)
+METRICAS = {
+    "tasacion_m2_cubierta": (_por_m2("valor_tasacion", "sup_cubierta"), "log", 1.02),
+    "tasacion_m2_terreno": (_por_m2("valor_tasacion", "sup_terreno"), "log", 1.02),
+    "publicacion_m2_cubierta": (_por_m2("valor_publicacion", "sup_cubierta"), "log", 1.02),
+    "publicacion_m2_terreno": (_por_m2("valor_publicacion", "sup_terreno"), "log", 1.02),
+    "spread_pct": (_spread, "lineal", 0.5),
+    "dias_a_publicacion": (_dias_a_publicacion, "lineal", 1),
+}
+PERCENTILES = {"p10": 0.10, "p25": 0.25, "mediana": 0.50, "p75": 0.75, "p90": 0.90}
+
+def bucket(metrica: str, valor: float) -> int:
+    _, escala, ancho = METRICAS[metrica]
+    if escala == "log":
+        return math.floor(math.log(valor) / math.log(ancho))
+    return math.floor(valor / ancho)
+
+def valor_de_bucket(metrica: str, numero: int) -> float:
+    """Valor representativo del bucket: centro geométrico (log) o borde inferior (lineal)"""
+    _, escala, ancho = METRICAS[metrica]
+    if escala == "log":
+        return ancho ** (numero + 0.5)
+    return numero * ancho
+
+def claves(fila: dict):
+    """(dimensión, valor, métrica, bucket) a los que suma una fila"""
+    for metrica, (calcular, escala, _) in METRICAS.items():
+        valor = calcular(fila)
+        if valor is None or (escala == "log" and valor <= 0):
+            continue
+        numero = bucket(metrica, valor)
+        for dimension, agrupar in DIMENSIONES.items():
+            yield (dimension, agrupar(fila) or estadisticas.SIN_DATO, metrica, numero)
+
+# --- ESCRITURA ---
+
+def registrar_cambios(db: Session, pares):
+    """Ajusta los histogramas por cada (antes, despues); un upsert (executemany) con los buckets que cambian"""
+    deltas = {}
+    for antes, despues in pares:
+        for fila, signo in ((antes, -1), (despues, 1)):
+            if fila is None:
+                continue
+            for clave in claves(fila):
+                deltas[clave] = deltas.get(clave, 0) + signo
+
+    filas = [
+        {"dimension": dimension, "valor": valor, "metrica": metrica, "bucket": numero, "cantidad": delta}
+        for (dimension, valor, metrica, numero), delta in deltas.items()
+        if delta
+    ]
+    if not filas:
+        return
+    tabla = models.DistribucionMetrica.__table__
+    sentencia = estadisticas._insert_con_conflicto(db)(tabla)
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=[tabla.c.dimension, tabla.c.valor, tabla.c.metrica, tabla.c.bucket],
+        set_={"cantidad": tabla.c.cantidad + sentencia.excluded.cantidad},
+    )
+    db.execute(sentencia, filas)
+
+estadisticas.suscriptores_cambios.append(registrar_cambios)
+
+def reconstruir(conn, tamanio_lote: int = 5000) -> int:
+    """Vuelve a calcular todos los histogramas recorriendo el inventario por lotes (keyset)"""
+    inmuebles = models.Inmueble.__table__
+    campos = [
+        "id", "ciudad", "segmento", "emprendimiento", "tipo_inmueble", "sup_cubierta", "sup_terreno",
+        "fecha_tasacion", "valor_tasacion", "valor_publicacion", "fecha_publicacion",
+    ]
+    conteos = {}
+    cursor = 0
+    while True:
+        filas = conn.execute(
+            select(*(inmuebles.c[campo] for campo in campos))
+            .where(inmuebles.c.id > cursor).order_by(inmuebles.c.id).limit(tamanio_lote)
+        ).all()
+        if not filas:
+            break
+        for fila in filas:
+            for clave in claves(dict(zip(campos, fila))):
+                conteos[clave] = conteos.get(clave, 0) + 1
+        cursor = filas[-1].id
+
+    tabla = models.DistribucionMetrica.__table__
+    conn.execute(delete(tabla))
+    if conteos:
+        conn.execute(insert(tabla), [
+            {"dimension": dimension, "valor": valor, "metrica": metrica, "bucket": numero, "cantidad": cantidad}
+            for (dimension, valor, metrica, numero), cantidad in conteos.items()
+        ])
+    return len(conteos)
+
+# --- LECTURA ---
+
+def _resumir(metrica: str, buckets: list) -> dict:
+    """Cantidad y percentiles a partir de [(bucket, cantidad)] ordenados por bucket"""
+    total = sum(cantidad for _, cantidad in buckets)
+    resumen = {"cantidad": total}
+    acumulado = 0
+    pendientes = iter(PERCENTILES.items())
+    nombre, fraccion = next(pendientes)
+    for numero, cantidad in buckets:
+        acumulado += cantidad
+        while acumulado >= fraccion * total:
+            resumen[nombre] = round(valor_de_bucket(metrica, numero), 2)
+            siguiente = next(pendientes, None)
+            if siguiente is None:
+                return resumen
+            nombre, fraccion = siguiente
+    return resumen
+
+def distribucion(db: Session, agrupar: str, metrica: Optional[str] = None) -> dict:
+    """{grupo: {métrica: {cantidad, p10, p25, mediana, p75, p90}}} leído de los histogramas"""
+    tabla = models.DistribucionMetrica.__table__
+    consulta = (
+        select(tabla.c.valor, tabla.c.metrica, tabla.c.bucket, tabla.c.cantidad)
+        .where(tabla.c.dimension == agrupar, tabla.c.cantidad > 0)
+        .order_by(tabla.c.valor, tabla.c.metrica, tabla.c.bucket)
+    )
+    if metrica:
+        consulta = consulta.where(tabla.c.metrica == metrica)
+
+    histogramas = {}
+    for valor, nombre_metrica, numero, cantidad in db.execute(consulta):
+        histogramas.setdefault((valor, nombre_metrica), []).append((numero, cantidad))
+    grupos = {}
+    for (valor, nombre_metrica), buckets in histogramas.items():
+        grupos.setdefault(valor, {})[nombre_metrica] = _resumir(nombre_metrica, buckets)
+    return {"agrupar": agrupar, "metrica": metrica, "grupos": grupos}
+
+if __name__ == "__main__":
+    from database import engine
+    with engine.begin() as conn:
+        print(f"{reconstruir(conn)} buckets recalculados")
@@ -0,0 +1,89 @@
+# Benchmark de arranque en frío: tiempo de import de main y hasta la primera respuesta
+# Uso: python benchmarks/bench_arranque.py [--filas 10k] [--repeticiones 5]  (desde la carpeta backend)
+#
+# Cada medición es un proceso nuevo, como un arranque de Render después de dormirse:
+#   import      python -c "import main" (intérprete + dependencias + módulos de la app)
+#   respuesta   desde lanzar uvicorn hasta el primer 200 de GET /inmuebles/?limite=1
+# Se mide también con MIGRAR_AL_INICIAR=1, que es lo que hacía el arranque antes del lifespan.
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import generador
+
+# Plazo para que uvicorn responda antes de dar la medición por fallida
+ESPERA_MAXIMA_S = 60
+INTERVALO_SONDEO_S = 0.005
+
+MEDIR_IMPORT = "import time; inicio = time.perf_counter(); import main; print(time.perf_counter() - inicio)"
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def medir_import(entorno: dict) -> tuple:
+    """(segundos del proceso completo, segundos de import main)"""
+    inicio = time.perf_counter()
+    salida = subprocess.run(
+        [sys.executable, "-c", MEDIR_IMPORT], cwd=BACKEND, env=entorno,
+        capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - inicio, float(salida.stdout.strip().splitlines()[-1])
+
+def medir_primera_respuesta(entorno: dict) -> float:
+    """Segundos desde lanzar uvicorn hasta el primer 200"""
+    puerto = _puerto_libre()
+    url = f"http://127.0.0.1:{puerto}/inmuebles/?limite=1"
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=BACKEND, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=ESPERA_MAXIMA_S) as cliente:
+            while time.perf_counter() - inicio < ESPERA_MAXIMA_S:
+                if proceso.poll() is not None:
+                    raise RuntimeError(f"uvicorn terminó con código {proceso.returncode}")
+                try:
+                    if cliente.get(url).status_code == 200:
+                        return time.perf_counter() - inicio
+                except httpx.TransportError:
+                    pass
+                time.sleep(INTERVALO_SONDEO_S)
+        raise RuntimeError(f"Sin respuesta en {ESPERA_MAXIMA_S}s")
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+def _resumen(valores: list) -> str:
+    return f"mediana {statistics.median(valores) * 1000:7.0f} ms   mín {min(valores) * 1000:7.0f}   máx {max(valores) * 1000:7.0f}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide el arranque en frío de la API")
+    parser.add_argument("--filas", default="10k", help=f"Inventario sintético ({', '.join(generador.TAMANIOS)} o un número)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    filas = generador.TAMANIOS.get(args.filas.lower()) or int(args.filas)
+    base = generador.base_sqlite(filas, args.semilla)
+    entorno = {**os.environ, "DATABASE_URL": "sqlite:///" + base, "CACHE_BACKEND": "ninguno"}
+
+    print(f"{filas} filas, {args.repeticiones} repeticiones")
+    procesos, imports = zip(*(medir_import(entorno) for _ in range(args.repeticiones)))
+    print(f"{'proceso con import main':<34} {_resumen(procesos)}")
+    print(f"{'  de eso, import main':<34} {_resumen(imports)}")
+    for nombre, extra in (("primera respuesta", {}), ("primera respuesta migrando", {"MIGRAR_AL_INICIAR": "1"})):
+        tiempos = [medir_primera_respuesta({**entorno, **extra}) for _ in range(args.repeticiones)]
+        print(f"{nombre:<34} {_resumen(tiempos)}")
@@ -0,0 +1,77 @@
+# Benchmark: tasaciones/seg de POST /inmuebles/tasar concurrentes, con y sin escritura agrupada
+# Uso: python benchmarks/bench_escritura_agrupada.py [requests por medición]  (desde la carpeta backend)
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Base temporal: el benchmark nunca toca inmobiliaria.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("CACHE_BACKEND", "ninguno")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+import logging
+import escritura_agrupada
+import main
+from migraciones import aplicar_migraciones
+
+logging.disable(logging.ERROR)
+
+CONCURRENCIAS = (1, 8, 32, 64)
+
+def fila(i: int) -> dict:
+    return {
+        "ciudad": ["Campana", "Zarate", "Escobar", "Los Cardales"][i % 4],
+        "segmento": "Ciudad",
+        "emprendimiento": "Centro",
+        "tipo": "Casa",
+        "direccion": f"Mitre {i}",
+        "sup_cubierta": 80.0 + i % 120,
+        "sup_terreno": 200.0 + i % 300,
+        "valor_tasacion": 90000.0 + i,
+        "link_drive": "https://drive.google.com/bench",
+    }
+
+async def medir(cliente: httpx.AsyncClient, total: int, concurrencia: int) -> tuple:
+    """(tasaciones/seg, errores, ids repetidos) de `total` requests con `concurrencia` en vuelo"""
+    siguiente = iter(range(total))
+    ids, errores = [], 0
+
+    async def trabajador():
+        nonlocal errores
+        for i in siguiente:
+            respuesta = await cliente.post("/inmuebles/tasar", params=fila(i))
+            if respuesta.status_code == 200:
+                ids.append(respuesta.json()["id"])
+            else:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    return len(ids) / (time.perf_counter() - inicio), errores, len(ids) - len(set(ids))
+
+async def principal(total: int):
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        print(f"{total} tasaciones por medición (agrupando cada {escritura_agrupada.AGRUPAR_MS:g} ms "
+              f"o {escritura_agrupada.AGRUPAR_FILAS} filas)")
+        print(f"{'concurrencia':>12} {'directo':>12} {'agrupado':>12} {'mejora':>8}")
+        for concurrencia in CONCURRENCIAS:
+            resultados = {}
+            for agrupar in (False, True):
+                escritura_agrupada.AGRUPAR = agrupar
+                resultados[agrupar] = await medir(cliente, total, concurrencia)
+            directo, agrupado = resultados[False][0], resultados[True][0]
+            print(f"{concurrencia:>12} {directo:>10.0f}/s {agrupado:>10.0f}/s {agrupado / directo:>7.1f}x")
+            for agrupar, (_, errores, repetidos) in resultados.items():
+                if errores or repetidos:
+                    modo = "agrupado" if agrupar else "directo"
+                    print(f"{'':>12} {modo}: {errores} errores, {repetidos} ids repetidos")
+        await escritura_agrupada.cerrar()
+
+if __name__ == "__main__":
+    aplicar_migraciones()
+    asyncio.run(principal(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,56 @@
+# Benchmark: filas/seg de POST /inmuebles/tasar (una por request) contra POST /inmuebles/importar
+# Uso: python benchmarks/bench_importacion.py [filas]  (desde la carpeta backend)
+
+import os
+import sys
+import tempfile
+import time
+
+# Base temporal: el benchmark nunca toca inmobiliaria.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.testclient import TestClient
+import logging
+import main
+from migraciones import aplicar_migraciones
+
+logging.disable(logging.INFO)
+
+def fila(i: int) -> dict:
+    return {
+        "ciudad": ["Campana", "Zarate", "Escobar", "Los Cardales"][i % 4],
+        "segmento": "Emprendimiento",
+        "emprendimiento": f"Barrio {i % 20}",
+        "tipo": "Lote",
+        "direccion": f"Lote {i}",
+        "sup_cubierta": 0.0,
+        "sup_terreno": 300.0 + i % 500,
+        "valor_tasacion": 20000.0 + i,
+        "link_drive": "https://drive.google.com/bench",
+    }
+
+def medir_individual(cliente: TestClient, filas: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(filas):
+        cliente.post("/inmuebles/tasar", params=fila(i)).raise_for_status()
+    return filas / (time.perf_counter() - inicio)
+
+def medir_importacion(cliente: TestClient, filas: int) -> float:
+    columnas = list(fila(0))
+    lineas = [",".join(columnas)] + [",".join(str(fila(i)[c]) for c in columnas) for i in range(filas)]
+    contenido = ("\n".join(lineas) + "\n").encode()
+    inicio = time.perf_counter()
+    respuesta = cliente.post("/inmuebles/importar", files={"archivo": ("planilla.csv", contenido)})
+    respuesta.raise_for_status()
+    assert respuesta.json()["insertadas"] == filas, respuesta.json()
+    return filas / (time.perf_counter() - inicio)
+
+if __name__ == "__main__":
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    aplicar_migraciones()
+    cliente = TestClient(main.app)
+    individual = medir_individual(cliente, filas)
+    masiva = medir_importacion(cliente, filas)
+    print(f"POST /inmuebles/tasar     : {individual:10.0f} filas/seg")
+    print(f"POST /inmuebles/importar  : {masiva:10.0f} filas/seg ({masiva / individual:.1f}x)")
@@ -0,0 +1,64 @@
+# Benchmark: tiempo de armar y serializar 10k inmuebles a JSON, antes y después del camino rápido
+# Uso: python benchmarks/bench_serializacion.py [filas]  (desde la carpeta backend)
+#
+# antes:   objetos del ORM -> jsonable_encoder -> json.dumps
+# después: tuplas de filas -> dicts -> serializacion.a_json (orjson si está instalado)
+
+import os
+import sys
+import tempfile
+import time
+
+# Base temporal: el benchmark nunca toca inmobiliaria.db
+URL = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = URL
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from generador import generar
+from database import SessionLocal
+import json
+import consultas
+import models
+import serializacion
+
+REPETICIONES = 5
+
+def antes(db):
+    inmuebles = db.query(models.Inmueble).all()
+    inicio = time.perf_counter()
+    cuerpo = json.dumps(jsonable_encoder(inmuebles), ensure_ascii=False).encode()
+    return time.perf_counter() - inicio, cuerpo
+
+def despues(db):
+    filas = consultas.como_dicts(db.execute(select(*consultas.COLUMNAS_INMUEBLE.values())))
+    inicio = time.perf_counter()
+    cuerpo = serializacion.a_json(filas)
+    return time.perf_counter() - inicio, cuerpo
+
+def medir(camino) -> tuple:
+    """Mejor tiempo total (lectura + serialización) y de solo serialización, en segundos"""
+    mejor_total = mejor_serializacion = float("inf")
+    for _ in range(REPETICIONES):
+        db = SessionLocal()
+        try:
+            inicio = time.perf_counter()
+            serializacion_s, cuerpo = camino(db)
+            total = time.perf_counter() - inicio
+        finally:
+            db.close()
+        mejor_total = min(mejor_total, total)
+        mejor_serializacion = min(mejor_serializacion, serializacion_s)
+    return mejor_total, mejor_serializacion, len(cuerpo)
+
+if __name__ == "__main__":
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    generar(URL, filas)
+    print(f"{filas} filas, orjson {'sí' if serializacion.orjson else 'no'}; ms por 10k filas (mejor de {REPETICIONES})")
+    print(f"{'camino':<8} {'total':>9} {'serializar':>11} {'bytes':>10}")
+    for nombre, camino in (("antes", antes), ("después", despues)):
+        total, solo_serializacion, tamanio = medir(camino)
+        escala = 10000 / filas * 1000
+        print(f"{nombre:<8} {total * escala:>9.1f} {solo_serializacion * escala:>11.1f} {tamanio:>10}")
@@ -0,0 +1,103 @@
+# Benchmark: cómo escala el throughput de lectura con la cantidad de workers de uvicorn
+# Uso: python benchmarks/bench_workers.py [--workers 1,2,4] [--filas 100k] [--escrituras]
+# (desde la carpeta backend; levanta un uvicorn --workers N por medición en un puerto local)
+#
+# Cada worker es un proceso con su propio engine; las lecturas van por conexiones de solo
+# lectura al archivo SQLite en WAL (DB_LECTURAS_SOLO_LECTURA=1) y no esperan al que escribe.
+# Con --escrituras un cliente registra tasaciones sin parar durante la medición, para ver
+# que las lecturas siguen escalando con un escritor activo.
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from carga import disparar, esperar_servidor
+import generador
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+TASACION = {
+    "ciudad": "Campana", "segmento": "Ciudad", "emprendimiento": "Centro", "tipo": "Casa",
+    "direccion": "Mitre 1234", "sup_cubierta": 120.0, "sup_terreno": 300.0,
+    "valor_tasacion": 130000.0, "link_drive": "https://drive.google.com/bench",
+}
+
+async def escribir_sin_parar(base: str, parar: asyncio.Event) -> tuple:
+    """(tasaciones registradas, errores) hasta que se avise que termine la medición"""
+    registradas = errores = 0
+    async with httpx.AsyncClient(base_url=base, timeout=60) as cliente:
+        while not parar.is_set():
+            respuesta = await cliente.post("/inmuebles/tasar", params=TASACION)
+            if respuesta.status_code == 200:
+                registradas += 1
+            else:
+                errores += 1
+    return registradas, errores
+
+async def medir_lecturas(base: str, args) -> dict:
+    parar = asyncio.Event()
+    escritor = asyncio.create_task(escribir_sin_parar(base, parar)) if args.escrituras else None
+    inicio = time.perf_counter()
+    resultado = await disparar(base, args.concurrencia, args.requests)
+    parar.set()
+    if escritor:
+        registradas, errores = await escritor
+        resultado.update(escrituras_s=registradas / (time.perf_counter() - inicio), errores_escritura=errores)
+    return resultado
+
+def medir_workers(workers: int, url: str, args) -> dict:
+    entorno = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "WEB_CONCURRENCY": str(workers),
+        "DB_LECTURAS_SOLO_LECTURA": "1",
+        # Sin caché: con varios workers la de memoria no se invalida entre procesos
+        "CACHE_BACKEND": "ninguno",
+        # Un pool chico por worker: el total de conexiones crece con los procesos
+        "DB_POOL_SIZE": os.environ.get("DB_POOL_SIZE", "4"),
+    }
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.puerto),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        base = f"http://127.0.0.1:{args.puerto}"
+        asyncio.run(esperar_servidor(base))
+        # Calentamiento: que todos los workers tengan conexiones y el esquema en caché
+        asyncio.run(disparar(base, args.concurrencia, min(400, args.requests)))
+        return asyncio.run(medir_lecturas(base, args))
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput de lectura según la cantidad de workers")
+    parser.add_argument("--workers", default="1,2,4", help="Cantidades de workers a medir, separadas por coma")
+    parser.add_argument("--filas", default="100k", help=f"Inventario sintético ({', '.join(generador.TAMANIOS)} o un número)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--escrituras", action="store_true", help="Registrar tasaciones en paralelo a las lecturas")
+    parser.add_argument("--puerto", type=int, default=8766)
+    args = parser.parse_args()
+
+    filas = generador.TAMANIOS.get(args.filas.lower()) or int(args.filas)
+    url = "sqlite:///" + generador.base_sqlite(filas, args.semilla)
+    print(f"{filas} filas, {os.cpu_count()} CPUs, concurrencia {args.concurrencia}, {args.requests} lecturas por medición")
+    print(f"{'workers':>7} {'req/s':>9} {'escala':>7} {'p50 ms':>9} {'p99 ms':>9} {'errores':>8}"
+          + (f" {'escrit./s':>10}" if args.escrituras else ""))
+    referencia = None
+    for workers in (int(valor) for valor in args.workers.split(",")):
+        r = medir_workers(workers, url, args)
+        referencia = referencia or r["req_s"]
+        linea = (f"{workers:>7} {r['req_s']:>9.1f} {r['req_s'] / referencia:>6.2f}x "
+                 f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errores']:>8}")
+        if args.escrituras:
+            linea += f" {r['escrituras_s']:>10.1f}" + (f" ({r['errores_escritura']} errores)" if r["errores_escritura"] else "")
+        print(linea, flush=True)
@@ -0,0 +1,107 @@
+# Prueba de carga: compara DB_MODO=sync contra DB_MODO=async sobre el mismo dataset
+# Uso: python benchmarks/carga.py [--filas 20000] [--concurrencia 32] [--requests 2000]
+# (desde la carpeta backend; levanta un uvicorn por modo en un puerto local)
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from generador import generar
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Mezcla de lecturas que hace el frontend en cada rerun
+RUTAS = [
+    "/inmuebles/?limite=100",
+    "/inmuebles/buscar?ciudad=Campana&estado=Tasación",
+    "/inmuebles/buscar?precio_min=50000&precio_max=60000",
+    "/estadisticas/resumen",
+]
+
+async def esperar_servidor(base: str, segundos: float = 30):
+    async with httpx.AsyncClient() as cliente:
+        limite = time.monotonic() + segundos
+        while time.monotonic() < limite:
+            try:
+                if (await cliente.get(base + "/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+async def disparar(base: str, concurrencia: int, total: int) -> dict:
+    latencias = []
+    errores = 0
+    pendientes = iter(range(total))
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+
+    async with httpx.AsyncClient(base_url=base, limits=limites, timeout=60) as cliente:
+        async def trabajador():
+            nonlocal errores
+            for i in pendientes:
+                inicio = time.perf_counter()
+                respuesta = await cliente.get(RUTAS[i % len(RUTAS)])
+                latencias.append(time.perf_counter() - inicio)
+                if respuesta.status_code != 200:
+                    errores += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        duracion = time.perf_counter() - inicio
+
+    cuantiles = statistics.quantiles(latencias, n=100)
+    return {
+        "req_s": total / duracion,
+        "p50_ms": cuantiles[49] * 1000,
+        "p99_ms": cuantiles[98] * 1000,
+        "errores": errores,
+    }
+
+def medir_modo(modo: str, url: str, puerto: int, args) -> dict:
+    entorno = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "DB_MODO": modo,
+        # Sin caché: se mide la pila de base de datos, no los aciertos de la LRU
+        "CACHE_BACKEND": "ninguno",
+    }
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=BACKEND, env=entorno,
+    )
+    try:
+        base = f"http://127.0.0.1:{puerto}"
+        asyncio.run(esperar_servidor(base))
+        asyncio.run(disparar(base, args.concurrencia, min(200, args.requests)))  # calentamiento
+        return asyncio.run(disparar(base, args.concurrencia, args.requests))
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=20000)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--database-url", help="Base ya poblada (por defecto una SQLite temporal)")
+    parser.add_argument("--puerto", type=int, default=8765)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if not url:
+        # Mismo inventario sintético (misma semilla) para ambos modos
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "carga.db")
+        generar(url, args.filas)
+
+    print(f"{'modo':<6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for modo in ("sync", "async"):
+        r = medir_modo(modo, url, args.puerto, args)
+        print(f"{modo:<6} {r['req_s']:>9.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errores']:>8}")
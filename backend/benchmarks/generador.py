@@ -0,0 +1,195 @@
+# Generador de inventario sintético reproducible para benchmarks
+# Uso: python benchmarks/generador.py --filas 100000 [--semilla 42] [--database-url sqlite:///bench.db]
+# (desde la carpeta backend; sin --database-url deja la base en el directorio temporal)
+#
+# Con la misma semilla y cantidad de filas se obtiene siempre el mismo inventario. Las
+# distribuciones imitan las de Cadema: más tasaciones en Campana, lotes en emprendimientos,
+# USD/m² log-normal por ciudad y tipo, y fechas de publicación posteriores a la tasación.
+# Después de cargar se recalculan los contadores y los histogramas de analitica.py.
+
+import argparse
+import datetime
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND)
+
+from sqlalchemy import create_engine, event, insert
+
+# Tamaños de referencia de la suite
+TAMANIOS = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+# Cambia si cambian las distribuciones: invalida las bases ya generadas
+VERSION_GENERADOR = 1
+# Las fechas se generan hacia atrás desde acá (no desde hoy, para que sean reproducibles)
+FECHA_REFERENCIA = datetime.date(2025, 12, 31)
+DIAS_DE_HISTORIA = 3 * 365
+TAMANIO_LOTE = 5000
+
+# ciudad: (peso, USD/m² cubierto de referencia, centro lat/lon)
+CIUDADES = {
+    "Campana": (0.40, 1100, (-34.1687, -58.9591)),
+    "Zarate": (0.25, 950, (-34.0981, -59.0286)),
+    "Escobar": (0.20, 1400, (-34.3475, -58.7956)),
+    "Los Cardales": (0.15, 1250, (-34.3167, -58.9667)),
+}
+# segmento: (peso, {tipo: peso})
+SEGMENTOS = {
+    "Ciudad": (0.50, {"Casa": 0.45, "Departamento": 0.30, "Local": 0.10, "Oficina": 0.05, "Lote": 0.10}),
+    "Emprendimiento": (0.35, {"Lote": 0.65, "Casa": 0.35}),
+    "Industria": (0.15, {"Lote": 0.50, "Local": 0.30, "Oficina": 0.20}),
+}
+# tipo: (mediana m² cubiertos, mediana m² de terreno); 0 = no aplica
+SUPERFICIES = {
+    "Casa": (140, 450),
+    "Departamento": (65, 0),
+    "Local": (90, 0),
+    "Oficina": (55, 0),
+    "Lote": (0, 600),
+}
+# El terreno de un lote vale esta fracción del m² cubierto de la ciudad; en Industria son más grandes
+FRACCION_VALOR_TERRENO = 0.12
+ESCALA_LOTE_INDUSTRIA = 4
+# estado: peso (el resto de lo tasado todavía no se publicó)
+ESTADOS = {"Tasación": 0.50, "Para Publicar": 0.15, "Publicado": 0.35}
+# Inmuebles con ubicación (el resto queda como si no se hubiera geocodificado)
+FRACCION_GEOCODIFICADA = 0.8
+CALLES = [
+    "Rivadavia", "Mitre", "Belgrano", "San Martín", "Sarmiento", "Moreno", "Alem",
+    "Pellegrini", "Lavalle", "Colón", "Güemes", "Urquiza", "Independencia", "Roca",
+]
+BARRIOS = [
+    "Las Acacias", "El Lucero", "Los Álamos", "La Candelaria", "Santa Rita", "El Ombú",
+    "Los Ceibos", "San Sebastián", "La Arboleda", "Terrazas del Paraná", "El Recodo", "Las Glorietas",
+]
+
+def _elegir(azar: random.Random, pesos: dict):
+    return azar.choices(list(pesos), weights=list(pesos.values()))[0]
+
+def _lognormal(azar: random.Random, mediana: float, sigma: float) -> float:
+    return mediana * azar.lognormvariate(0, sigma)
+
+def fila(azar: random.Random, i: int) -> dict:
+    """Un inmueble sintético; i solo se usa para que las direcciones de lotes no se repitan"""
+    ciudad = _elegir(azar, {nombre: datos[0] for nombre, datos in CIUDADES.items()})
+    _, usd_m2, (lat_centro, lon_centro) = CIUDADES[ciudad]
+    segmento = _elegir(azar, {nombre: datos[0] for nombre, datos in SEGMENTOS.items()})
+    tipo = _elegir(azar, SEGMENTOS[segmento][1])
+
+    cubierta, terreno = SUPERFICIES[tipo]
+    if segmento == "Industria" and tipo == "Lote":
+        terreno *= ESCALA_LOTE_INDUSTRIA
+    sup_cubierta = round(_lognormal(azar, cubierta, 0.35), 1) if cubierta else 0.0
+    sup_terreno = round(_lognormal(azar, terreno, 0.4), 1) if terreno else 0.0
+    if sup_cubierta:
+        valor = sup_cubierta * _lognormal(azar, usd_m2, 0.2)
+    else:
+        valor = sup_terreno * _lognormal(azar, usd_m2 * FRACCION_VALOR_TERRENO, 0.3)
+    valor_tasacion = round(valor, -2)
+
+    if segmento == "Ciudad":
+        emprendimiento = "Centro"
+        direccion = f"{azar.choice(CALLES)} {azar.randint(100, 3000)}"
+    else:
+        # Pocos emprendimientos concentran la mayoría de las tasaciones
+        emprendimiento = f"Barrio {BARRIOS[min(int(azar.expovariate(0.35)), len(BARRIOS) - 1)]}"
+        direccion = f"Lote {i % 900 + 1}"
+
+    fecha_tasacion = FECHA_REFERENCIA - datetime.timedelta(days=azar.randrange(DIAS_DE_HISTORIA))
+    estado = _elegir(azar, ESTADOS)
+    datos = {
+        "estado": estado,
+        "version": {"Tasación": 1, "Para Publicar": 2, "Publicado": 3}[estado],
+        "ciudad": ciudad,
+        "segmento": segmento,
+        "emprendimiento": emprendimiento,
+        "tipo_inmueble": tipo,
+        "direccion": direccion,
+        "sup_cubierta": sup_cubierta,
+        "sup_terreno": sup_terreno,
+        "lat": None,
+        "lon": None,
+        "fecha_tasacion": fecha_tasacion,
+        "valor_tasacion": valor_tasacion,
+        "link_drive": f"https://drive.google.com/drive/folders/sintetico{i}",
+        "valor_publicacion": None,
+        "link_portal": None,
+        "fecha_publicacion": None,
+    }
+    if azar.random() < FRACCION_GEOCODIFICADA:
+        # ~2 km de dispersión alrededor del centro
+        datos["lat"] = round(lat_centro + azar.gauss(0, 0.018), 6)
+        datos["lon"] = round(lon_centro + azar.gauss(0, 0.022), 6)
+    if estado != "Tasación":
+        datos["valor_publicacion"] = round(valor_tasacion * (1 + azar.gauss(0.08, 0.05)), -2)
+    if estado == "Publicado":
+        dias = min(int(azar.expovariate(1 / 30)), (FECHA_REFERENCIA - fecha_tasacion).days)
+        datos["fecha_publicacion"] = fecha_tasacion + datetime.timedelta(days=dias)
+        datos["link_portal"] = f"https://www.zonaprop.com.ar/propiedades/sintetico-{i}.html"
+    return datos
+
+def generar(url: str, filas: int, semilla: int = 42) -> float:
+    """Crea el esquema en url y carga `filas` inmuebles; devuelve los segundos que tardó"""
+    # Se importan acá: database lee DATABASE_URL al importarse y quien usa el generador
+    # (la suite, por ejemplo) la define después de importar este módulo
+    import analitica
+    import database
+    import estadisticas
+    import models
+    from migraciones import aplicar_migraciones
+
+    motor = create_engine(url, **database.opciones_engine(url))
+    if url.startswith("sqlite"):
+        event.listen(motor, "connect", database._pragmas_sqlite)
+    inicio = time.perf_counter()
+    try:
+        aplicar_migraciones(motor)
+        azar = random.Random(semilla)
+        with motor.begin() as conn:
+            for desde in range(0, filas, TAMANIO_LOTE):
+                lote = [fila(azar, i) for i in range(desde, min(desde + TAMANIO_LOTE, filas))]
+                conn.execute(insert(models.Inmueble), lote)
+            # La carga no pasa por registrar_cambios: tablas derivadas desde cero
+            estadisticas.reconstruir_contadores(conn)
+            analitica.reconstruir(conn)
+    finally:
+        motor.dispose()
+    return time.perf_counter() - inicio
+
+def base_sqlite(filas: int, semilla: int = 42, copia: str = None, directorio: str = None) -> str:
+    """Ruta de una copia de trabajo de la base sintética; la plantilla se genera una sola vez"""
+    from migraciones import MIGRACIONES
+
+    directorio = directorio or os.path.join(tempfile.gettempdir(), "cadema_bench")
+    os.makedirs(directorio, exist_ok=True)
+    nombre = f"inventario_{filas}_s{semilla}_g{VERSION_GENERADOR}_m{len(MIGRACIONES)}"
+    plantilla = os.path.join(directorio, nombre + ".db")
+    if not os.path.exists(plantilla):
+        parcial = plantilla + ".parcial"
+        for sufijo in ("", "-wal", "-shm"):
+            if os.path.exists(parcial + sufijo):
+                os.remove(parcial + sufijo)
+        segundos = generar("sqlite:///" + parcial, filas, semilla)
+        print(f"Base sintética de {filas} filas generada en {segundos:.1f}s: {plantilla}", file=sys.stderr)
+        os.replace(parcial, plantilla)
+    copia = copia or os.path.join(tempfile.mkdtemp(prefix="cadema_bench_"), nombre + ".db")
+    shutil.copyfile(plantilla, copia)
+    return copia
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un inventario sintético reproducible")
+    parser.add_argument("--filas", default="10k", help=f"Cantidad o tamaño de referencia ({', '.join(TAMANIOS)})")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--database-url", help="Base destino (por defecto una SQLite en el directorio temporal)")
+    args = parser.parse_args()
+
+    filas = TAMANIOS.get(args.filas.lower()) or int(args.filas)
+    if args.database_url:
+        segundos = generar(args.database_url, filas, args.semilla)
+        print(f"{filas} filas cargadas en {segundos:.1f}s")
+    else:
+        print(base_sqlite(filas, args.semilla))
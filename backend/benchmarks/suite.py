@@ -0,0 +1,369 @@
+# Suite de benchmarks de la API sobre un inventario sintético, dentro del proceso (ASGI)
+# Uso: python benchmarks/suite.py [--filas 10k|100k|1m] [--concurrencia 8] [--requests 200]
+#                                 [--escenarios buscar,tasar] [--guardar-baseline]
+# (desde la carpeta backend)
+#
+# Cada escenario dispara requests contra main.app con httpx.ASGITransport (sin sockets ni
+# uvicorn, así se mide la aplicación y no la red) y registra percentiles de latencia,
+# requests/seg y el pico de memoria (RSS) del proceso. Los resultados van a
+# benchmarks/resultados/<fecha>_<tamaño>.json y se comparan con benchmarks/baseline_<tamaño>.json:
+# si algún escenario empeora más que la tolerancia, el proceso sale con código 1. El baseline
+# de 10k está versionado; al cambiarlo a propósito se regenera con --guardar-baseline y se commitea.
+# Primero corren las lecturas y después las escrituras, sobre una copia de la base sintética.
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, NamedTuple, Optional
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS)
+
+import generador
+
+# Peor aceptable respecto del baseline antes de marcar una regresión (0.25 = 25%)
+TOLERANCIA = 0.25
+# Diferencias de latencia menores a esto son ruido, aunque superen la tolerancia relativa
+UMBRAL_RUIDO_MS = 2.0
+# Corte por escenario: los que devuelven cientos de miles de filas no pueden tardar minutos
+SEGUNDOS_MAX_ESCENARIO = 20
+# Filas por planilla del escenario de importación y por pedido de la transición en lote
+FILAS_IMPORTACION = 500
+IDS_POR_LOTE = 50
+
+FILTROS_BUSQUEDA = ("ciudad", "estado", "precio_min", "precio_max")
+
+def _etiqueta(filas: int) -> str:
+    for etiqueta, cantidad in generador.TAMANIOS.items():
+        if cantidad == filas:
+            return etiqueta
+    return str(filas)
+
+def rss_pico_mb() -> float:
+    """Pico de memoria residente del proceso hasta ahora (ru_maxrss: KB en Linux, bytes en macOS)"""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def percentil(ordenadas: list, q: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    indice = max(0, min(len(ordenadas) - 1, round(q * len(ordenadas) + 0.5) - 1))
+    return ordenadas[indice]
+
+# --- ESCENARIOS ---
+
+class Escenario(NamedTuple):
+    nombre: str
+    # i -> (método, url, opciones de httpx.request)
+    pedido: Callable
+    # Tope de requests (para los que mueven mucho volumen por request)
+    maximo: Optional[int] = None
+    # Requests en vuelo si no es la concurrencia general
+    concurrencia: Optional[int] = None
+    # respuesta -> True si hay que contarla como error aunque el status sea 2xx
+    fallida: Optional[Callable] = None
+
+def _parametros_tasacion(datos: dict) -> dict:
+    return {
+        "ciudad": datos["ciudad"], "segmento": datos["segmento"], "emprendimiento": datos["emprendimiento"],
+        "tipo": datos["tipo_inmueble"], "direccion": datos["direccion"], "sup_cubierta": datos["sup_cubierta"],
+        "sup_terreno": datos["sup_terreno"], "valor_tasacion": datos["valor_tasacion"], "link_drive": datos["link_drive"],
+    }
+
+def _planilla(azar: random.Random, desde: int) -> bytes:
+    columnas = list(_parametros_tasacion(generador.fila(azar, 0)))
+    lineas = [",".join(columnas)]
+    for i in range(desde, desde + FILAS_IMPORTACION):
+        datos = _parametros_tasacion(generador.fila(azar, i))
+        lineas.append(",".join(str(datos[columna]) for columna in columnas))
+    return ("\n".join(lineas) + "\n").encode()
+
+def escenarios(semilla: int, max_id: int, pendientes: dict) -> list:
+    """Lecturas y escrituras de todos los endpoints; pendientes: {estado: ids en ese estado}"""
+    ciudades = list(generador.CIUDADES)
+    estados = list(generador.ESTADOS)
+
+    def azar_de(nombre: str) -> random.Random:
+        return random.Random(f"{semilla}-{nombre}")
+
+    def lectura(nombre, url, parametros, maximo=None):
+        azar = azar_de(nombre)
+        return Escenario(nombre, lambda i: ("GET", url, {"params": parametros(azar)}), maximo)
+
+    def busqueda(nombres):
+        def parametros(azar):
+            valores = {
+                "ciudad": azar.choice(ciudades),
+                "estado": azar.choice(estados),
+                "precio_min": round(azar.uniform(50_000, 300_000), -3),
+            }
+            # Con los dos extremos, un rango angosto; solo con el máximo, un techo bajo
+            valores["precio_max"] = valores["precio_min"] + 20_000 if "precio_min" in nombres else round(azar.uniform(30_000, 80_000), -3)
+            return {nombre: valores[nombre] for nombre in nombres}
+        return lectura(f"buscar[{','.join(nombres)}]", "/inmuebles/buscar", parametros)
+
+    def cerca(azar):
+        lat, lon = generador.CIUDADES[azar.choice(ciudades)][2]
+        return {"lat": lat + azar.gauss(0, 0.01), "lon": lon + azar.gauss(0, 0.01), "radio_km": 1}
+
+    def valuacion(azar):
+        datos = generador.fila(azar, 0)
+        return {
+            "ciudad": datos["ciudad"], "segmento": datos["segmento"], "tipo": datos["tipo_inmueble"],
+            "sup_cubierta": datos["sup_cubierta"], "sup_terreno": datos["sup_terreno"],
+        }
+
+    def grilla(azar):
+        import consultas
+        orden = azar.choice(["id", "fecha_tasacion", "valor_tasacion", "ciudad"])
+        descendente = azar.choice([True, False])
+        parametros = {
+            "limite": 50, "orden": orden, "descendente": str(descendente).lower(),
+            **({"estado": azar.choice(estados)} if azar.random() < 0.5 else {}),
+        }
+        if azar.random() < 0.5:
+            # Una página cualquiera por cursor (keyset): no cuesta más por estar lejos del principio
+            id = azar.randrange(max_id)
+            valor = {**generador.fila(azar, id), "id": id}[orden]
+            parametros["cursor"] = consultas.codificar_cursor_grilla(orden, descendente, valor, id)
+        return parametros
+
+    lista = [
+        lectura("listado", "/inmuebles/", lambda azar: {"limite": 100, "cursor": azar.randrange(max_id)}),
+        lectura("listado_campos", "/inmuebles/", lambda azar: {
+            "limite": 1000, "cursor": azar.randrange(max_id), "fields": "id,estado,ciudad,valor_tasacion",
+        }),
+        *(
+            busqueda(nombres)
+            for cantidad in range(1, len(FILTROS_BUSQUEDA) + 1)
+            for nombres in itertools.combinations(FILTROS_BUSQUEDA, cantidad)
+        ),
+        lectura("buscar_radio", "/inmuebles/buscar", cerca),
+        lectura("buscar_texto", "/inmuebles/buscar-texto", lambda azar: {
+            "q": azar.choice(["acacias", "lote 45", "rivadavia", "ceibos", "san martin", "acasias", "lucero"]),
+        }),
+        # Grilla de Inventario: orden y filtros al azar, como un usuario navegando
+        lectura("grilla", "/inmuebles/grilla", grilla),
+        lectura("cola", "/inmuebles/cola", lambda azar: {"estado": "Para Publicar", "cursor": azar.randrange(max_id)}),
+        lectura("valuacion", "/inmuebles/valuacion", valuacion),
+        lectura("resumen", "/estadisticas/resumen", lambda azar: {}),
+        lectura("distribucion", "/estadisticas/distribucion", lambda azar: {"agrupar": azar.choice(["ciudad", "tipo", "mes"])}),
+        lectura("cambios", "/cambios", lambda azar: {"limite": 100}),
+        lectura("exportar_csv", "/inmuebles/exportar", lambda azar: {
+            "formato": "csv", "ciudad": azar.choice(ciudades), "estado": azar.choice(estados),
+        }, maximo=20),
+        lectura("health_db", "/health/db", lambda azar: {}),
+    ]
+
+    # Escrituras: cada request toma ids que nadie movió todavía
+    tasaciones = iter(pendientes["Tasación"])
+    para_publicar = iter(pendientes["Para Publicar"])
+    azar_tasar, azar_preparar, azar_importar = azar_de("tasar"), azar_de("preparar"), azar_de("importar")
+
+    def preparar(i):
+        return ("PUT", f"/inmuebles/{next(tasaciones)}/preparar-publicacion", {
+            "params": {"valor_pub": round(azar_preparar.uniform(50_000, 400_000), -2), "version": 1},
+        })
+
+    def publicar(i):
+        return ("PUT", f"/inmuebles/{next(para_publicar)}/publicar", {
+            "params": {"link_portal": f"https://www.zonaprop.com.ar/propiedades/bench-{i}.html", "version": 2},
+        })
+
+    def transicion_lote(i):
+        items = [{"id": id, "valor_publicacion": 100_000, "version": 1} for id in itertools.islice(tasaciones, IDS_POR_LOTE)]
+        return ("POST", "/inmuebles/transicion", {"json": {"estado": "Para Publicar", "items": items}})
+
+    lista += [
+        Escenario("tasar", lambda i: ("POST", "/inmuebles/tasar", {
+            "params": _parametros_tasacion(generador.fila(azar_tasar, max_id + i)),
+        })),
+        Escenario("preparar_publicacion", preparar),
+        Escenario("publicar", publicar),
+        Escenario("transicion_lote", transicion_lote, maximo=20),
+        # Una planilla a la vez, como se usa en la oficina; los lotes que no se guardaron
+        # vuelven con 200 y se informan en con_errores
+        Escenario("importar", lambda i: ("POST", "/inmuebles/importar", {
+            "files": {"archivo": ("planilla.csv", _planilla(azar_importar, max_id + i * FILAS_IMPORTACION))},
+        }), maximo=20, concurrencia=1, fallida=lambda respuesta: respuesta.json()["con_errores"] > 0),
+    ]
+    return lista
+
+# --- EJECUCIÓN ---
+
+async def correr(cliente, escenario: Escenario, requests: int, concurrencia: int) -> dict:
+    """Dispara `requests` pedidos con `concurrencia` en vuelo y resume latencias y errores"""
+    latencias = []
+    errores = 0
+    pendientes = iter(range(requests))
+    vence = time.perf_counter() + SEGUNDOS_MAX_ESCENARIO
+
+    async def trabajador():
+        nonlocal errores
+        for i in pendientes:
+            if time.perf_counter() > vence:
+                break
+            metodo, url, opciones = escenario.pedido(i)
+            inicio = time.perf_counter()
+            respuesta = await cliente.request(metodo, url, **opciones)
+            latencias.append(time.perf_counter() - inicio)
+            if respuesta.status_code >= 400 or (escenario.fallida and escenario.fallida(respuesta)):
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "requests": len(latencias),
+        "errores": errores,
+        "p50_ms": round(percentil(latencias, 0.50) * 1000, 2),
+        "p90_ms": round(percentil(latencias, 0.90) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 0.99) * 1000, 2),
+        "max_ms": round(latencias[-1] * 1000, 2),
+        "req_s": round(len(latencias) / duracion, 1),
+        "rss_pico_mb": rss_pico_mb(),
+    }
+
+def _ids_por_estado(semilla: int) -> tuple:
+    """(mayor id, {estado: ids mezclados}) de la base sintética"""
+    from sqlalchemy import func, select
+    from database import SessionLocal
+    import models
+
+    with SessionLocal() as db:
+        max_id = db.execute(select(func.max(models.Inmueble.id))).scalar()
+        pendientes = {}
+        for estado in ("Tasación", "Para Publicar"):
+            ids = list(db.execute(select(models.Inmueble.id).where(models.Inmueble.estado == estado)).scalars())
+            random.Random(f"{semilla}-{estado}").shuffle(ids)
+            pendientes[estado] = ids
+    return max_id, pendientes
+
+async def ejecutar_suite(app, args) -> dict:
+    import httpx
+
+    max_id, pendientes = _ids_por_estado(args.semilla)
+    seleccion = set(args.escenarios.split(",")) if args.escenarios else None
+    resultados = {}
+    transporte = httpx.ASGITransport(app=app)
+    # ASGITransport no manda los eventos de lifespan: se corre a mano, como haría uvicorn
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        for escenario in escenarios(args.semilla, max_id, pendientes):
+            if seleccion and not any(escenario.nombre.startswith(prefijo) for prefijo in seleccion):
+                continue
+            requests = min(args.requests, escenario.maximo or args.requests)
+            r = resultados[escenario.nombre] = await correr(
+                cliente, escenario, requests, escenario.concurrencia or args.concurrencia
+            )
+            print(
+                f"{escenario.nombre:<42} {r['requests']:>6} {r['errores']:>5} {r['p50_ms']:>9.1f} {r['p90_ms']:>9.1f} "
+                f"{r['p99_ms']:>9.1f} {r['req_s']:>9.1f} {r['rss_pico_mb']:>8.1f}",
+                flush=True,
+            )
+    return resultados
+
+def comparar(resultados: dict, baseline: dict, tolerancia: float) -> list:
+    """Mensajes de los escenarios que empeoraron respecto del baseline"""
+    regresiones = []
+    for nombre, actual in resultados.items():
+        base = baseline.get("escenarios", {}).get(nombre)
+        if not base:
+            continue
+        for metrica in ("p50_ms", "p99_ms"):
+            if actual[metrica] > base[metrica] * (1 + tolerancia) and actual[metrica] - base[metrica] > UMBRAL_RUIDO_MS:
+                regresiones.append(f"{nombre}: {metrica} {base[metrica]} -> {actual[metrica]}")
+        if actual["req_s"] < base["req_s"] * (1 - tolerancia):
+            regresiones.append(f"{nombre}: req_s {base['req_s']} -> {actual['req_s']}")
+        if actual["errores"] > base["errores"]:
+            regresiones.append(f"{nombre}: errores {base['errores']} -> {actual['errores']}")
+    return regresiones
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de la API sobre un inventario sintético")
+    parser.add_argument("--filas", default="10k", help=f"Cantidad o tamaño de referencia ({', '.join(generador.TAMANIOS)})")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Requests por escenario")
+    parser.add_argument("--escenarios", help="Prefijos de escenarios a correr, separados por coma")
+    parser.add_argument("--cache", default="ninguno", help="CACHE_BACKEND durante la suite (por defecto sin caché)")
+    parser.add_argument("--salida", help="Archivo de resultados (por defecto benchmarks/resultados/<fecha>_<tamaño>.json)")
+    parser.add_argument("--baseline", help="Baseline contra el que comparar (por defecto benchmarks/baseline_<tamaño>.json)")
+    parser.add_argument("--guardar-baseline", action="store_true", help="Guarda estos resultados como baseline")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    args = parser.parse_args()
+
+    filas = generador.TAMANIOS.get(args.filas.lower()) or int(args.filas)
+    etiqueta = _etiqueta(filas)
+    # La aplicación lee la configuración al importarse: se define antes de generar la base
+    ruta_base = os.path.join(tempfile.mkdtemp(prefix="cadema_bench_"), "inventario.db")
+    os.environ["DATABASE_URL"] = "sqlite:///" + ruta_base
+    os.environ["CACHE_BACKEND"] = args.cache
+    generador.base_sqlite(filas, args.semilla, copia=ruta_base)
+    import logging
+    import main
+    # Los errores se cuentan por escenario; el log de cada uno (y el de consultas lentas) solo ensucia la tabla
+    logging.disable(logging.ERROR)
+
+    print(f"{filas} filas, concurrencia {args.concurrencia}, caché {args.cache}")
+    print(f"{'escenario':<42} {'req':>6} {'err':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'req/s':>9} {'RSS MB':>8}")
+    resultados = asyncio.run(ejecutar_suite(main.app, args))
+
+    informe = {
+        "meta": {
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "filas": filas,
+            "semilla": args.semilla,
+            "concurrencia": args.concurrencia,
+            "requests_por_escenario": args.requests,
+            "cache": args.cache,
+            "db_modo": os.getenv("DB_MODO", "sync"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+        },
+        "escenarios": resultados,
+    }
+    salida = args.salida or os.path.join(
+        BENCHMARKS, "resultados", f"{datetime.datetime.now():%Y%m%d_%H%M%S}_{etiqueta}.json"
+    )
+    os.makedirs(os.path.dirname(salida), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as archivo:
+        json.dump(informe, archivo, ensure_ascii=False, indent=2)
+    print(f"Resultados: {salida}")
+
+    ruta_baseline = args.baseline or os.path.join(BENCHMARKS, f"baseline_{etiqueta}.json")
+    if args.guardar_baseline:
+        with open(ruta_baseline, "w", encoding="utf-8") as archivo:
+            json.dump(informe, archivo, ensure_ascii=False, indent=2)
+        print(f"Baseline guardado: {ruta_baseline}")
+    elif os.path.exists(ruta_baseline):
+        with open(ruta_baseline, encoding="utf-8") as archivo:
+            baseline = json.load(archivo)
+        regresiones = comparar(resultados, baseline, args.tolerancia)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}")
+        if regresiones:
+            sys.exit(1)
+        print(f"Sin regresiones respecto de {ruta_baseline} (tolerancia {args.tolerancia:.0%})")
@@ -0,0 +1,149 @@
+# Búsqueda de texto sobre direccion, emprendimiento y tipo_inmueble
+#
+# SQLite:   tabla FTS5 inmuebles_fts (contenido externo sobre inmuebles, sincronizada por
+#           triggers), ranking bm25 y corrección de errores de tipeo con el vocabulario
+#           del índice (inmuebles_fts_vocab).
+# Postgres: columna generada "busqueda" (tsvector) con índice GIN, más un índice de
+#           trigramas (pg_trgm) para las coincidencias aproximadas.
+#
+# Las tablas, triggers e índices los crea la migración 4 (migraciones.py).
+
+from difflib import get_close_matches
+from sqlalchemy import func, literal_column, or_, select, table, column, text
+from sqlalchemy.orm import Session
+from typing import Optional
+import re
+import unicodedata
+import models
+from consultas import COLUMNAS_INMUEBLE, como_dicts, filtros_busqueda
+
+# Texto indexado en Postgres: es la misma expresión del índice de trigramas de la migración 4
+EXPRESION_TEXTO_PG = (
+    "(coalesce(direccion, '') || ' ' || coalesce(emprendimiento, '') || ' ' || coalesce(tipo_inmueble, ''))"
+)
+# Pesos de bm25 por columna del índice FTS5: direccion, emprendimiento, tipo_inmueble
+PESOS_BM25 = (3.0, 2.0, 1.0)
+# Solo se intenta corregir palabras de al menos este largo que no aparezcan en el índice
+LARGO_MIN_CORRECCION = 4
+# Similitud mínima (0 a 1) para reemplazar una palabra por otra del vocabulario
+SIMILITUD_MIN_CORRECCION = 0.75
+
+inmuebles_fts = table("inmuebles_fts", column("rowid"))
+
+def terminos(consulta: str) -> list:
+    """Palabras de la consulta en minúsculas y sin tildes, igual que el tokenizador del índice"""
+    sin_tildes = "".join(
+        caracter for caracter in unicodedata.normalize("NFKD", consulta)
+        if not unicodedata.combining(caracter)
+    )
+    return re.findall(r"\w+", sin_tildes.lower())
+
+# --- SQLITE (FTS5) ---
+
+def _existe_prefijo(db: Session, termino: str) -> bool:
+    return db.execute(
+        text("SELECT 1 FROM inmuebles_fts_vocab WHERE term >= :desde AND term < :hasta LIMIT 1"),
+        {"desde": termino, "hasta": termino + "\uffff"},
+    ).first() is not None
+
+def corregir(db: Session, palabras: list) -> list:
+    """Reemplaza las palabras que no están en el índice por la más parecida del vocabulario"""
+    corregidas = []
+    for palabra in palabras:
+        if len(palabra) < LARGO_MIN_CORRECCION or palabra.isdigit() or _existe_prefijo(db, palabra):
+            corregidas.append(palabra)
+            continue
+        # Candidatas: términos con la misma inicial (los errores de tipeo rara vez cambian la primera letra)
+        candidatas = [
+            termino for (termino,) in db.execute(
+                text("SELECT term FROM inmuebles_fts_vocab WHERE term >= :desde AND term < :hasta"),
+                {"desde": palabra[0], "hasta": palabra[0] + "\uffff"},
+            )
+            if not termino.isdigit()
+        ]
+        parecidas = get_close_matches(palabra, candidatas, n=1, cutoff=SIMILITUD_MIN_CORRECCION)
+        corregidas.append(parecidas[0] if parecidas else palabra)
+    return corregidas
+
+def expresion_fts(palabras: list) -> str:
+    """Cada palabra exacta o como prefijo; la coincidencia exacta suma dos veces en bm25"""
+    return " AND ".join(f'("{palabra}" OR "{palabra}"*)' for palabra in palabras)
+
+def _buscar_sqlite(db: Session, palabras: list, filtros: list, limite: int, desplazamiento: int):
+    corregidas = corregir(db, palabras)
+    # Primero las coincidencias del índice (materializadas, para que el planificador no recorra
+    # la tabla por ciudad/estado y consulte el índice de texto fila por fila), después los filtros
+    coincidencias = (
+        select(
+            inmuebles_fts.c.rowid.label("id"),
+            func.bm25(literal_column("inmuebles_fts"), *PESOS_BM25).label("rango"),
+        )
+        .where(literal_column("inmuebles_fts").op("MATCH")(expresion_fts(corregidas)))
+        .cte("coincidencias")
+        .prefix_with("MATERIALIZED")
+    )
+    origen = coincidencias.join(models.Inmueble.__table__, models.Inmueble.id == coincidencias.c.id)
+
+    # El total sale en la misma pasada que la página (ventana sobre todas las coincidencias)
+    filas = db.execute(
+        select(*COLUMNAS_INMUEBLE.values(), func.count().over().label("total"))
+        .select_from(origen)
+        .where(*filtros)
+        .order_by(coincidencias.c.rango, models.Inmueble.id)
+        .limit(limite)
+        .offset(desplazamiento)
+    ).all()
+    if filas:
+        total = filas[0].total
+    else:
+        total = db.execute(select(func.count()).select_from(origen).where(*filtros)).scalar()
+    items = [dict(zip(COLUMNAS_INMUEBLE, fila)) for fila in filas]
+    return total, items, (" ".join(corregidas) if corregidas != palabras else None)
+
+# --- POSTGRES (tsvector + pg_trgm) ---
+
+def _buscar_postgres(db: Session, palabras: list, filtros: list, limite: int, desplazamiento: int):
+    consulta_ts = func.to_tsquery("simple", " & ".join(f"{palabra}:*" for palabra in palabras))
+    documento = literal_column("busqueda")
+    texto_inmueble = literal_column(EXPRESION_TEXTO_PG)
+    texto_buscado = " ".join(palabras)
+    # Prefijos por el índice GIN del tsvector; errores de tipeo por el de trigramas
+    coincide = or_(documento.op("@@")(consulta_ts), texto_inmueble.op("%")(texto_buscado))
+    rango = func.ts_rank(documento, consulta_ts) + func.similarity(texto_inmueble, texto_buscado)
+
+    total = db.execute(
+        select(func.count()).select_from(models.Inmueble).where(coincide, *filtros)
+    ).scalar()
+    items = como_dicts(db.execute(
+        select(*COLUMNAS_INMUEBLE.values())
+        .where(coincide, *filtros)
+        .order_by(rango.desc(), models.Inmueble.id)
+        .limit(limite)
+        .offset(desplazamiento)
+    ))
+    return total, items, None
+
+# --- BÚSQUEDA ---
+
+def buscar_texto(
+    db: Session,
+    consulta: str,
+    ciudad: Optional[str] = None,
+    estado: Optional[str] = None,
+    pagina: int = 1,
+    limite: int = 20,
+) -> dict:
+    """Página de resultados ordenados por relevancia; "corregida" trae la consulta usada si se corrigió"""
+    palabras = terminos(consulta)
+    respuesta = {"consulta": consulta, "corregida": None, "total": 0, "pagina": pagina, "limite": limite, "items": []}
+    if not palabras:
+        return respuesta
+
+    filtros = filtros_busqueda(ciudad, estado)
+    desplazamiento = (pagina - 1) * limite
+    if db.get_bind().dialect.name == "postgresql":
+        total, items, corregida = _buscar_postgres(db, palabras, filtros, limite, desplazamiento)
+    else:
+        total, items, corregida = _buscar_sqlite(db, palabras, filtros, limite, desplazamiento)
+    respuesta.update(total=total, items=items, corregida=corregida)
+    return respuesta
@@ -0,0 +1,182 @@
+# Caché de respuestas GET con invalidación por versión y ETag
+
+from collections import OrderedDict
+from fastapi import Request, Response
+from typing import Callable, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import serializacion
+
+logger = logging.getLogger(__name__)
+
+# memoria (LRU en proceso), redis (compartido entre procesos) o ninguno
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memoria")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "30"))
+CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", "512"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Espacio de claves de todo lo que depende de la tabla de inmuebles
+INVENTARIO = "inventario"
+
+# --- BACKENDS ---
+# Interfaz mínima: obtener(clave), guardar(clave, valor, ttl), incrementar(clave)
+
+class CacheMemoria:
+    """LRU en proceso con vencimiento por TTL"""
+
+    def __init__(self, max_entradas: int = CACHE_MAX_ENTRADAS, ttl: int = CACHE_TTL):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        # Las versiones no vencen ni se desalojan: perderlas devolvería datos viejos
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._entradas.get(clave)
+            if item is None:
+                return None
+            vence, valor = item
+            if vence < time.monotonic():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave: str, valor: bytes, ttl: Optional[int] = None):
+        vence = time.monotonic() + (ttl or self.ttl)
+        with self._lock:
+            self._entradas[clave] = (vence, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def version(self, clave: str) -> int:
+        return self._versiones.get(clave, 0)
+
+    def incrementar(self, clave: str) -> int:
+        with self._lock:
+            self._versiones[clave] = self._versiones.get(clave, 0) + 1
+            return self._versiones[clave]
+
+class CacheCompartido:
+    """Backend compartido sobre un cliente con la API de redis-py (get/set/incr).
+
+    En desarrollo se puede pasar cualquier objeto con esos métodos (ej: fakeredis)
+    en lugar de un servidor Redis real.
+    """
+
+    def __init__(self, cliente, ttl: int = CACHE_TTL, prefijo: str = "cadema:"):
+        self.cliente = cliente
+        self.ttl = ttl
+        self.prefijo = prefijo
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        return self.cliente.get(self.prefijo + clave)
+
+    def guardar(self, clave: str, valor: bytes, ttl: Optional[int] = None):
+        self.cliente.set(self.prefijo + clave, valor, ex=ttl or self.ttl)
+
+    def version(self, clave: str) -> int:
+        return int(self.cliente.get(self.prefijo + clave) or 0)
+
+    def incrementar(self, clave: str) -> int:
+        return self.cliente.incr(self.prefijo + clave)
+
+class CacheNulo:
+    """Sin caché: siempre recalcula (el ETag sigue funcionando)"""
+
+    def obtener(self, clave):
+        return None
+
+    def guardar(self, clave, valor, ttl=None):
+        pass
+
+    def version(self, clave):
+        return 0
+
+    def incrementar(self, clave):
+        return 0
+
+def crear_backend(nombre: str = CACHE_BACKEND):
+    if nombre == "redis":
+        import redis  # dependencia opcional, solo para el modo compartido
+        return CacheCompartido(redis.Redis.from_url(REDIS_URL))
+    if nombre == "ninguno":
+        return CacheNulo()
+    return CacheMemoria()
+
+backend = crear_backend()
+
+def configurar(nuevo_backend):
+    """Reemplaza el backend en uso (ej: un CacheCompartido con un cliente local)"""
+    global backend
+    backend = nuevo_backend
+
+# --- RESPUESTAS ---
+
+def _clave(espacio: str, request: Request) -> str:
+    """Clave a partir de la ruta y los parámetros normalizados (ordenados, sin vacíos)"""
+    parametros = sorted(
+        (nombre, valor.strip())
+        for nombre, valor in request.query_params.multi_items()
+        if valor.strip()
+    )
+    consulta = "&".join(f"{nombre}={valor}" for nombre, valor in parametros)
+    version = backend.version(f"version:{espacio}")
+    return f"{espacio}:v{version}:{request.url.path}?{consulta}"
+
+def _empaquetar(etag: str, encabezados: dict, cuerpo: bytes) -> bytes:
+    return json.dumps({"etag": etag, "encabezados": encabezados}).encode() + b"\n" + cuerpo
+
+def _desempaquetar(valor: bytes):
+    meta, cuerpo = valor.split(b"\n", 1)
+    meta = json.loads(meta)
+    return meta["etag"], meta["encabezados"], cuerpo
+
+def _coincide_etag(request: Request, etag: str) -> bool:
+    pedido = request.headers.get("if-none-match")
+    if not pedido:
+        return False
+    return pedido.strip() == "*" or etag in [valor.strip() for valor in pedido.split(",")]
+
+async def respuesta_cacheada(
+    request: Request,
+    espacio: str,
+    calcular: Callable,
+    encabezados: Optional[Callable[[object], dict]] = None,
+) -> Response:
+    """Devuelve la respuesta guardada o la calcula con `await calcular()`, con soporte de If-None-Match (304)"""
+    clave = _clave(espacio, request)
+    valor = backend.obtener(clave)
+    estado_cache = "HIT"
+    if valor is None:
+        estado_cache = "MISS"
+        datos = await calcular()
+        cuerpo = serializacion.a_json(datos)
+        etag = '"' + hashlib.blake2b(cuerpo, digest_size=16).hexdigest() + '"'
+        extra = encabezados(datos) if encabezados else {}
+        backend.guardar(clave, _empaquetar(etag, extra, cuerpo))
+    else:
+        etag, extra, cuerpo = _desempaquetar(valor)
+
+    if _coincide_etag(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "X-Cache": estado_cache})
+    return Response(
+        content=cuerpo,
+        media_type="application/json",
+        headers={**extra, "ETag": etag, "X-Cache": estado_cache},
+    )
+
+def invalidar(espacio: str = INVENTARIO):
+    """Sube la versión del espacio: las entradas anteriores dejan de encontrarse y vencen solas"""
+    try:
+        backend.incrementar(f"version:{espacio}")
+    except Exception as e:
+        # Si el backend compartido no responde, las entradas igual vencen por TTL
+        logger.error(f"No se pudo invalidar la caché de {espacio}: {str(e)}")
@@ -0,0 +1,136 @@
+# Registro de transiciones del flujo (Tasación → Para Publicar → Publicado) y feed de cambios
+#
+# Cada alta y cada cambio de estado agrega una fila a transiciones_inmuebles en la misma
+# transacción que el cambio (se engancha en estadisticas.registrar_cambios). La tabla solo
+# recibe INSERT: su id es el cursor de /cambios, y quien guarda el último id leído recibe
+# después exactamente lo que pasó desde entonces.
+#
+# Para sincronizar desde cero: leer "ultimo" de /cambios, exportar el inventario
+# (/inmuebles/exportar) y seguir el feed desde ese cursor.
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import datetime
+import json
+import os
+import time
+import models
+import estadisticas
+import serializacion
+from database import LECTURA, nueva_sesion
+
+# Cada cuánto se vuelve a consultar el registro mientras un long-poll o un stream espera
+CAMBIOS_INTERVALO_S = float(os.getenv("CAMBIOS_INTERVALO_S", "1"))
+# Duración máxima de una conexión SSE; el cliente reconecta solo con Last-Event-ID
+CAMBIOS_SSE_MAX_S = float(os.getenv("CAMBIOS_SSE_MAX_S", "300"))
+# Comentario que mantiene viva la conexión SSE ante proxies que cortan las ociosas
+CAMBIOS_SSE_PING_S = 15
+
+# Clave del advisory lock de Postgres que ordena las inserciones en el registro (ver registrar)
+LOCK_REGISTRO_PG = 20_020
+
+# --- ESCRITURA ---
+
+def _diferencias(antes, despues: dict) -> dict:
+    """Columnas que cambiaron (en un alta, todas las que tienen valor)"""
+    return {
+        columna: valor for columna, valor in despues.items()
+        if columna not in ("id", "estado", "version")
+        and (valor != antes.get(columna) if antes else valor is not None)
+    }
+
+def registrar(db: Session, pares):
+    """Agrega una transición por cada alta o cambio de estado de (antes, despues)"""
+    ahora = datetime.datetime.utcnow()
+    filas = [
+        {
+            "inmueble_id": despues["id"],
+            "estado_anterior": antes["estado"] if antes else None,
+            "estado": despues["estado"],
+            "version": despues.get("version") or 1,
+            "ocurrido_en": ahora,
+            "cambios": serializacion.a_json(_diferencias(antes, despues)).decode(),
+        }
+        for antes, despues in pares
+        if despues is not None and (antes is None or antes.get("estado") != despues.get("estado"))
+    ]
+    if not filas:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        # Los ids de una secuencia se reparten al insertar, no al confirmar: sin este lock un
+        # lector podría ver el 11 antes de que se confirme el 10 y saltearlo con su cursor.
+        # Se libera con el commit; SQLite ya serializa las escrituras.
+        db.execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": LOCK_REGISTRO_PG})
+    db.execute(insert(models.TransicionInmueble), filas)
+
+estadisticas.suscriptores_cambios.append(registrar)
+
+# --- LECTURA ---
+
+def consulta_cambios(desde: int, limite: int):
+    """Transiciones posteriores al cursor en orden de id (recorre la clave primaria)"""
+    T = models.TransicionInmueble
+    return (
+        select(T.id, T.inmueble_id, T.estado_anterior, T.estado, T.version, T.ocurrido_en, T.cambios)
+        .where(T.id > desde).order_by(T.id).limit(limite)
+    )
+
+def leer(db: Session, desde: int, limite: int) -> dict:
+    """Transiciones con id > desde, en orden; cursor es el id a pasar como since la próxima vez"""
+    T = models.TransicionInmueble
+    # Una fila de más para saber si hay otra página
+    filas = db.execute(consulta_cambios(desde, limite + 1)).all()
+    items = [
+        {
+            "id": fila.id, "inmueble_id": fila.inmueble_id, "estado_anterior": fila.estado_anterior,
+            "estado": fila.estado, "version": fila.version, "ocurrido_en": fila.ocurrido_en,
+            "cambios": json.loads(fila.cambios) if fila.cambios else {},
+        }
+        for fila in filas[:limite]
+    ]
+    return {
+        "items": items,
+        "cursor": items[-1]["id"] if items else desde,
+        "hay_mas": len(filas) > limite,
+        "ultimo": db.execute(select(func.max(T.id))).scalar() or 0,
+    }
+
+def _leer_con_sesion(desde: int, limite: int) -> dict:
+    # Sesión propia por consulta: entre una y otra la conexión vuelve al pool
+    # (un long-poll no debe retener una conexión mientras espera)
+    with nueva_sesion(LECTURA) as db:
+        return leer(db, desde, limite)
+
+async def esperar(desde: int, limite: int, espera: float) -> dict:
+    """Long-poll: responde apenas hay transiciones nuevas o al cumplirse `espera` segundos"""
+    vence = time.monotonic() + espera
+    while True:
+        pagina = await run_in_threadpool(_leer_con_sesion, desde, limite)
+        restante = vence - time.monotonic()
+        if pagina["items"] or restante <= 0:
+            return pagina
+        # Se consulta la base (y no un aviso en memoria) para ver también lo que escriben
+        # otros procesos: otros workers, importaciones o scripts
+        await asyncio.sleep(min(CAMBIOS_INTERVALO_S, restante))
+
+async def eventos_sse(request, desde: int, limite: int):
+    """Server-Sent Events: un evento 'cambio' por transición, con su id como Last-Event-ID"""
+    vence = time.monotonic() + CAMBIOS_SSE_MAX_S
+    ultimo_envio = time.monotonic()
+    # El cliente espera este tiempo antes de reconectar cuando se cierra el stream
+    yield f"retry: {int(CAMBIOS_INTERVALO_S * 1000)}\n\n".encode()
+    while time.monotonic() < vence and not await request.is_disconnected():
+        pagina = await run_in_threadpool(_leer_con_sesion, desde, limite)
+        for item in pagina["items"]:
+            yield b"id: %d\nevent: cambio\ndata: %s\n\n" % (item["id"], serializacion.a_json(item))
+        if pagina["items"]:
+            desde = pagina["cursor"]
+            ultimo_envio = time.monotonic()
+            if pagina["hay_mas"]:
+                continue
+        elif time.monotonic() - ultimo_envio >= CAMBIOS_SSE_PING_S:
+            yield b": ping\n\n"
+            ultimo_envio = time.monotonic()
+        await asyncio.sleep(CAMBIOS_INTERVALO_S)
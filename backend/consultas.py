@@ -0,0 +1,291 @@
+# Consultas y operaciones sobre la tabla de inmuebles
+# Todas reciben una Session sync: los endpoints las corren con database.ejecutar,
+# que las manda al threadpool (modo sync) o a run_sync (modo async).
+
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.orm import Session
+from typing import Optional
+import base64
+import datetime
+import json
+import models
+import estadisticas
+
+# Columnas que se pueden pedir con ?fields=
+COLUMNAS_INMUEBLE = {columna.name: columna for columna in models.Inmueble.__table__.columns}
+
+def filtros_busqueda(
+    ciudad: Optional[str] = None,
+    estado: Optional[str] = None,
+    precio_min: Optional[float] = None,
+    precio_max: Optional[float] = None,
+):
+    """Condiciones WHERE de /inmuebles/buscar (también las usa la verificación de planes)"""
+    filtros = []
+    if ciudad:
+        filtros.append(models.Inmueble.ciudad == ciudad)
+    if estado:
+        filtros.append(models.Inmueble.estado == estado)
+    if precio_min:
+        filtros.append(models.Inmueble.valor_tasacion >= precio_min)
+    if precio_max:
+        filtros.append(models.Inmueble.valor_tasacion <= precio_max)
+    return filtros
+
+def consulta_listado(columnas, cursor: Optional[int]):
+    """SELECT de las columnas pedidas, ordenado por id a partir del cursor (keyset)"""
+    consulta = select(*columnas).order_by(models.Inmueble.id)
+    if cursor is not None:
+        consulta = consulta.where(models.Inmueble.id > cursor)
+    return consulta
+
+# --- LECTURAS ---
+
+def como_dicts(resultado) -> list:
+    """Filas de un SELECT de columnas como dicts: zip de tuplas, sin armar objetos del ORM"""
+    nombres = list(resultado.keys())
+    return [dict(zip(nombres, fila)) for fila in resultado.tuples()]
+
+def listar_pagina(db: Session, columnas, cursor: Optional[int], limite: int) -> list:
+    return como_dicts(db.execute(consulta_listado(columnas, cursor).limit(limite)))
+
+def buscar(db: Session, ciudad=None, estado=None, precio_min=None, precio_max=None) -> list:
+    consulta = select(*COLUMNAS_INMUEBLE.values()).where(
+        *filtros_busqueda(ciudad, estado, precio_min, precio_max)
+    )
+    return como_dicts(db.execute(consulta))
+
+# Campos que muestra cada tarjeta de la cola de trabajo (pestaña Publicar)
+CAMPOS_COLA = [
+    "id", "direccion", "ciudad", "emprendimiento", "tipo_inmueble",
+    "sup_cubierta", "sup_terreno", "valor_tasacion", "valor_publicacion", "version",
+]
+
+def consulta_cola(estado: str, cursor: Optional[int] = None):
+    """Inmuebles de un estado en orden de id; recorre ix_inmuebles_estado_id sin ordenar aparte"""
+    consulta = (
+        select(*(COLUMNAS_INMUEBLE[campo] for campo in CAMPOS_COLA))
+        .where(models.Inmueble.estado == estado)
+        .order_by(models.Inmueble.id)
+    )
+    if cursor is not None:
+        consulta = consulta.where(models.Inmueble.id > cursor)
+    return consulta
+
+def cola_por_estado(db: Session, estado: str, cursor: Optional[int], limite: int) -> dict:
+    """Página de la cola de un estado, con el total pendiente y el cursor de la siguiente"""
+    items = como_dicts(db.execute(consulta_cola(estado, cursor).limit(limite)))
+    total = db.execute(
+        select(func.count()).select_from(models.Inmueble).where(models.Inmueble.estado == estado)
+    ).scalar()
+    return {
+        "estado": estado,
+        "total": total,
+        "items": items,
+        "siguiente_cursor": items[-1]["id"] if len(items) == limite else None,
+    }
+
+# Columnas de la grilla de la pestaña Inventario y las que se pueden usar para ordenarla
+CAMPOS_GRILLA = [
+    "id", "estado", "ciudad", "direccion", "tipo_inmueble",
+    "valor_tasacion", "valor_publicacion", "fecha_tasacion", "fecha_publicacion", "version",
+]
+ORDENES_GRILLA = ["id", "ciudad", "direccion", "valor_tasacion", "valor_publicacion", "fecha_tasacion", "fecha_publicacion"]
+
+def consulta_grilla(orden: str = "id", descendente: bool = True, filtros=()):
+    """Grilla ordenada por una columna; el id desempata para que las páginas no se solapen.
+    Cada orden recorre su índice (columna, id) de la migración 9 sin ordenar aparte"""
+    columnas = [COLUMNAS_INMUEBLE[orden]] + ([models.Inmueble.id] if orden != "id" else [])
+    return (
+        select(*(COLUMNAS_INMUEBLE[campo] for campo in CAMPOS_GRILLA))
+        .where(*filtros)
+        .order_by(*(columna.desc() if descendente else columna for columna in columnas))
+    )
+
+def nulos_primero(dialecto: str, descendente: bool) -> bool:
+    """Si los NULL de la columna de orden salen antes que los valores: SQLite los toma como
+    el menor valor y Postgres como el mayor (en los dos es el orden de sus índices)"""
+    return (dialecto != "postgresql") != descendente
+
+def consultas_grilla_desde(orden: str, descendente: bool, filtros, valor, id: int, nulos_al_principio: bool) -> list:
+    """Consultas que siguen la grilla después de la fila (valor, id), en orden.
+
+    Cada tramo es una búsqueda exacta en el índice (columna, id): lo que queda con el mismo
+    valor (por id), los valores siguientes y los NULL, antes o después según nulos_al_principio.
+    La página se completa con la primera y, si no alcanza, con las siguientes.
+    """
+    I = models.Inmueble
+    columna = COLUMNAS_INMUEBLE[orden]
+    sigue_id = I.id < id if descendente else I.id > id
+    if orden == "id":
+        return [consulta_grilla(orden, descendente, filtros).where(sigue_id)]
+    por_id = select(*(COLUMNAS_INMUEBLE[campo] for campo in CAMPOS_GRILLA)).order_by(I.id.desc() if descendente else I.id)
+    nulos = por_id.where(*filtros, columna.is_(None))
+    if valor is None:
+        tramos = [nulos.where(sigue_id)]
+        if nulos_al_principio:
+            tramos.append(consulta_grilla(orden, descendente, filtros).where(columna.isnot(None)))
+        return tramos
+    siguientes = columna < valor if descendente else columna > valor
+    tramos = [
+        por_id.where(*filtros, columna == valor, sigue_id),
+        consulta_grilla(orden, descendente, filtros).where(siguientes),
+    ]
+    if not nulos_al_principio:
+        tramos.append(nulos)
+    return tramos
+
+def codificar_cursor_grilla(orden: str, descendente: bool, valor, id: int) -> str:
+    """Cursor opaco con la última fila de la página y el orden en que se leyó"""
+    if isinstance(valor, datetime.date):
+        valor = valor.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([orden, descendente, valor, id]).encode()).decode()
+
+def decodificar_cursor_grilla(cursor: str, orden: str, descendente: bool) -> tuple:
+    """(valor, id) del cursor; ValueError si no es válido o es de otro orden"""
+    try:
+        orden_cursor, descendente_cursor, valor, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if valor is not None and COLUMNAS_INMUEBLE[orden].type.python_type is datetime.date:
+            valor = datetime.date.fromisoformat(valor)
+        id = int(id)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor de grilla inválido")
+    if (orden_cursor, descendente_cursor) != (orden, descendente):
+        raise ValueError("El cursor es de otro orden de la grilla: volver a la primera página")
+    return valor, id
+
+def pagina_grilla(db: Session, limite: int, orden: str, descendente: bool, cursor: Optional[str] = None, **filtros) -> dict:
+    """Una página de la grilla (keyset sobre (orden, id)): lo que cuesta depende de limite, no del inventario.
+    El total filtrado se cuenta solo en la primera página; las siguientes llegan con el cursor"""
+    condiciones = filtros_busqueda(**filtros)
+    total = None
+    if cursor is None:
+        items = como_dicts(db.execute(consulta_grilla(orden, descendente, condiciones).limit(limite)))
+        total = db.execute(select(func.count()).select_from(models.Inmueble).where(*condiciones)).scalar()
+    else:
+        valor, id = decodificar_cursor_grilla(cursor, orden, descendente)
+        nulos = nulos_primero(db.get_bind().dialect.name, descendente)
+        items = []
+        for consulta in consultas_grilla_desde(orden, descendente, condiciones, valor, id, nulos):
+            items += como_dicts(db.execute(consulta.limit(limite - len(items))))
+            if len(items) == limite:
+                break
+    siguiente = None
+    if len(items) == limite:
+        siguiente = codificar_cursor_grilla(orden, descendente, items[-1][orden], items[-1]["id"])
+    return {
+        "total": total, "limite": limite, "orden": orden, "descendente": descendente,
+        "items": items, "siguiente_cursor": siguiente,
+    }
+
+# --- FLUJO INMOBILIARIO ---
+
+def registrar_tasacion(db: Session, datos: dict) -> models.Inmueble:
+    """Inserta una tasación nueva y actualiza los contadores en la misma transacción"""
+    nuevo = models.Inmueble(estado="Tasación", fecha_tasacion=datetime.date.today(), **datos)
+    db.add(nuevo)
+    # El INSERT va antes de registrar el cambio para que el registro de transiciones tenga el id
+    db.flush()
+    estadisticas.registrar_cambio(db, None, estadisticas.instantanea(nuevo))
+    db.commit()
+    db.refresh(nuevo)
+    return nuevo
+
+def registrar_tasaciones(db: Session, lista: list) -> list:
+    """Inserta varias tasaciones en una transacción (un INSERT ... RETURNING) y devuelve sus ids en orden"""
+    hoy = datetime.date.today()
+    filas = [{**datos, "estado": "Tasación", "fecha_tasacion": hoy} for datos in lista]
+    ids = db.execute(
+        insert(models.Inmueble).returning(models.Inmueble.id, sort_by_parameter_order=True), filas
+    ).scalars().all()
+    for fila, id in zip(filas, ids):
+        fila["id"] = id
+    estadisticas.registrar_cambios(db, [(None, fila) for fila in filas])
+    db.commit()
+    return ids
+
+# estado destino: (estado en el que tiene que estar el inmueble, columnas que completa la transición)
+# Esas columnas siguen vacías en el estado previo: el flujo las llena recién al pasar al destino
+TRANSICIONES = {
+    "Para Publicar": ("Tasación", ("valor_publicacion",)),
+    "Publicado": ("Para Publicar", ("link_portal", "fecha_publicacion")),
+}
+
+class ConflictoDeEstado(Exception):
+    """El inmueble no está en el estado (o la versión) que espera la transición"""
+    def __init__(self, conflicto: dict):
+        super().__init__(f"Inmueble {conflicto['id']} en estado {conflicto['estado']}, versión {conflicto['version']}")
+        self.conflicto = conflicto
+
+def transicionar(db: Session, destino: str, por_id: dict, versiones: Optional[dict] = None):
+    """Pasa a `destino` los inmuebles de por_id ({id: {columna: valor}}) con un solo UPDATE ... RETURNING.
+
+    Solo cambian los que siguen en el estado previo y, si se indica su versión, en esa versión:
+    dos usuarios que mueven el mismo inmueble no se pisan, el segundo recibe un conflicto.
+    Devuelve (filas actualizadas, conflictos); cada conflicto es {id, estado, version}
+    con estado None si el inmueble no existe.
+    """
+    I = models.Inmueble
+    previo, _ = TRANSICIONES[destino]
+    ids = list(por_id)
+    valores = {"estado": destino, "version": I.version + 1}
+    if destino == "Publicado":
+        valores["fecha_publicacion"] = datetime.date.today()
+    # Un valor distinto por id: CASE id WHEN ... THEN ... dentro del mismo UPDATE
+    for columna in {columna for cambios in por_id.values() for columna in cambios}:
+        por_fila = {id: cambios[columna] for id, cambios in por_id.items() if columna in cambios}
+        valores[columna] = case(por_fila, value=I.id, else_=COLUMNAS_INMUEBLE[columna])
+
+    sentencia = update(I).where(I.id.in_(ids), I.estado == previo).values(valores)
+    if versiones:
+        sentencia = sentencia.where(I.version == case(versiones, value=I.id, else_=I.version))
+    actualizados = como_dicts(db.execute(
+        sentencia.returning(*COLUMNAS_INMUEBLE.values()).execution_options(synchronize_session=False)
+    ))
+
+    pares = []
+    for despues in actualizados:
+        antes = dict(despues, estado=previo, version=despues["version"] - 1)
+        antes.update(dict.fromkeys(TRANSICIONES[destino][1]))
+        pares.append((antes, despues))
+    estadisticas.registrar_cambios(db, pares)
+    db.commit()
+
+    conflictos = []
+    faltantes = set(ids) - {fila["id"] for fila in actualizados}
+    if faltantes:
+        encontrados = {
+            fila.id: fila for fila in db.execute(select(I.id, I.estado, I.version).where(I.id.in_(faltantes)))
+        }
+        for id in sorted(faltantes):
+            fila = encontrados.get(id)
+            conflictos.append({"id": id, "estado": fila.estado if fila else None, "version": fila.version if fila else None})
+    return actualizados, conflictos
+
+def _transicionar_uno(db: Session, destino: str, id: int, cambios: dict, version: Optional[int]) -> Optional[dict]:
+    actualizados, conflictos = transicionar(db, destino, {id: cambios}, {id: version} if version is not None else None)
+    if actualizados:
+        return actualizados[0]
+    if conflictos[0]["estado"] is None:
+        return None
+    raise ConflictoDeEstado(conflictos[0])
+
+def preparar_publicacion(db: Session, id: int, valor_pub: float, version: Optional[int] = None) -> Optional[dict]:
+    """Pasa el inmueble de "Tasación" a "Para Publicar"; None si no existe, ConflictoDeEstado si ya cambió"""
+    return _transicionar_uno(db, "Para Publicar", id, {"valor_publicacion": valor_pub}, version)
+
+def completar_publicacion(db: Session, id: int, link_portal: str, version: Optional[int] = None) -> Optional[dict]:
+    """Pasa el inmueble de "Para Publicar" a "Publicado"; None si no existe, ConflictoDeEstado si ya cambió"""
+    return _transicionar_uno(db, "Publicado", id, {"link_portal": link_portal}, version)
+
+def transicionar_lote(db: Session, destino: str, items: list) -> dict:
+    """Transición de muchos inmuebles en un solo UPDATE; items: [{id, version?, columnas del destino}]"""
+    columnas = TRANSICIONES[destino][1]
+    por_id = {item["id"]: {columna: item[columna] for columna in columnas if item.get(columna) is not None} for item in items}
+    versiones = {item["id"]: item["version"] for item in items if item.get("version") is not None}
+    actualizados, conflictos = transicionar(db, destino, por_id, versiones)
+    return {
+        "estado": destino,
+        "actualizados": [{"id": fila["id"], "version": fila["version"]} for fila in actualizados],
+        "conflictos": conflictos,
+    }
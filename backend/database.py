@@ -1,19 +1,86 @@
 # Conexión a la Base de Datos
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from starlette.concurrency import run_in_threadpool
 import os
+import time
 
 # Si estamos en la nube (Render), usaremos una URL de base de datos real
 # Si estamos en local, creará un archivo llamado inmobiliaria.db
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./inmobiliaria.db")
 
-# Ajuste necesario para SQLite
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# "sync": sesiones clásicas en el threadpool; "async": aiosqlite / asyncpg en el event loop
+DB_MODO = os.getenv("DB_MODO", "sync")
+
+# Lecturas (ver "LECTURAS Y ESCRITURAS" más abajo): URL de una réplica de Postgres, o con
+# DB_LECTURAS_SOLO_LECTURA=1 y SQLite, conexiones de solo lectura al mismo archivo
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+DB_LECTURAS_SOLO_LECTURA = os.getenv("DB_LECTURAS_SOLO_LECTURA", "0") == "1"
+
+# Pool de conexiones (configurable por entorno)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Render/Postgres cierra conexiones ociosas: se reciclan antes y se verifican al sacarlas del pool
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+# Pragmas de SQLite que se aplican en cada conexión nueva
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+def _es_sqlite_en_memoria(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":"))
+
+def opciones_engine(url: str) -> dict:
+    """Argumentos de create_engine según el tipo de base"""
+    opciones = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if url.startswith("sqlite"):
+        opciones["connect_args"] = {"check_same_thread": False}
+    # SQLite en memoria usa un pool de una conexión por hilo, sin tamaño ni overflow
+    if not _es_sqlite_en_memoria(url):
+        opciones.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return opciones
+
+def _pragmas_sqlite(conexion_dbapi, registro):
+    """WAL para que las lecturas no esperen a las escrituras, y espera en vez de 'database is locked'"""
+    cursor = conexion_dbapi.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+def _pragmas_sqlite_lectura(conexion_dbapi, registro):
+    """Como _pragmas_sqlite, sin tocar el modo del journal (lo fija la conexión de escritura)"""
+    cursor = conexion_dbapi.cursor()
+    cursor.execute("PRAGMA query_only=1")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+def url_solo_lectura(url: str) -> str:
+    """sqlite:///ruta -> URI de SQLite que abre el mismo archivo en modo de solo lectura"""
+    ruta = make_url(url).database
+    return f"sqlite:///file:{os.path.abspath(ruta)}?mode=ro&uri=true"
+
+def url_lectura(url: str = SQLALCHEMY_DATABASE_URL) -> str:
+    """URL a la que van las lecturas: la réplica, el archivo en solo lectura o la misma primaria"""
+    if DATABASE_READ_URL:
+        return DATABASE_READ_URL
+    if DB_LECTURAS_SOLO_LECTURA and url.startswith("sqlite") and not _es_sqlite_en_memoria(url):
+        return url_solo_lectura(url)
+    return url
+
+def crear_engine(url: str, solo_lectura: bool = False):
+    motor = create_engine(url, **opciones_engine(url))
+    if url.startswith("sqlite"):
+        event.listen(motor, "connect", _pragmas_sqlite_lectura if solo_lectura else _pragmas_sqlite)
+    return motor
+
+engine = crear_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -23,4 +90,158 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# --- LECTURAS Y ESCRITURAS ---
+# Los endpoints piden la sesión según lo que van a hacer: LECTURA va al engine de lecturas
+# (una réplica, o conexiones de solo lectura al archivo SQLite en WAL, que no compiten con
+# el que escribe) y ESCRITURA a la primaria. Sin DATABASE_READ_URL ni
+# DB_LECTURAS_SOLO_LECTURA los dos son el mismo engine.
+# Una réplica de Postgres puede ir atrasada: lo que se lee después de escribir (el id
+# recién creado, el estado que sigue a una transición) se lee con la sesión de escritura.
+LECTURA = "lectura"
+ESCRITURA = "escritura"
+
+if url_lectura() == SQLALCHEMY_DATABASE_URL:
+    engine_lectura = engine
+else:
+    engine_lectura = crear_engine(url_lectura(), solo_lectura=not DATABASE_READ_URL)
+
+SessionLecturaLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine_lectura)
+FABRICAS_SESION = {LECTURA: SessionLecturaLocal, ESCRITURA: SessionLocal}
+
+def nueva_sesion(intencion: str = ESCRITURA) -> Session:
+    """Sesión sync del engine que corresponde a la intención (LECTURA o ESCRITURA)"""
+    return FABRICAS_SESION[intencion]()
+
+def get_db_lectura():
+    db = SessionLecturaLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# --- MODO ASYNC ---
+
+def url_async(url: str) -> str:
+    """Traduce la URL sync al driver async equivalente"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    # Render entrega postgres://, SQLAlchemy espera postgresql://
+    for prefijo in ("postgres://", "postgresql://", "postgresql+psycopg2://"):
+        if url.startswith(prefijo):
+            return "postgresql+asyncpg://" + url[len(prefijo):]
+    return url
+
+async_engine = None
+async_engine_lectura = None
+AsyncSessionLocal = None
+AsyncSessionLecturaLocal = None
+
+if DB_MODO == "async":
+    # Solo se importa en modo async: aiosqlite/asyncpg no hacen falta en modo sync
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    opciones_async = opciones_engine(SQLALCHEMY_DATABASE_URL)
+    opciones_async.pop("connect_args", None)
+    if "pool_size" in opciones_async:
+        # aiosqlite usa NullPool por defecto: sin pool no hay conexiones para reutilizar ni medir
+        opciones_async["poolclass"] = AsyncAdaptedQueuePool
+    def crear_engine_async(url: str, solo_lectura: bool = False):
+        motor = create_async_engine(url_async(url), **opciones_async)
+        if url.startswith("sqlite"):
+            event.listen(motor.sync_engine, "connect", _pragmas_sqlite_lectura if solo_lectura else _pragmas_sqlite)
+        return motor
+
+    async_engine = crear_engine_async(SQLALCHEMY_DATABASE_URL)
+    async_engine_lectura = async_engine
+    if engine_lectura is not engine:
+        async_engine_lectura = crear_engine_async(url_lectura(), solo_lectura=not DATABASE_READ_URL)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autocommit=False, autoflush=False, expire_on_commit=False)
+    AsyncSessionLecturaLocal = async_sessionmaker(
+        async_engine_lectura, autocommit=False, autoflush=False, expire_on_commit=False
+    )
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_db_lectura():
+    async with AsyncSessionLecturaLocal() as db:
+        yield db
+
+# Dependencias de sesión para los endpoints según DB_MODO: get_sesion para los que escriben
+# (o leen lo que acaban de escribir) y get_sesion_lectura para los que solo leen
+get_sesion = get_async_db if DB_MODO == "async" else get_db
+get_sesion_lectura = get_async_db_lectura if DB_MODO == "async" else get_db_lectura
+
+async def ejecutar(db, funcion, *args, **kwargs):
+    """Corre funcion(sesion, *args) con la sesión del modo activo y hace rollback si falla.
+
+    En modo async usa run_sync (la E/S va por el driver async sin bloquear el loop);
+    en modo sync manda la función al threadpool, como hacía FastAPI con los def.
+    """
+    def en_transaccion(sesion):
+        try:
+            return funcion(sesion, *args, **kwargs)
+        except Exception:
+            sesion.rollback()
+            raise
+
+    if AsyncSessionLocal is not None and not isinstance(db, Session):
+        return await db.run_sync(en_transaccion)
+    return await run_in_threadpool(en_transaccion, db)
+
+# --- SALUD ---
+
+def estado_pool(motor) -> dict:
+    """Conexiones del pool: en uso, libres y de overflow"""
+    pool = motor.pool
+    estado = {"pool": type(pool).__name__}
+    for nombre, metodo in (("tamanio", "size"), ("libres", "checkedin"),
+                           ("en_uso", "checkedout"), ("overflow", "overflow")):
+        valor = getattr(pool, metodo, None)
+        if callable(valor):
+            estado[nombre] = valor()
+    return estado
+
+def _conexiones_a_calentar(motor, conexiones) -> int:
+    tamanio = getattr(motor.pool, "size", None)
+    return min(conexiones, tamanio()) if callable(tamanio) else 1
+
+def calentar_pool(motor, conexiones: int = DB_POOL_SIZE) -> int:
+    """Abre hasta `conexiones` conexiones (con sus pragmas) y las deja libres en el pool"""
+    abiertas = []
+    try:
+        for _ in range(_conexiones_a_calentar(motor, conexiones)):
+            abiertas.append(motor.connect())
+            abiertas[-1].execute(text("SELECT 1"))
+    finally:
+        for conexion in abiertas:
+            conexion.close()
+    return len(abiertas)
+
+async def calentar_pool_async(motor, conexiones: int = DB_POOL_SIZE) -> int:
+    abiertas = []
+    try:
+        for _ in range(_conexiones_a_calentar(motor.sync_engine, conexiones)):
+            abiertas.append(await motor.connect())
+            await abiertas[-1].execute(text("SELECT 1"))
+    finally:
+        for conexion in abiertas:
+            await conexion.close()
+    return len(abiertas)
+
+def latencia_conexion(motor) -> float:
+    """Milisegundos para sacar una conexión del pool y ejecutar SELECT 1"""
+    inicio = time.perf_counter()
+    with motor.connect() as conexion:
+        conexion.execute(text("SELECT 1"))
+    return (time.perf_counter() - inicio) * 1000
+
+async def latencia_conexion_async(motor) -> float:
+    inicio = time.perf_counter()
+    async with motor.connect() as conexion:
+        await conexion.execute(text("SELECT 1"))
+    return (time.perf_counter() - inicio) * 1000
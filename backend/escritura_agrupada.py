@@ -0,0 +1,134 @@
+# Escritura agrupada de tasaciones (write-behind)
+#
+# Con TASAR_AGRUPAR=1, POST /inmuebles/tasar no escribe en su propia transacción: deja la
+# tasación en una cola en memoria y espera. Un worker junta lo que llega durante
+# TASAR_AGRUPAR_MS milisegundos (o hasta TASAR_AGRUPAR_FILAS filas) y lo inserta en una sola
+# transacción con INSERT ... RETURNING. Cada request recibe su id recién después del commit,
+# así que la respuesta sigue significando "quedó guardado": lo que cambia es que N tasaciones
+# concurrentes pagan un solo commit (un fsync) y toman el lock de escritura de SQLite una vez.
+# Mientras los lotes sean de una sola tasación no se espera el plazo, para no demorar
+# a quien carga de a una sin nadie más escribiendo.
+#
+# Si el lote falla, cada tasación se reintenta sola para que un error no arrastre a las demás.
+# Lo pendiente vive solo en memoria, pero ninguna request respondió todavía por esas filas.
+
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import contextvars
+import logging
+import os
+import time
+import consultas
+import metricas
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+AGRUPAR = os.getenv("TASAR_AGRUPAR", "0") == "1"
+# Espera máxima desde la primera tasación del lote hasta el commit
+AGRUPAR_MS = float(os.getenv("TASAR_AGRUPAR_MS", "5"))
+# Con esta cantidad el lote se escribe sin esperar el plazo
+AGRUPAR_FILAS = int(os.getenv("TASAR_AGRUPAR_FILAS", "200"))
+
+class _Cola:
+    """Cola y worker de un event loop (cada TestClient, por ejemplo, corre en uno propio)"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.pendientes = asyncio.Queue()
+        self.ultimo_lote = 0
+        # Contexto vacío: el worker no debe heredar el de la request que lo crea
+        # (las métricas de consultas se le atribuirían a esa request). La tarea copia el
+        # contexto en el que se crea; create_task(context=...) recién existe desde Python 3.11
+        self.worker = contextvars.Context().run(loop.create_task, self._trabajar())
+
+    async def _trabajar(self):
+        # None en la cola es el aviso de cierre: se escribe lo juntado hasta ahí y se termina
+        while True:
+            primero = await self.pendientes.get()
+            if primero is None:
+                return
+            lote = [primero]
+            # Si el lote anterior fue de una sola tasación no hay con quién agrupar: esperar
+            # solo sumaría latencia (el caso de un único usuario cargando de a una)
+            vence = time.monotonic() + (AGRUPAR_MS / 1000 if self.ultimo_lote > 1 else 0)
+            cerrar = False
+            while len(lote) < AGRUPAR_FILAS and not cerrar:
+                restante = vence - time.monotonic()
+                if restante <= 0:
+                    # Vencido el plazo, lo que ya llegó también entra, sin volver a esperar
+                    if self.pendientes.empty():
+                        break
+                    siguiente = self.pendientes.get_nowait()
+                else:
+                    try:
+                        siguiente = await asyncio.wait_for(self.pendientes.get(), restante)
+                    except asyncio.TimeoutError:
+                        break
+                if siguiente is None:
+                    cerrar = True
+                else:
+                    lote.append(siguiente)
+            self.ultimo_lote = len(lote)
+            await self._escribir(lote)
+            if cerrar:
+                return
+
+    async def _escribir(self, lote: list):
+        vigentes = [(datos, futuro) for datos, futuro in lote if not futuro.done()]
+        if not vigentes:
+            return
+        try:
+            ids = await run_in_threadpool(_insertar, [datos for datos, _ in vigentes])
+        except Exception as e:
+            logger.error(f"Error al escribir un lote de {len(vigentes)} tasaciones, se reintentan de a una: {str(e)}")
+            for datos, futuro in vigentes:
+                try:
+                    id = (await run_in_threadpool(_insertar, [datos]))[0]
+                except Exception as error:
+                    if not futuro.done():
+                        futuro.set_exception(error)
+                else:
+                    if not futuro.done():
+                        futuro.set_result(id)
+            return
+        metricas.observar("tasaciones_por_transaccion", (), len(vigentes))
+        for (_, futuro), id in zip(vigentes, ids):
+            # Si la request se canceló mientras se escribía el lote, la fila igual quedó guardada
+            if not futuro.done():
+                futuro.set_result(id)
+
+    async def vaciar(self):
+        """Escribe lo que quedó en la cola y espera a que termine el worker"""
+        self.pendientes.put_nowait(None)
+        await self.worker
+
+def _insertar(lista: list) -> list:
+    with SessionLocal() as db:
+        try:
+            return consultas.registrar_tasaciones(db, lista)
+        except Exception:
+            db.rollback()
+            raise
+
+_cola = None
+
+def _cola_del_loop() -> _Cola:
+    global _cola
+    loop = asyncio.get_running_loop()
+    if _cola is None or _cola.loop is not loop or _cola.worker.done():
+        _cola = _Cola(loop)
+    return _cola
+
+async def registrar(datos: dict) -> int:
+    """Encola una tasación y devuelve su id cuando el lote que la contiene está confirmado"""
+    cola = _cola_del_loop()
+    futuro = cola.loop.create_future()
+    cola.pendientes.put_nowait((datos, futuro))
+    return await futuro
+
+async def cerrar():
+    global _cola
+    if _cola is not None and _cola.loop is asyncio.get_running_loop():
+        await _cola.vaciar()
+    _cola = None
@@ -0,0 +1,180 @@
+# Estadísticas del inventario: agregado en una sola consulta y contadores materializados
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from typing import Optional
+import models
+import os
+
+# Con ESTADISTICAS_CONTADORES=1 el resumen se lee de la tabla de contadores (O(1))
+# en lugar de agregar la tabla de inmuebles
+USAR_CONTADORES = os.getenv("ESTADISTICAS_CONTADORES", "0") == "1"
+
+ESTADOS = ["Tasación", "Para Publicar", "Publicado"]
+DIMENSIONES = ["estado", "ciudad", "segmento"]
+SIN_DATO = "Sin dato"
+
+# Funciones (db, pares) que se llaman con cada registrar_cambios, en la misma transacción
+# (las usa analitica.py para mantener los histogramas de precios)
+suscriptores_cambios = []
+
+def instantanea(inmueble: models.Inmueble) -> dict:
+    """Copia de las columnas de un inmueble, para comparar antes y después de un cambio"""
+    return {columna.name: getattr(inmueble, columna.name) for columna in models.Inmueble.__table__.columns}
+
+# --- LECTURA ---
+
+def _acumulador():
+    return {
+        "cantidad": 0,
+        "valor_tasacion": {"cantidad": 0, "suma": 0.0, "minimo": None, "maximo": None},
+        "valor_publicacion": {"cantidad": 0, "suma": 0.0, "minimo": None, "maximo": None},
+    }
+
+def _acumular_valor(destino: dict, cantidad, suma, minimo, maximo):
+    destino["cantidad"] += cantidad or 0
+    destino["suma"] += suma or 0.0
+    if minimo is not None:
+        destino["minimo"] = minimo if destino["minimo"] is None else min(destino["minimo"], minimo)
+    if maximo is not None:
+        destino["maximo"] = maximo if destino["maximo"] is None else max(destino["maximo"], maximo)
+
+def _armar_resumen(grupos, fuente: str) -> dict:
+    """Pliega filas agrupadas por (estado, ciudad, segmento) en los totales de cada dimensión"""
+    desglose = {dimension: {} for dimension in DIMENSIONES}
+    total = 0
+    for grupo in grupos:
+        total += grupo["cantidad"]
+        for dimension in DIMENSIONES:
+            clave = grupo[dimension] or SIN_DATO
+            destino = desglose[dimension].setdefault(clave, _acumulador())
+            destino["cantidad"] += grupo["cantidad"]
+            for campo in ("valor_tasacion", "valor_publicacion"):
+                _acumular_valor(destino[campo], *grupo[campo])
+
+    for valores in desglose.values():
+        for destino in valores.values():
+            for campo in ("valor_tasacion", "valor_publicacion"):
+                datos = destino[campo]
+                datos["promedio"] = datos["suma"] / datos["cantidad"] if datos["cantidad"] else None
+
+    por_estado = {estado: 0 for estado in ESTADOS}
+    por_estado.update({estado: datos["cantidad"] for estado, datos in desglose["estado"].items()})
+    return {
+        "total_inmuebles": total,
+        "por_estado": por_estado,
+        "desglose": desglose,
+        "fuente": fuente,
+    }
+
+def resumen_agregado(db: Session) -> dict:
+    """Resumen calculado con un único GROUP BY sobre inmuebles"""
+    I = models.Inmueble
+    consulta = select(
+        I.estado, I.ciudad, I.segmento,
+        func.count().label("cantidad"),
+        func.count(I.valor_tasacion), func.sum(I.valor_tasacion),
+        func.min(I.valor_tasacion), func.max(I.valor_tasacion),
+        func.count(I.valor_publicacion), func.sum(I.valor_publicacion),
+        func.min(I.valor_publicacion), func.max(I.valor_publicacion),
+    ).group_by(I.estado, I.ciudad, I.segmento)
+    grupos = (
+        {
+            "estado": fila[0], "ciudad": fila[1], "segmento": fila[2], "cantidad": fila[3],
+            "valor_tasacion": fila[4:8], "valor_publicacion": fila[8:12],
+        }
+        for fila in db.execute(consulta)
+    )
+    return _armar_resumen(grupos, "agregado")
+
+def resumen_desde_contadores(db: Session) -> dict:
+    """Resumen leído de contadores_inventario (sin mínimos ni máximos, que no son incrementales)"""
+    grupos = (
+        {
+            "estado": contador.estado, "ciudad": contador.ciudad, "segmento": contador.segmento,
+            "cantidad": contador.cantidad,
+            "valor_tasacion": (contador.cantidad_tasacion, contador.suma_tasacion, None, None),
+            "valor_publicacion": (contador.cantidad_publicacion, contador.suma_publicacion, None, None),
+        }
+        for contador in db.query(models.ContadorInventario).filter(models.ContadorInventario.cantidad > 0)
+    )
+    return _armar_resumen(grupos, "contadores")
+
+def resumen(db: Session) -> dict:
+    return resumen_desde_contadores(db) if USAR_CONTADORES else resumen_agregado(db)
+
+# --- ESCRITURA ---
+
+def _insert_con_conflicto(db: Session):
+    """INSERT ... ON CONFLICT del dialecto en uso (SQLite y Postgres lo soportan)"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+def _deltas(fila: dict, signo: int) -> dict:
+    valor_tasacion = fila.get("valor_tasacion")
+    valor_publicacion = fila.get("valor_publicacion")
+    return {
+        "cantidad": signo,
+        "cantidad_tasacion": signo if valor_tasacion is not None else 0,
+        "suma_tasacion": signo * (valor_tasacion or 0.0),
+        "cantidad_publicacion": signo if valor_publicacion is not None else 0,
+        "suma_publicacion": signo * (valor_publicacion or 0.0),
+    }
+
+def registrar_cambio(db: Session, antes: Optional[dict], despues: Optional[dict]):
+    """Actualiza los contadores por un alta (antes=None) o un cambio de un inmueble.
+
+    Se llama antes del commit del endpoint, así que queda en la misma transacción.
+    """
+    registrar_cambios(db, [(antes, despues)])
+
+def registrar_cambios(db: Session, pares):
+    """Igual que registrar_cambio para muchos (antes, despues): un solo upsert por clave"""
+    pares = list(pares)
+    cambios = {}
+    for antes, despues in pares:
+        for fila, signo in ((antes, -1), (despues, 1)):
+            if fila is None:
+                continue
+            clave = tuple(fila.get(dimension) or "" for dimension in DIMENSIONES)
+            acumulado = cambios.setdefault(clave, dict.fromkeys(_deltas({}, 0), 0))
+            for campo, delta in _deltas(fila, signo).items():
+                acumulado[campo] += delta
+
+    filas = [
+        {"estado": estado, "ciudad": ciudad, "segmento": segmento, **deltas}
+        for (estado, ciudad, segmento), deltas in cambios.items()
+        if any(deltas.values())
+    ]
+    if filas:
+        tabla = models.ContadorInventario.__table__
+        sentencia = _insert_con_conflicto(db)(tabla)
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=[tabla.c.estado, tabla.c.ciudad, tabla.c.segmento],
+            set_={campo: tabla.c[campo] + sentencia.excluded[campo] for campo in _deltas({}, 0)},
+        )
+        # Una sola sentencia ejecutada con todas las claves (executemany): se compila una vez
+        # y el lock de escritura se retiene menos que con un upsert por clave
+        db.execute(sentencia, filas)
+
+    for suscriptor in suscriptores_cambios:
+        suscriptor(db, pares)
+
+def reconstruir_contadores(conn):
+    """Vuelve a calcular contadores_inventario desde cero (para cargas que no pasan por registrar_cambios)"""
+    I = models.Inmueble
+    tabla = models.ContadorInventario.__table__
+    claves = [func.coalesce(I.estado, ""), func.coalesce(I.ciudad, ""), func.coalesce(I.segmento, "")]
+    conn.execute(delete(tabla))
+    conn.execute(insert(tabla).from_select(
+        ["estado", "ciudad", "segmento", "cantidad", "cantidad_tasacion", "suma_tasacion",
+         "cantidad_publicacion", "suma_publicacion"],
+        select(
+            *claves, func.count(),
+            func.count(I.valor_tasacion), func.coalesce(func.sum(I.valor_tasacion), 0),
+            func.count(I.valor_publicacion), func.coalesce(func.sum(I.valor_publicacion), 0),
+        ).group_by(*claves),
+    ))
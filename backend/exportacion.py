@@ -0,0 +1,140 @@
+# Exportación masiva del inventario en CSV, Parquet o Arrow IPC
+#
+# Las filas salen de un cursor del servidor por lotes y cada lote se convierte de una vez
+# (csv.writer.writerows o un RecordBatch de Arrow), así nunca se arma la tabla entera
+# en memoria ni se serializa fila por fila.
+
+from fastapi import HTTPException
+from sqlalchemy import Date, Float, Integer, select
+from typing import Optional
+import csv
+import io
+import logging
+import models
+from consultas import filtros_busqueda
+from database import LECTURA, nueva_sesion
+
+logger = logging.getLogger(__name__)
+
+# Filas por lote del cursor (en Parquet cada lote es un row group)
+TAMANIO_LOTE_EXPORTACION = 5000
+
+# formato: (media type, extensión del archivo)
+FORMATOS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401 (registra pyarrow.parquet)
+    except ImportError:
+        raise HTTPException(status_code=400, detail="La exportación a Parquet/Arrow requiere pyarrow en el servidor")
+    return pyarrow
+
+def verificar_formato(formato: str):
+    """Falla antes de empezar el stream si el formato necesita una librería que no está instalada"""
+    if formato in ("parquet", "arrow"):
+        _pyarrow()
+
+def consulta_exportacion(
+    columnas,
+    ciudad: Optional[str] = None,
+    estado: Optional[str] = None,
+    precio_min: Optional[float] = None,
+    precio_max: Optional[float] = None,
+):
+    """Mismo filtro que /inmuebles/buscar, en orden de id"""
+    return (
+        select(*columnas)
+        .where(*filtros_busqueda(ciudad, estado, precio_min, precio_max))
+        .order_by(models.Inmueble.id)
+    )
+
+def _lotes(consulta):
+    """Tuplas de filas por lote desde un cursor del servidor, con su propia sesión"""
+    # La sesión del Depends ya está cerrada cuando se envía el cuerpo de la respuesta
+    db = nueva_sesion(LECTURA)
+    try:
+        filas = db.execute(
+            consulta.execution_options(stream_results=True, yield_per=TAMANIO_LOTE_EXPORTACION)
+        )
+        for lote in filas.partitions():
+            yield [tuple(fila) for fila in lote]
+    finally:
+        db.close()
+
+def _vaciar(buffer: io.BytesIO) -> bytes:
+    datos = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return datos
+
+# --- FORMATOS ---
+
+def _csv(columnas, lotes):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow([columna.name for columna in columnas])
+    for lote in lotes:
+        escritor.writerows(lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Sin filas igual se envía el encabezado
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _esquema_arrow(pa, columnas):
+    tipos = []
+    for columna in columnas:
+        if isinstance(columna.type, Integer):
+            tipo = pa.int64()
+        elif isinstance(columna.type, Float):
+            tipo = pa.float64()
+        elif isinstance(columna.type, Date):
+            tipo = pa.date32()
+        else:
+            tipo = pa.string()
+        tipos.append(pa.field(columna.name, tipo))
+    return pa.schema(tipos)
+
+def _batch_arrow(pa, esquema, lote):
+    # Transponer el lote a columnas y convertir cada una de una vez
+    valores = list(zip(*lote))
+    arrays = [pa.array(valores_columna, type=campo.type) for valores_columna, campo in zip(valores, esquema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=esquema)
+
+def _arrow(columnas, lotes):
+    pa = _pyarrow()
+    esquema = _esquema_arrow(pa, columnas)
+    buffer = io.BytesIO()
+    with pa.ipc.new_stream(buffer, esquema) as escritor:
+        for lote in lotes:
+            escritor.write_batch(_batch_arrow(pa, esquema, lote))
+            yield _vaciar(buffer)
+    yield _vaciar(buffer)
+
+def _parquet(columnas, lotes):
+    pa = _pyarrow()
+    esquema = _esquema_arrow(pa, columnas)
+    buffer = io.BytesIO()
+    with pa.parquet.ParquetWriter(buffer, esquema, compression="snappy") as escritor:
+        for lote in lotes:
+            escritor.write_batch(_batch_arrow(pa, esquema, lote))
+            yield _vaciar(buffer)
+    # El footer con los metadatos se escribe al cerrar
+    yield _vaciar(buffer)
+
+ESCRITORES = {"csv": _csv, "parquet": _parquet, "arrow": _arrow}
+
+def stream_exportacion(formato: str, columnas, **filtros):
+    """Genera el archivo exportado por partes; los filtros son los de /inmuebles/buscar"""
+    try:
+        yield from ESCRITORES[formato](columnas, _lotes(consulta_exportacion(columnas, **filtros)))
+    except Exception as e:
+        # Los encabezados ya se enviaron, solo queda cortar el stream y dejar registro
+        logger.error(f"Error en la exportación {formato}: {str(e)}")
+        raise
@@ -0,0 +1,89 @@
+# Geocodificación offline: completa lat/lon de los inmuebles desde un nomenclador local
+# Uso: python geocodificacion.py [--nomenclador datos/nomenclador.csv] [--todos]
+#
+# El nomenclador es un CSV con columnas ciudad, emprendimiento, lat, lon. Una fila con
+# emprendimiento vacío es el centro de la ciudad. Cada inmueble toma la ubicación de su
+# emprendimiento si figura en el nomenclador, y si no la del centro de su ciudad.
+# Sin --todos solo se completan los que todavía no tienen ubicación.
+
+from sqlalchemy import bindparam, select, update
+from busqueda_texto import terminos
+from database import engine
+import argparse
+import csv
+import os
+import models
+
+NOMENCLADOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "nomenclador.csv")
+# Inmuebles por lote de lectura y de UPDATE (cada lote en su propia transacción)
+TAMANIO_LOTE = 1000
+
+def _clave(texto) -> str:
+    """Nombre sin mayúsculas, tildes ni signos, para comparar con el nomenclador"""
+    return " ".join(terminos(texto or ""))
+
+def cargar_nomenclador(ruta: str = NOMENCLADOR) -> dict:
+    """{(ciudad, emprendimiento): (lat, lon)}; el emprendimiento "" es el centro de la ciudad"""
+    lugares = {}
+    with open(ruta, encoding="utf-8-sig", newline="") as archivo:
+        for fila in csv.DictReader(archivo):
+            lugares[(_clave(fila["ciudad"]), _clave(fila.get("emprendimiento")))] = (
+                float(fila["lat"]), float(fila["lon"])
+            )
+    return lugares
+
+def ubicar(lugares: dict, ciudad, emprendimiento):
+    """(lat, lon, precisión) o None si ni la ciudad está en el nomenclador"""
+    ciudad = _clave(ciudad)
+    exacto = lugares.get((ciudad, _clave(emprendimiento)))
+    if exacto is not None and emprendimiento:
+        return (*exacto, "emprendimiento")
+    centro = lugares.get((ciudad, ""))
+    if centro is not None:
+        return (*centro, "ciudad")
+    return None
+
+def geocodificar(bind=engine, lugares: dict = None, todos: bool = False) -> dict:
+    """Recorre los inmuebles por lotes (keyset por id) y actualiza lat/lon en bloque"""
+    lugares = cargar_nomenclador() if lugares is None else lugares
+    tabla = models.Inmueble.__table__
+    actualizar = (
+        update(tabla)
+        .where(tabla.c.id == bindparam("_id"))
+        .values(lat=bindparam("_lat"), lon=bindparam("_lon"))
+    )
+    reporte = {"procesados": 0, "por_emprendimiento": 0, "por_ciudad": 0, "sin_ubicacion": 0}
+    cursor = 0
+    while True:
+        consulta = select(tabla.c.id, tabla.c.ciudad, tabla.c.emprendimiento).where(tabla.c.id > cursor)
+        if not todos:
+            consulta = consulta.where(tabla.c.lat.is_(None))
+        with bind.begin() as conn:
+            filas = conn.execute(consulta.order_by(tabla.c.id).limit(TAMANIO_LOTE)).all()
+            if not filas:
+                break
+            cambios = []
+            for fila in filas:
+                ubicacion = ubicar(lugares, fila.ciudad, fila.emprendimiento)
+                if ubicacion is None:
+                    reporte["sin_ubicacion"] += 1
+                    continue
+                lat, lon, precision = ubicacion
+                reporte["por_" + precision] += 1
+                cambios.append({"_id": fila.id, "_lat": lat, "_lon": lon})
+            if cambios:
+                conn.execute(actualizar, cambios)
+        reporte["procesados"] += len(filas)
+        cursor = filas[-1].id
+    return reporte
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Completa lat/lon desde un nomenclador local")
+    parser.add_argument("--nomenclador", default=NOMENCLADOR)
+    parser.add_argument("--todos", action="store_true", help="Recalcula también los que ya tienen ubicación")
+    args = parser.parse_args()
+    reporte = geocodificar(lugares=cargar_nomenclador(args.nomenclador), todos=args.todos)
+    print(
+        f"{reporte['procesados']} inmuebles: {reporte['por_emprendimiento']} por emprendimiento, "
+        f"{reporte['por_ciudad']} por centro de ciudad, {reporte['sin_ubicacion']} sin ubicación"
+    )
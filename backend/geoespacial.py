@@ -0,0 +1,84 @@
+# Búsqueda por ubicación: radio alrededor de un punto o rectángulo (bounding box)
+#
+# SQLite:   índice R-tree inmuebles_geo (id, min_lat, max_lat, min_lon, max_lon),
+#           sincronizado con triggers sobre lat/lon.
+# Postgres: índice GiST sobre point(lon, lat), consultado con el operador <@ box.
+#
+# El índice descarta todo lo que está fuera del rectángulo; el círculo exacto y el orden
+# por distancia se calculan con una aproximación equirectangular, que a la escala de la
+# zona (decenas de km) difiere de la distancia geodésica en menos de un metro.
+# Las tablas, triggers e índices los crea la migración 5 (migraciones.py).
+
+from sqlalchemy import column, func, select, table
+from sqlalchemy.orm import Session
+from typing import Optional
+import math
+import models
+from consultas import COLUMNAS_INMUEBLE, filtros_busqueda
+
+KM_POR_GRADO = 111.32
+# Resultados como máximo de una búsqueda por ubicación (los más cercanos)
+MAX_RESULTADOS = 1000
+
+inmuebles_geo = table("inmuebles_geo", column("id"), column("min_lat"), column("max_lat"), column("min_lon"), column("max_lon"))
+
+def caja_alrededor(lat: float, lon: float, radio_km: float) -> tuple:
+    """(min_lat, min_lon, max_lat, max_lon) que contiene el círculo de radio_km"""
+    delta_lat = radio_km / KM_POR_GRADO
+    delta_lon = radio_km / (KM_POR_GRADO * max(math.cos(math.radians(lat)), 0.01))
+    return (lat - delta_lat, lon - delta_lon, lat + delta_lat, lon + delta_lon)
+
+def _filtro_caja(db: Session, caja: tuple):
+    min_lat, min_lon, max_lat, max_lon = caja
+    if db.get_bind().dialect.name == "postgresql":
+        ubicacion = func.point(models.Inmueble.lon, models.Inmueble.lat)
+        return ubicacion.op("<@")(func.box(func.point(min_lon, min_lat), func.point(max_lon, max_lat)))
+    en_caja = select(inmuebles_geo.c.id).where(
+        inmuebles_geo.c.min_lat >= min_lat,
+        inmuebles_geo.c.max_lat <= max_lat,
+        inmuebles_geo.c.min_lon >= min_lon,
+        inmuebles_geo.c.max_lon <= max_lon,
+    )
+    return models.Inmueble.id.in_(en_caja)
+
+def buscar_en_zona(
+    db: Session,
+    caja: tuple,
+    centro: tuple,
+    radio_km: Optional[float] = None,
+    ciudad=None, estado=None, precio_min=None, precio_max=None,
+) -> list:
+    """Inmuebles dentro de la caja (y del radio, si se indica), del más cercano al centro al más lejano"""
+    lat_centro, lon_centro = centro
+    escala_lon = math.cos(math.radians(lat_centro))
+    dx = (models.Inmueble.lon - lon_centro) * escala_lon
+    dy = models.Inmueble.lat - lat_centro
+    # Distancia al cuadrado en grados: alcanza para filtrar y ordenar sin funciones trigonométricas en SQL
+    distancia2 = (dx * dx + dy * dy).label("distancia2")
+
+    filtros = [_filtro_caja(db, caja), *filtros_busqueda(ciudad, estado, precio_min, precio_max)]
+    if radio_km is not None:
+        filtros.append(distancia2 <= (radio_km / KM_POR_GRADO) ** 2)
+
+    filas = db.execute(
+        select(*COLUMNAS_INMUEBLE.values(), distancia2)
+        .where(*filtros)
+        .order_by(distancia2, models.Inmueble.id)
+        .limit(MAX_RESULTADOS)
+    )
+    nombres = list(filas.keys())
+    resultados = []
+    for fila in filas.tuples():
+        inmueble = dict(zip(nombres, fila))
+        inmueble["distancia_km"] = round(math.sqrt(inmueble.pop("distancia2")) * KM_POR_GRADO, 3)
+        resultados.append(inmueble)
+    return resultados
+
+def ubicacion_de(db: Session, id: int) -> Optional[tuple]:
+    """(lat, lon) de un inmueble; None si no existe o no está geocodificado"""
+    fila = db.execute(
+        select(models.Inmueble.lat, models.Inmueble.lon).where(models.Inmueble.id == id)
+    ).first()
+    if fila is None or fila.lat is None or fila.lon is None:
+        return None
+    return (fila.lat, fila.lon)
@@ -0,0 +1,192 @@
+# Importación masiva de tasaciones desde planillas (CSV, XLSX o JSON lines)
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import BinaryIO
+import codecs
+import csv
+import datetime
+import io
+import json
+import logging
+import models
+import schemas
+import estadisticas
+
+logger = logging.getLogger(__name__)
+
+# Filas por INSERT multi-fila y por transacción
+TAMANIO_LOTE = 500
+# Detalle de errores que se devuelve; el resto solo se cuenta
+MAX_ERRORES_REPORTADOS = 1000
+
+# Encabezados de planilla que se aceptan como sinónimos de los campos del esquema
+ALIAS_COLUMNAS = {
+    "tipo": "tipo_inmueble",
+    "tipo_de_inmueble": "tipo_inmueble",
+    "superficie_cubierta": "sup_cubierta",
+    "superficie_terreno": "sup_terreno",
+    "valor": "valor_tasacion",
+    "link": "link_drive",
+}
+CAMPOS_NUMERICOS = {"sup_cubierta", "sup_terreno", "valor_tasacion"}
+# Codificaciones que se prueban en orden: UTF-8 (con o sin BOM) y la de Excel en Windows
+CODIFICACIONES_CSV = ("utf-8-sig", "cp1252")
+# Bloque con el que se recorre el archivo al detectar la codificación
+BLOQUE_DETECCION = 64 * 1024
+
+def _normalizar_columna(nombre) -> str:
+    clave = str(nombre or "").strip().lower().replace(" ", "_")
+    return ALIAS_COLUMNAS.get(clave, clave)
+
+def _normalizar_fila(fila: dict) -> dict:
+    datos = {}
+    for nombre, valor in fila.items():
+        campo = _normalizar_columna(nombre)
+        if not campo:
+            continue
+        # Planillas en formato argentino: "1234,5" -> "1234.5"
+        if campo in CAMPOS_NUMERICOS and isinstance(valor, str) and "," in valor and "." not in valor:
+            valor = valor.replace(",", ".")
+        datos[campo] = valor
+    return datos
+
+# --- LECTORES ---
+# Cada lector es un generador de (número de fila en el archivo, dict | Exception)
+
+def _codificacion_csv(archivo: BinaryIO) -> str:
+    """Recorre el archivo completo antes de importar, para que un byte inválido a mitad
+    de la planilla no corte la importación con lotes ya confirmados"""
+    for codificacion in CODIFICACIONES_CSV:
+        archivo.seek(0)
+        decodificador = codecs.getincrementaldecoder(codificacion)()
+        try:
+            for bloque in iter(lambda: archivo.read(BLOQUE_DETECCION), b""):
+                decodificador.decode(bloque)
+            decodificador.decode(b"", final=True)
+        except UnicodeDecodeError:
+            continue
+        archivo.seek(0)
+        return codificacion
+    raise HTTPException(status_code=400, detail="No se pudo leer el CSV: guárdelo como UTF-8 o Windows-1252 (Excel)")
+
+def _leer_csv(archivo: BinaryIO):
+    texto = io.TextIOWrapper(archivo, encoding=_codificacion_csv(archivo), newline="")
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+    except csv.Error:
+        dialecto = csv.excel
+    lector = csv.DictReader(texto, dialect=dialecto)
+    for numero, fila in enumerate(lector, start=2):  # la fila 1 es el encabezado
+        yield numero, fila
+
+def _leer_xlsx(archivo: BinaryIO):
+    try:
+        import openpyxl
+    except ImportError:
+        raise HTTPException(status_code=400, detail="La importación de XLSX requiere openpyxl en el servidor")
+    libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = next(filas, None) or ()
+        for numero, valores in enumerate(filas, start=2):
+            if all(valor is None for valor in valores):
+                continue
+            yield numero, dict(zip(encabezado, valores))
+    finally:
+        libro.close()
+
+def _leer_jsonl(archivo: BinaryIO):
+    for numero, linea in enumerate(archivo, start=1):
+        if not linea.strip():
+            continue
+        try:
+            yield numero, json.loads(linea)
+        except ValueError as e:
+            yield numero, e
+
+LECTORES = {
+    "csv": _leer_csv,
+    "xlsx": _leer_xlsx,
+    "jsonl": _leer_jsonl,
+    "ndjson": _leer_jsonl,
+}
+
+def formato_de_archivo(nombre: str) -> str:
+    extension = (nombre or "").rsplit(".", 1)[-1].lower()
+    if extension not in LECTORES:
+        raise HTTPException(status_code=400, detail="Formato no soportado: use .csv, .xlsx o .jsonl")
+    return extension
+
+# --- IMPORTACIÓN ---
+
+def _errores_validacion(error: Exception) -> list:
+    if isinstance(error, ValidationError):
+        return [
+            {"campo": ".".join(str(parte) for parte in detalle["loc"]), "mensaje": detalle["msg"]}
+            for detalle in error.errors()
+        ]
+    return [{"campo": None, "mensaje": str(error)}]
+
+def importar_tasaciones(db: Session, archivo: BinaryIO, formato: str) -> dict:
+    """Valida cada fila con InmuebleCreate e inserta las válidas por lotes.
+
+    El archivo se recorre como stream y solo se mantiene en memoria el lote en curso,
+    así que el consumo no depende del tamaño de la planilla. Cada lote es una
+    transacción: si uno falla, sus filas se reportan como error y se sigue con el resto.
+    """
+    reporte = {"procesadas": 0, "insertadas": 0, "con_errores": 0, "errores": []}
+    hoy = datetime.date.today()
+    lote = []
+
+    def agregar_error(numero, errores):
+        reporte["con_errores"] += 1
+        if len(reporte["errores"]) < MAX_ERRORES_REPORTADOS:
+            reporte["errores"].append({"fila": numero, "errores": errores})
+
+    def insertar_lote():
+        try:
+            ids = db.execute(
+                insert(models.Inmueble).returning(models.Inmueble.id, sort_by_parameter_order=True),
+                [fila for _, fila in lote],
+            ).scalars().all()
+            # Con sus ids, las altas quedan en el registro de transiciones (cambios.py)
+            for (_, fila), id in zip(lote, ids):
+                fila["id"] = id
+            estadisticas.registrar_cambios(db, [(None, fila) for _, fila in lote])
+            db.commit()
+            reporte["insertadas"] += len(lote)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error al insertar lote de importación: {str(e)}")
+            for numero, _ in lote:
+                agregar_error(numero, [{"campo": None, "mensaje": "Error al guardar en la base de datos"}])
+        lote.clear()
+
+    for numero, fila in LECTORES[formato](archivo):
+        reporte["procesadas"] += 1
+        try:
+            if isinstance(fila, Exception):
+                raise fila
+            if not isinstance(fila, dict):
+                raise ValueError("Cada línea debe ser un objeto JSON")
+            valido = schemas.InmuebleCreate(**_normalizar_fila(fila))
+        except (ValidationError, ValueError, TypeError) as e:
+            agregar_error(numero, _errores_validacion(e))
+            continue
+        lote.append((numero, {
+            **valido.model_dump(),
+            "estado": "Tasación",
+            "fecha_tasacion": hoy,
+            "valor_publicacion": None,
+        }))
+        if len(lote) >= TAMANIO_LOTE:
+            insertar_lote()
+    if lote:
+        insertar_lote()
+
+    return reporte
@@ -1,69 +1,383 @@
 # Rutas de la API y Seguridad
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Optional
 import models
-from database import engine, get_db, Base
+import schemas
+import estadisticas
+import cache
+import importacion
+import exportacion
+import busqueda_texto
+import geoespacial
+import analitica
+import cambios
+import consultas
+import escritura_agrupada
+import metricas
+import perfilador
+import serializacion
+import database
+from database import engine, get_db, get_sesion, get_sesion_lectura, ejecutar, Base, LECTURA
+from consultas import COLUMNAS_INMUEBLE
+from migraciones import aplicar_migraciones, pendientes
+from contextlib import asynccontextmanager
+import asyncio
 import datetime
 import logging
+import os
+import time
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 1. Crear las tablas en la base de datos
-models.Base.metadata.create_all(bind=engine)
+# 1. Arranque y cierre
+# El esquema se actualiza con un paso explícito (python migraciones.py) antes de levantar
+# la API: así cada arranque en frío no paga la revisión del esquema antes de atender.
+# Con MIGRAR_AL_INICIAR=1 se aplican al arrancar (cómodo para desarrollo local).
+MIGRAR_AL_INICIAR = os.getenv("MIGRAR_AL_INICIAR", "0") == "1"
+# Procesos que levanta uvicorn --workers (uvicorn toma el mismo valor de WEB_CONCURRENCY);
+# ver DESPLIEGUE.md para el modo con varios workers
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Cargar en segundo plano la matriz de comparables de valuacion.py (si no, la paga la primera valuación)
+CALENTAR_VALUACION = os.getenv("CALENTAR_VALUACION", "1") == "1"
+
+def _calentar():
+    """Deja listo lo que usa la primera request; corre en segundo plano mientras ya se atiende"""
+    inicio = time.perf_counter()
+    try:
+        faltan = pendientes(engine)
+        if faltan:
+            logger.error(f"Faltan aplicar las migraciones {faltan}: correr python migraciones.py")
+        conexiones = database.calentar_pool(engine)
+        if database.engine_lectura is not engine:
+            conexiones += database.calentar_pool(database.engine_lectura)
+        if CALENTAR_VALUACION and not faltan:
+            # valuacion importa NumPy: se carga acá y no al importar main
+            import valuacion
+            with database.nueva_sesion(LECTURA) as db:
+                valuacion.matriz.actualizar(db)
+        logger.info(f"Calentamiento terminado en {time.perf_counter() - inicio:.2f}s ({conexiones} conexiones abiertas)")
+    except Exception as e:
+        # La base puede estar dormida o caída: la primera request lo volverá a intentar
+        logger.warning(f"No se pudo completar el calentamiento: {str(e)}")
+
+async def _calentar_async():
+    try:
+        await database.calentar_pool_async(database.async_engine)
+        if database.async_engine_lectura is not database.async_engine:
+            await database.calentar_pool_async(database.async_engine_lectura)
+    except Exception as e:
+        logger.warning(f"No se pudo calentar el pool async: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MIGRAR_AL_INICIAR and WORKERS > 1:
+        # Cada worker intentaría aplicar las mismas migraciones a la vez
+        logger.error("MIGRAR_AL_INICIAR se ignora con varios workers: correr python migraciones.py antes de levantar")
+    elif MIGRAR_AL_INICIAR:
+        await run_in_threadpool(aplicar_migraciones, engine)
+    if WORKERS > 1 and cache.CACHE_BACKEND == "memoria":
+        logger.warning("Con varios workers la caché en memoria de un proceso no se entera de lo que escriben los otros: usar CACHE_BACKEND=redis o ninguno")
+    calentamiento = [asyncio.create_task(run_in_threadpool(_calentar))]
+    if database.async_engine is not None:
+        calentamiento.append(asyncio.create_task(_calentar_async()))
+    yield
+    for tarea in calentamiento:
+        tarea.cancel()
+    # Las tasaciones que quedaron en la cola se escriben antes de salir
+    await escritura_agrupada.cerrar()
 
 # 2. Crear la variable app
-app = FastAPI(title="API Inmobiliaria Cadema")
+app = FastAPI(title="API Inmobiliaria Cadema", lifespan=lifespan)
+# El último middleware agregado es el más externo
+app.add_middleware(perfilador.PerfiladorMiddleware)
+app.add_middleware(metricas.MetricasMiddleware)
+metricas.instrumentar_engine(engine)
+if database.engine_lectura is not engine:
+    metricas.instrumentar_engine(database.engine_lectura)
+if database.async_engine is not None:
+    metricas.instrumentar_engine(database.async_engine.sync_engine)
+    if database.async_engine_lectura is not database.async_engine:
+        metricas.instrumentar_engine(database.async_engine_lectura.sync_engine)
+
+# Filas que se traen del cursor del servidor por cada lote en modo stream
+TAMANIO_LOTE_STREAM = 500
+
+def _columnas_pedidas(fields: Optional[str]):
+    """Traduce el parámetro fields= a columnas de la tabla (el id siempre se incluye)"""
+    if not fields:
+        return list(COLUMNAS_INMUEBLE.values())
+    nombres = [nombre.strip() for nombre in fields.split(",") if nombre.strip()]
+    invalidos = [nombre for nombre in nombres if nombre not in COLUMNAS_INMUEBLE]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(invalidos)}")
+    if "id" not in nombres:
+        nombres.insert(0, "id")
+    return [COLUMNAS_INMUEBLE[nombre] for nombre in dict.fromkeys(nombres)]
+
+def _caja_pedida(bbox: Optional[str]):
+    """Traduce bbox=min_lon,min_lat,max_lon,max_lat a (min_lat, min_lon, max_lat, max_lon)"""
+    if not bbox:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(valor) for valor in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox debe ser min_lon,min_lat,max_lon,max_lat")
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="bbox: los mínimos deben ser menores que los máximos")
+    return (min_lat, min_lon, max_lat, max_lon)
+
+def _stream_inmuebles(columnas, cursor: Optional[int], formato: str):
+    """Genera el listado por lotes desde un cursor del servidor, sin materializar la tabla"""
+    # La sesión del Depends se cierra antes de enviar la respuesta, así que el stream abre la suya
+    db = database.nueva_sesion(LECTURA)
+    try:
+        filas = db.execute(
+            consultas.consulta_listado(columnas, cursor).execution_options(
+                stream_results=True, yield_per=TAMANIO_LOTE_STREAM
+            )
+        )
+        nombres = list(filas.keys())
+        if formato == "ndjson":
+            for lote in filas.partitions():
+                yield b"".join(serializacion.a_json(dict(zip(nombres, fila))) + b"\n" for fila in lote)
+        else:
+            # Cada lote se serializa como una lista y se le sacan los corchetes para encadenarlo
+            separador = b"["
+            for lote in filas.partitions():
+                yield separador + serializacion.a_json([dict(zip(nombres, fila)) for fila in lote])[1:-1]
+                separador = b","
+            yield b"[]" if separador == b"[" else b"]"
+    except Exception as e:
+        # Los encabezados ya se enviaron, solo queda cortar el stream y dejar registro
+        logger.error(f"Error en el stream de inmuebles: {str(e)}")
+        raise
+    finally:
+        db.close()
 
 # 3. ENDPOINTS
 
 @app.get("/")
-def home():
+async def home():
     return {"mensaje": "API Cadema funcionando", "version": "1.0"}
 
-@app.get("/inmuebles/", tags=["Consultas"])
-def listar_inmuebles(db: Session = Depends(get_db)):
-    """Lista todos los inmuebles en la base de datos"""
-    try:
-        inmuebles = db.query(models.Inmueble).all()
+@app.get("/inmuebles/", tags=["Consultas"], response_model=list[schemas.InmuebleListado])
+async def listar_inmuebles(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="Devuelve los inmuebles con id mayor a este valor"),
+    limite: int = Query(100, ge=1, le=1000, description="Tamaño de página (se ignora en modo stream)"),
+    fields: Optional[str] = Query(None, description="Columnas separadas por coma, ej: id,direccion,estado"),
+    stream: Optional[str] = Query(None, pattern="^(json|ndjson)$", description="Devuelve todo el inventario en streaming"),
+    db = Depends(get_sesion_lectura)
+):
+    """Lista los inmuebles paginando por id (keyset), o en streaming con ?stream=json|ndjson"""
+    columnas = _columnas_pedidas(fields)
+    if stream:
+        media_type = "application/x-ndjson" if stream == "ndjson" else "application/json"
+        return StreamingResponse(_stream_inmuebles(columnas, cursor, stream), media_type=media_type)
+
+    async def calcular():
+        inmuebles = await ejecutar(db, consultas.listar_pagina, columnas, cursor, limite)
         logger.info(f"Se recuperaron {len(inmuebles)} inmuebles")
         return inmuebles
+
+    def encabezados(inmuebles):
+        # Si la página vino completa puede haber más: el cliente sigue desde el último id
+        if len(inmuebles) == limite:
+            return {"X-Next-Cursor": str(inmuebles[-1]["id"])}
+        return {}
+
+    try:
+        return await cache.respuesta_cacheada(request, cache.INVENTARIO, calcular, encabezados)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error al listar inmuebles: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al recuperar inmuebles")
 
-@app.get("/inmuebles/buscar", tags=["Consultas"])
-def buscar_inmuebles(
+@app.get("/inmuebles/buscar", tags=["Consultas"], response_model=list[schemas.InmuebleListado])
+async def buscar_inmuebles(
+    request: Request,
     ciudad: Optional[str] = None,
     estado: Optional[str] = None,
     precio_min: Optional[float] = None,
     precio_max: Optional[float] = None,
-    db: Session = Depends(get_db)
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Centro de la búsqueda por radio"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Centro de la búsqueda por radio"),
+    radio_km: Optional[float] = Query(None, gt=0, le=200, description="Radio alrededor de lat/lon o de cerca_de"),
+    cerca_de: Optional[int] = Query(None, description="Id de un inmueble geocodificado a usar como centro"),
+    bbox: Optional[str] = Query(None, description="Rectángulo min_lon,min_lat,max_lon,max_lat"),
+    db = Depends(get_sesion_lectura)
 ):
-    """Busca inmuebles con filtros opcionales"""
-    try:
-        query = db.query(models.Inmueble)
-        
-        if ciudad:
-            query = query.filter(models.Inmueble.ciudad == ciudad)
-        if estado:
-            query = query.filter(models.Inmueble.estado == estado)
-        if precio_min:
-            query = query.filter(models.Inmueble.valor_tasacion >= precio_min)
-        if precio_max:
-            query = query.filter(models.Inmueble.valor_tasacion <= precio_max)
-        
-        resultados = query.all()
+    """Busca inmuebles con filtros opcionales; con radio o bbox, ordenados por distancia"""
+    caja = _caja_pedida(bbox)
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat y lon se indican juntos")
+    if radio_km is not None and lat is None and cerca_de is None:
+        raise HTTPException(status_code=400, detail="radio_km necesita lat/lon o cerca_de")
+    if caja is None and radio_km is None and (lat is not None or cerca_de is not None):
+        raise HTTPException(status_code=400, detail="Indicar radio_km o bbox para buscar por ubicación")
+
+    async def calcular():
+        if caja is None and radio_km is None:
+            resultados = await ejecutar(db, consultas.buscar, ciudad, estado, precio_min, precio_max)
+        else:
+            centro = (lat, lon) if lat is not None else None
+            if cerca_de is not None:
+                centro = await ejecutar(db, geoespacial.ubicacion_de, cerca_de)
+                if centro is None:
+                    raise HTTPException(status_code=404, detail="El inmueble de referencia no existe o no está geocodificado")
+            if centro is None:
+                # Solo bbox: se ordena por distancia al centro del rectángulo
+                centro = ((caja[0] + caja[2]) / 2, (caja[1] + caja[3]) / 2)
+            zona = caja if caja is not None else geoespacial.caja_alrededor(*centro, radio_km)
+            resultados = await ejecutar(
+                db, geoespacial.buscar_en_zona, zona, centro, radio_km, ciudad, estado, precio_min, precio_max
+            )
         logger.info(f"Búsqueda retornó {len(resultados)} resultados")
         return resultados
+
+    try:
+        return await cache.respuesta_cacheada(request, cache.INVENTARIO, calcular)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error en búsqueda: {str(e)}")
         raise HTTPException(status_code=500, detail="Error en la búsqueda")
 
+@app.get("/inmuebles/grilla", tags=["Consultas"], response_model=schemas.GrillaResponse)
+async def grilla_inventario(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="siguiente_cursor de la página anterior (keyset)"),
+    limite: int = Query(50, ge=1, le=500),
+    orden: str = Query("id", description=f"Columna: {', '.join(consultas.ORDENES_GRILLA)}"),
+    descendente: bool = Query(True, description="De mayor a menor (por defecto, los más nuevos primero)"),
+    ciudad: Optional[str] = None,
+    estado: Optional[str] = None,
+    precio_min: Optional[float] = None,
+    precio_max: Optional[float] = None,
+    db = Depends(get_sesion_lectura)
+):
+    """Página de la grilla de inventario: ordena, filtra y pagina la base en lugar del cliente"""
+    if orden not in consultas.ORDENES_GRILLA:
+        raise HTTPException(status_code=400, detail=f"No se puede ordenar por {orden}")
+
+    async def calcular():
+        grilla = await ejecutar(
+            db, consultas.pagina_grilla, limite, orden, descendente, cursor,
+            ciudad=ciudad, estado=estado, precio_min=precio_min, precio_max=precio_max,
+        )
+        logger.info(f"Grilla por {orden}: {len(grilla['items'])} inmuebles" + (f" de {grilla['total']}" if cursor is None else ""))
+        return grilla
+
+    try:
+        return await cache.respuesta_cacheada(request, cache.INVENTARIO, calcular)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error al armar la grilla de inventario: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al recuperar el inventario")
+
+@app.get("/inmuebles/buscar-texto", tags=["Consultas"], response_model=schemas.BusquedaTextoResponse)
+async def buscar_texto(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar en dirección, emprendimiento y tipo"),
+    ciudad: Optional[str] = None,
+    estado: Optional[str] = None,
+    pagina: int = Query(1, ge=1),
+    limite: int = Query(20, ge=1, le=100),
+    db = Depends(get_sesion_lectura)
+):
+    """Búsqueda por palabras o prefijos, tolerante a errores de tipeo, ordenada por relevancia"""
+    async def calcular():
+        resultado = await ejecutar(db, busqueda_texto.buscar_texto, q, ciudad, estado, pagina, limite)
+        logger.info(f"Búsqueda de texto '{q}' retornó {resultado['total']} resultados")
+        return resultado
+
+    try:
+        return await cache.respuesta_cacheada(request, cache.INVENTARIO, calcular)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error en la búsqueda de texto: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la búsqueda de texto")
+
+@app.get("/inmuebles/exportar", tags=["Consultas"])
+async def exportar_inmuebles(
+    formato: str = Query("csv", pattern="^(csv|parquet|arrow)$", description="csv, parquet o arrow (Arrow IPC stream)"),
+    ciudad: Optional[str] = None,
+    estado: Optional[str] = None,
+    precio_min: Optional[float] = None,
+    precio_max: Optional[float] = None,
+    fields: Optional[str] = Query(None, description="Columnas separadas por coma, ej: id,direccion,estado"),
+):
+    """Descarga el inventario (con los filtros de /inmuebles/buscar) en streaming desde la base"""
+    columnas = _columnas_pedidas(fields)
+    exportacion.verificar_formato(formato)
+    media_type, extension = exportacion.FORMATOS[formato]
+    nombre = f"inventario_cadema_{datetime.date.today().strftime('%Y%m%d')}.{extension}"
+    return StreamingResponse(
+        exportacion.stream_exportacion(
+            formato, columnas,
+            ciudad=ciudad, estado=estado, precio_min=precio_min, precio_max=precio_max,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
+
+@app.get("/inmuebles/cola", tags=["Consultas"], response_model=schemas.ColaResponse)
+async def cola_de_trabajo(
+    request: Request,
+    estado: str = Query("Para Publicar", description="Estado del flujo: Tasación, Para Publicar o Publicado"),
+    cursor: Optional[int] = Query(None, description="Devuelve los inmuebles con id mayor a este valor"),
+    limite: int = Query(50, ge=1, le=500),
+    db = Depends(get_sesion_lectura)
+):
+    """Inmuebles pendientes en un estado del flujo, solo con los campos que muestra la pestaña Publicar"""
+    if estado not in estadisticas.ESTADOS:
+        raise HTTPException(status_code=400, detail=f"Estado inválido: {estado}")
+
+    async def calcular():
+        cola = await ejecutar(db, consultas.cola_por_estado, estado, cursor, limite)
+        logger.info(f"Cola {estado}: {len(cola['items'])} de {cola['total']} inmuebles")
+        return cola
+
+    try:
+        return await cache.respuesta_cacheada(request, cache.INVENTARIO, calcular)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al obtener la cola de {estado}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al recuperar la cola de trabajo")
+
+@app.get("/inmuebles/valuacion", tags=["Flujo Inmobiliario"], response_model=schemas.ValuacionResponse)
+async def sugerir_valuacion(
+    ciudad: str,
+    segmento: str,
+    tipo: str,
+    sup_cubierta: float = Query(0, ge=0),
+    sup_terreno: float = Query(0, ge=0),
+    db = Depends(get_sesion_lectura)
+):
+    """Sugiere un valor de tasación a partir de comparables por ciudad, tipo, superficie y antigüedad"""
+    # Se importa al usarse (trae NumPy); el calentamiento del arranque ya suele haberlo hecho
+    import valuacion
+    try:
+        sugerencia = await ejecutar(db, valuacion.sugerir, ciudad, segmento, tipo, sup_cubierta, sup_terreno)
+        logger.info(f"Valuación {tipo} en {ciudad}: {sugerencia['valor_sugerido']} con {sugerencia['comparables']} comparables")
+        return sugerencia
+    except Exception as e:
+        logger.error(f"Error al calcular la valuación: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al calcular la valuación")
+
 @app.post("/inmuebles/tasar", tags=["Flujo Inmobiliario"])
-def tasar_inmueble(
+async def tasar_inmueble(
     ciudad: str, 
     segmento: str, 
     emprendimiento: str, 
@@ -73,7 +387,7 @@ def tasar_inmueble(
     sup_terreno: float,
     valor_tasacion: float, 
     link_drive: str,
-    db: Session = Depends(get_db)
+    db = Depends(get_sesion)
 ):
     """Registra una nueva tasación"""
     try:
@@ -83,8 +397,7 @@ def tasar_inmueble(
         if sup_cubierta < 0 or sup_terreno < 0:
             raise HTTPException(status_code=400, detail="Las superficies no pueden ser negativas")
         
-        nuevo = models.Inmueble(
-            estado="Tasación",
+        datos = dict(
             ciudad=ciudad, 
             segmento=segmento, 
             emprendimiento=emprendimiento,
@@ -93,85 +406,235 @@ def tasar_inmueble(
             sup_cubierta=sup_cubierta, 
             sup_terreno=sup_terreno,
             valor_tasacion=valor_tasacion, 
-            link_drive=link_drive,
-            fecha_tasacion=datetime.date.today()
+            link_drive=link_drive
         )
-        db.add(nuevo)
-        db.commit()
-        db.refresh(nuevo)
+        if escritura_agrupada.AGRUPAR:
+            # Comparte la transacción con las tasaciones concurrentes (ver escritura_agrupada.py)
+            id = await escritura_agrupada.registrar(datos)
+        else:
+            id = (await ejecutar(db, consultas.registrar_tasacion, datos)).id
+        cache.invalidar(cache.INVENTARIO)
         
-        logger.info(f"Nueva tasación registrada - ID: {nuevo.id}, Dirección: {direccion}")
-        return {"mensaje": "Tasación registrada con éxito", "id": nuevo.id, "direccion": direccion}
+        logger.info(f"Nueva tasación registrada - ID: {id}, Dirección: {direccion}")
+        return {"mensaje": "Tasación registrada con éxito", "id": id, "direccion": direccion}
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         logger.error(f"Error al registrar tasación: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al registrar tasación")
 
+@app.post("/inmuebles/importar", tags=["Flujo Inmobiliario"])
+def importar_tasaciones(archivo: UploadFile = File(..., description="Planilla .csv, .xlsx o .jsonl"), db: Session = Depends(get_db)):
+    """Registra en bloque las tasaciones de una planilla y devuelve el reporte de errores por fila"""
+    # Queda como def con sesión sync en ambos modos: leer y validar la planilla es trabajo
+    # de CPU que en el event loop frenaría a las demás requests
+    formato = importacion.formato_de_archivo(archivo.filename)
+    try:
+        reporte = importacion.importar_tasaciones(db, archivo.file, formato)
+        logger.info(
+            f"Importación de {archivo.filename}: {reporte['insertadas']} insertadas, "
+            f"{reporte['con_errores']} con errores"
+        )
+        return reporte
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al importar tasaciones: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al importar la planilla")
+    finally:
+        # Aunque falle a mitad de camino, los lotes ya confirmados cambiaron el inventario
+        cache.invalidar(cache.INVENTARIO)
+
+def _conflicto(e: consultas.ConflictoDeEstado) -> HTTPException:
+    conflicto = e.conflicto
+    return HTTPException(
+        status_code=409,
+        detail=f"El inmueble {conflicto['id']} ya cambió: está en \"{conflicto['estado']}\" (versión {conflicto['version']})",
+    )
+
 @app.put("/inmuebles/{id}/preparar-publicacion", tags=["Flujo Inmobiliario"])
-def preparar_publicacion(id: int, valor_pub: float, db: Session = Depends(get_db)):
-    """Prepara un inmueble para publicación"""
+async def preparar_publicacion(
+    id: int,
+    valor_pub: float,
+    version: Optional[int] = Query(None, description="Versión leída; 409 si otro usuario lo modificó"),
+    db = Depends(get_sesion),
+):
+    """Prepara un inmueble para publicación (solo desde Tasación)"""
     try:
-        inmueble = db.query(models.Inmueble).filter(models.Inmueble.id == id).first()
-        if not inmueble:
-            raise HTTPException(status_code=404, detail="Inmueble no encontrado")
-        
         if valor_pub <= 0:
             raise HTTPException(status_code=400, detail="El valor de publicación debe ser positivo")
         
-        inmueble.estado = "Para Publicar"
-        inmueble.valor_publicacion = valor_pub
-        db.commit()
+        inmueble = await ejecutar(db, consultas.preparar_publicacion, id, valor_pub, version)
+        if not inmueble:
+            raise HTTPException(status_code=404, detail="Inmueble no encontrado")
+        cache.invalidar(cache.INVENTARIO)
         
         logger.info(f"Inmueble {id} preparado para publicación - Valor: ${valor_pub}")
-        return {"mensaje": "Estado actualizado: Para Publicar", "id": id, "valor_publicacion": valor_pub}
+        return {
+            "mensaje": "Estado actualizado: Para Publicar", "id": id,
+            "valor_publicacion": valor_pub, "version": inmueble["version"],
+        }
     except HTTPException:
         raise
+    except consultas.ConflictoDeEstado as e:
+        raise _conflicto(e)
     except Exception as e:
-        db.rollback()
         logger.error(f"Error al preparar publicación: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al actualizar estado")
 
 @app.put("/inmuebles/{id}/publicar", tags=["Flujo Inmobiliario"])
-def completar_publicacion(id: int, link_portal: str, db: Session = Depends(get_db)):
-    """Marca un inmueble como publicado"""
+async def completar_publicacion(
+    id: int,
+    link_portal: str,
+    version: Optional[int] = Query(None, description="Versión leída; 409 si otro usuario lo modificó"),
+    db = Depends(get_sesion),
+):
+    """Marca un inmueble como publicado (solo desde Para Publicar)"""
     try:
-        inmueble = db.query(models.Inmueble).filter(models.Inmueble.id == id).first()
-        if not inmueble:
-            raise HTTPException(status_code=404, detail="Inmueble no encontrado")
-        
         if not link_portal or link_portal.strip() == "":
             raise HTTPException(status_code=400, detail="Debe proporcionar un link del portal")
         
-        inmueble.estado = "Publicado"
-        inmueble.link_portal = link_portal
-        inmueble.fecha_publicacion = datetime.date.today()
-        db.commit()
+        inmueble = await ejecutar(db, consultas.completar_publicacion, id, link_portal, version)
+        if not inmueble:
+            raise HTTPException(status_code=404, detail="Inmueble no encontrado")
+        cache.invalidar(cache.INVENTARIO)
         
         logger.info(f"Inmueble {id} publicado oficialmente")
-        return {"mensaje": "Inmueble publicado oficialmente", "id": id, "link_portal": link_portal}
+        return {
+            "mensaje": "Inmueble publicado oficialmente", "id": id,
+            "link_portal": link_portal, "version": inmueble["version"],
+        }
     except HTTPException:
         raise
+    except consultas.ConflictoDeEstado as e:
+        raise _conflicto(e)
     except Exception as e:
-        db.rollback()
         logger.error(f"Error al publicar inmueble: {str(e)}")
         raise HTTPException(status_code=500, detail="Error al publicar")
 
-@app.get("/estadisticas/resumen", tags=["Reportes"])
-def resumen_estadisticas(db: Session = Depends(get_db)):
-    """Retorna estadísticas generales del inventario"""
+@app.post("/inmuebles/transicion", tags=["Flujo Inmobiliario"], response_model=schemas.TransicionLoteResponse)
+async def transicion_en_lote(lote: schemas.TransicionLote, db = Depends(get_sesion)):
+    """Pasa muchos inmuebles a Para Publicar o Publicado en un solo UPDATE; los que ya cambiaron se informan en conflictos"""
     try:
-        total = db.query(models.Inmueble).count()
-        por_estado = {}
-        for estado in ["Tasación", "Para Publicar", "Publicado"]:
-            count = db.query(models.Inmueble).filter(models.Inmueble.estado == estado).count()
-            por_estado[estado] = count
-        
-        return {
-            "total_inmuebles": total,
-            "por_estado": por_estado
-        }
+        if lote.estado not in consultas.TRANSICIONES:
+            raise HTTPException(status_code=400, detail=f"estado debe ser uno de: {', '.join(consultas.TRANSICIONES)}")
+        campo = "valor_publicacion" if lote.estado == "Para Publicar" else "link_portal"
+        sin_dato = [item.id for item in lote.items if getattr(item, campo) is None]
+        if sin_dato:
+            raise HTTPException(status_code=400, detail=f"Falta {campo} en los inmuebles: {', '.join(map(str, sin_dato))}")
+
+        resultado = await ejecutar(db, consultas.transicionar_lote, lote.estado, [item.model_dump() for item in lote.items])
+        if resultado["actualizados"]:
+            cache.invalidar(cache.INVENTARIO)
+        logger.info(
+            f"Transición en lote a {lote.estado}: {len(resultado['actualizados'])} actualizados, "
+            f"{len(resultado['conflictos'])} en conflicto"
+        )
+        return resultado
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error en la transición en lote: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al actualizar estados")
+
+@app.get("/estadisticas/resumen", tags=["Reportes"], response_model=schemas.EstadisticasResponse)
+async def resumen_estadisticas(request: Request, db = Depends(get_sesion_lectura)):
+    """Retorna estadísticas generales del inventario, desglosadas por estado, ciudad y segmento"""
+    try:
+        return await cache.respuesta_cacheada(
+            request, cache.INVENTARIO, lambda: ejecutar(db, estadisticas.resumen)
+        )
     except Exception as e:
         logger.error(f"Error al generar estadísticas: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error al generar estadísticas")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error al generar estadísticas")
+
+@app.get("/estadisticas/distribucion", tags=["Reportes"], response_model=schemas.DistribucionResponse)
+async def distribucion_precios(
+    request: Request,
+    agrupar: str = Query("total", description="total, ciudad, segmento, emprendimiento, tipo o mes"),
+    metrica: Optional[str] = Query(None, description="USD/m² (tasacion_m2_cubierta, ...), spread_pct o dias_a_publicacion"),
+    db = Depends(get_sesion_lectura)
+):
+    """Mediana y percentiles de USD/m², spread tasación-publicación y días hasta publicar"""
+    if agrupar not in analitica.DIMENSIONES:
+        raise HTTPException(status_code=400, detail=f"agrupar debe ser uno de: {', '.join(analitica.DIMENSIONES)}")
+    if metrica is not None and metrica not in analitica.METRICAS:
+        raise HTTPException(status_code=400, detail=f"metrica debe ser una de: {', '.join(analitica.METRICAS)}")
+    try:
+        return await cache.respuesta_cacheada(
+            request, cache.INVENTARIO, lambda: ejecutar(db, analitica.distribucion, agrupar, metrica)
+        )
+    except Exception as e:
+        logger.error(f"Error al calcular distribuciones: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al calcular distribuciones")
+
+@app.get("/cambios", tags=["Sincronización"], response_model=schemas.CambiosResponse)
+async def feed_cambios(
+    request: Request,
+    since: int = Query(0, ge=0, description="Cursor: id de la última transición ya leída"),
+    limite: int = Query(500, ge=1, le=5000),
+    espera: float = Query(0, ge=0, le=60, description="Long-poll: segundos a esperar si no hay cambios"),
+    stream: bool = Query(False, description="Server-Sent Events (también con Accept: text/event-stream)"),
+):
+    """Altas y cambios de estado posteriores a since, para sincronizar sin volver a traer el inventario"""
+    try:
+        if stream or "text/event-stream" in request.headers.get("accept", ""):
+            # Al reconectar, EventSource manda el id del último evento recibido
+            desde = int(request.headers.get("last-event-id") or since)
+            return StreamingResponse(
+                cambios.eventos_sse(request, desde, limite),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+        return await cambios.esperar(since, limite, espera)
+    except Exception as e:
+        logger.error(f"Error al leer el feed de cambios: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al leer los cambios")
+
+@app.get("/health/db", tags=["Salud"])
+async def salud_db():
+    """Estado del pool de conexiones y latencia de conexión a la base"""
+    try:
+        salud = {"estado": "ok", "modo": database.DB_MODO}
+        salud["sync"] = database.estado_pool(engine)
+        salud["sync"]["latencia_ms"] = round(await run_in_threadpool(database.latencia_conexion, engine), 2)
+        if database.engine_lectura is not engine:
+            salud["lectura"] = database.estado_pool(database.engine_lectura)
+            salud["lectura"]["latencia_ms"] = round(
+                await run_in_threadpool(database.latencia_conexion, database.engine_lectura), 2
+            )
+        if database.async_engine is not None:
+            salud["async"] = database.estado_pool(database.async_engine.sync_engine)
+            salud["async"]["latencia_ms"] = round(await database.latencia_conexion_async(database.async_engine), 2)
+        # Las migraciones ya no se aplican al arrancar: un deploy sin python migraciones.py se ve acá
+        salud["migraciones_pendientes"] = await run_in_threadpool(pendientes, engine)
+        if salud["migraciones_pendientes"]:
+            salud["estado"] = "esquema desactualizado"
+            return JSONResponse(status_code=503, content=salud)
+        return salud
+    except Exception as e:
+        logger.error(f"Error en el chequeo de la base: {str(e)}")
+        return JSONResponse(status_code=503, content={"estado": "error", "detalle": "No se pudo conectar a la base"})
+
+@app.get("/metrics", include_in_schema=False)
+async def exportar_metricas():
+    """Métricas de latencia, tamaño de respuesta y uso de la base en formato Prometheus"""
+    return PlainTextResponse(metricas.exportar(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/perfiles-sql", tags=["Diagnóstico"])
+async def listar_perfiles_sql():
+    """Resumen de los últimos perfiles de SQL capturados (requiere PERFIL_SQL=1 o header)"""
+    if not perfilador.habilitado():
+        raise HTTPException(status_code=404, detail="El perfilador de SQL está deshabilitado")
+    return perfilador.perfiles_recientes()
+
+@app.get("/debug/perfiles-sql/{id}", tags=["Diagnóstico"])
+async def ver_perfil_sql(id: str):
+    """Sentencias, parámetros y tiempos de una request perfilada"""
+    if not perfilador.habilitado():
+        raise HTTPException(status_code=404, detail="El perfilador de SQL está deshabilitado")
+    perfil = perfilador.obtener_perfil(id)
+    if not perfil:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return perfil
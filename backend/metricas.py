@@ -0,0 +1,199 @@
+# Métricas de la API en formato de texto de Prometheus
+#
+# Cada hilo escribe en su propio fragmento (threading.local), así el camino caliente
+# no toma locks: el lock solo se usa al registrar un hilo nuevo, y /metrics suma los
+# fragmentos al exportar.
+
+from bisect import bisect_left
+from contextvars import ContextVar
+from sqlalchemy import event
+from typing import Optional
+import threading
+import time
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+BUCKETS_FILAS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# nombre: (tipo, ayuda, etiquetas, buckets)
+METRICAS = {
+    "http_requests_total": ("counter", "Requests atendidas", ("method", "route", "status"), None),
+    "http_request_duration_seconds": ("histogram", "Latencia por ruta", ("method", "route"), BUCKETS_SEGUNDOS),
+    "http_response_size_bytes": ("histogram", "Tamaño del cuerpo de la respuesta", ("method", "route"), BUCKETS_BYTES),
+    "http_requests_in_flight": ("gauge", "Requests en curso", (), None),
+    "db_queries_per_request": ("histogram", "Sentencias SQL por request", ("method", "route"), BUCKETS_CONSULTAS),
+    "db_time_per_request_seconds": ("histogram", "Tiempo en la base por request", ("method", "route"), BUCKETS_SEGUNDOS),
+    "db_query_duration_seconds": ("histogram", "Duración de cada sentencia SQL", (), BUCKETS_SEGUNDOS),
+    "tasaciones_por_transaccion": ("histogram", "Tasaciones confirmadas en cada transacción del modo agrupado", (), BUCKETS_FILAS),
+}
+
+# --- ALMACENAMIENTO POR HILO ---
+
+class _Fragmento:
+    __slots__ = ("series",)
+
+    def __init__(self):
+        # (nombre, etiquetas) -> float (contador) o [conteos por bucket..., +Inf, suma, cantidad]
+        self.series = {}
+
+_fragmentos = []
+_lock_registro = threading.Lock()
+_local = threading.local()
+_en_curso = 0
+
+def _fragmento() -> _Fragmento:
+    fragmento = getattr(_local, "fragmento", None)
+    if fragmento is None:
+        fragmento = _Fragmento()
+        with _lock_registro:
+            _fragmentos.append(fragmento)
+        _local.fragmento = fragmento
+    return fragmento
+
+def contar(nombre: str, etiquetas: tuple = (), valor: float = 1):
+    series = _fragmento().series
+    clave = (nombre, etiquetas)
+    series[clave] = series.get(clave, 0) + valor
+
+def observar(nombre: str, etiquetas: tuple, valor: float):
+    buckets = METRICAS[nombre][3]
+    series = _fragmento().series
+    clave = (nombre, etiquetas)
+    serie = series.get(clave)
+    if serie is None:
+        serie = series[clave] = [0] * (len(buckets) + 1) + [0.0, 0]
+    serie[bisect_left(buckets, valor)] += 1
+    serie[-2] += valor
+    serie[-1] += 1
+
+# --- CONTEXTO DE CADA REQUEST ---
+
+class ContextoRequest:
+    """Lo que se acumula durante una request (lo completan los hooks de SQLAlchemy)"""
+    __slots__ = ("consultas", "tiempo_db")
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+
+contexto_actual: ContextVar[Optional[ContextoRequest]] = ContextVar("contexto_request", default=None)
+
+def ruta_de(scope: dict) -> str:
+    """Plantilla de la ruta (ej: /inmuebles/{id}/publicar) para no explotar la cardinalidad"""
+    ruta = scope.get("route")
+    return getattr(ruta, "path", "sin_ruta")
+
+class MetricasMiddleware:
+    """Middleware ASGI puro: no envuelve la respuesta, así no rompe el streaming"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _en_curso
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        contexto = ContextoRequest()
+        token = contexto_actual.set(contexto)
+        estado = 500
+        tamanio = 0
+
+        async def enviar(mensaje):
+            nonlocal estado, tamanio
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                tamanio += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        _en_curso += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _en_curso -= 1
+            contexto_actual.reset(token)
+            etiquetas = (scope["method"], ruta_de(scope))
+            contar("http_requests_total", etiquetas + (str(estado),))
+            observar("http_request_duration_seconds", etiquetas, duracion)
+            observar("http_response_size_bytes", etiquetas, tamanio)
+            observar("db_queries_per_request", etiquetas, contexto.consultas)
+            observar("db_time_per_request_seconds", etiquetas, contexto.tiempo_db)
+
+# --- HOOKS DE SQLALCHEMY ---
+
+# Funciones (sentencia, parametros, duracion) que se llaman después de cada consulta
+# (las usa perfilador.py para el log de consultas lentas y el perfil por request)
+observadores_consulta = []
+
+def _antes_de_ejecutar(conexion, cursor, sentencia, parametros, contexto, executemany):
+    conexion.info.setdefault("inicios_consulta", []).append(time.perf_counter())
+
+def _despues_de_ejecutar(conexion, cursor, sentencia, parametros, contexto, executemany):
+    duracion = time.perf_counter() - conexion.info["inicios_consulta"].pop()
+    observar("db_query_duration_seconds", (), duracion)
+    request = contexto_actual.get()
+    if request is not None:
+        request.consultas += 1
+        request.tiempo_db += duracion
+    for observador in observadores_consulta:
+        observador(sentencia, parametros, duracion)
+
+def instrumentar_engine(motor):
+    """Registra los hooks de tiempo de consultas en un engine sync (o en async_engine.sync_engine)"""
+    event.listen(motor, "before_cursor_execute", _antes_de_ejecutar)
+    event.listen(motor, "after_cursor_execute", _despues_de_ejecutar)
+
+# --- EXPORTACIÓN ---
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _formatear_etiquetas(nombres: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+def _numero(valor) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def exportar() -> str:
+    """Suma los fragmentos de todos los hilos y arma el texto para /metrics"""
+    totales = {}
+    with _lock_registro:
+        fragmentos = list(_fragmentos)
+    for fragmento in fragmentos:
+        for clave, valor in list(fragmento.series.items()):
+            if isinstance(valor, list):
+                acumulado = totales.setdefault(clave, [0] * len(valor))
+                for i, parcial in enumerate(valor):
+                    acumulado[i] += parcial
+            else:
+                totales[clave] = totales.get(clave, 0) + valor
+
+    lineas = []
+    for nombre, (tipo, ayuda, etiquetas, buckets) in METRICAS.items():
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        if tipo == "gauge":
+            lineas.append(f"{nombre} {_en_curso}")
+            continue
+        for (serie, valores), valor in sorted(totales.items(), key=lambda item: item[0]):
+            if serie != nombre:
+                continue
+            if tipo == "counter":
+                lineas.append(f"{nombre}{_formatear_etiquetas(etiquetas, valores)} {_numero(valor)}")
+                continue
+            acumulado = 0
+            for limite, cantidad in zip(list(buckets) + ["+Inf"], valor[:-2]):
+                acumulado += cantidad
+                le = f'le="{limite}"'
+                lineas.append(f"{nombre}_bucket{_formatear_etiquetas(etiquetas, valores, le)} {acumulado}")
+            lineas.append(f"{nombre}_sum{_formatear_etiquetas(etiquetas, valores)} {_numero(valor[-2])}")
+            lineas.append(f"{nombre}_count{_formatear_etiquetas(etiquetas, valores)} {valor[-1]}")
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,307 @@
+# Migraciones del esquema de la base de datos
+# Uso: python migraciones.py  (aplica en orden las migraciones pendientes)
+
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Table, MetaData, Index, func, inspect, select, text
+from database import engine
+import datetime
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Registro de versiones aplicadas (fuera de Base para no mezclarlo con los modelos)
+metadata_migraciones = MetaData()
+version_esquema = Table(
+    "version_esquema", metadata_migraciones,
+    Column("version", Integer, primary_key=True),
+    Column("descripcion", String),
+    Column("aplicada_en", DateTime),
+)
+
+# --- MIGRACIONES ---
+# Cada migración recibe una conexión dentro de una transacción y describe el
+# cambio de forma explícita: no depende de cómo esté hoy models.py.
+
+def _m001_esquema_inicial(conn):
+    """Tabla inmuebles tal como la creaba create_all en la versión 1.0"""
+    metadata = MetaData()
+    inmuebles = Table(
+        "inmuebles", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("estado", String),
+        Column("ciudad", String),
+        Column("segmento", String),
+        Column("emprendimiento", String),
+        Column("tipo_inmueble", String),
+        Column("direccion", String),
+        Column("sup_cubierta", Float),
+        Column("sup_terreno", Float),
+        Column("fecha_tasacion", Date),
+        Column("valor_tasacion", Float),
+        Column("link_drive", String),
+        Column("valor_publicacion", Float, nullable=True),
+        Column("link_portal", String, nullable=True),
+        Column("fecha_publicacion", Date, nullable=True),
+        Index("ix_inmuebles_id", "id"),
+    )
+    metadata.create_all(bind=conn, checkfirst=True)
+
+def _m002_indices_busqueda(conn):
+    """Índices para los filtros de búsqueda y el conteo por estado"""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_inmuebles_estado_id ON inmuebles (estado, id)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_inmuebles_ciudad_estado_valor "
+        "ON inmuebles (ciudad, estado, valor_tasacion)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_inmuebles_valor_tasacion ON inmuebles (valor_tasacion)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_inmuebles_fecha_tasacion ON inmuebles (fecha_tasacion)"))
+
+def _m003_contadores_inventario(conn):
+    """Tabla de contadores por estado/ciudad/segmento, inicializada con el inventario actual"""
+    metadata = MetaData()
+    Table(
+        "contadores_inventario", metadata,
+        Column("estado", String, primary_key=True),
+        Column("ciudad", String, primary_key=True),
+        Column("segmento", String, primary_key=True),
+        Column("cantidad", Integer, nullable=False, default=0),
+        Column("cantidad_tasacion", Integer, nullable=False, default=0),
+        Column("suma_tasacion", Float, nullable=False, default=0),
+        Column("cantidad_publicacion", Integer, nullable=False, default=0),
+        Column("suma_publicacion", Float, nullable=False, default=0),
+    )
+    metadata.create_all(bind=conn, checkfirst=True)
+    conn.execute(text(
+        "INSERT INTO contadores_inventario "
+        "(estado, ciudad, segmento, cantidad, cantidad_tasacion, suma_tasacion, "
+        "cantidad_publicacion, suma_publicacion) "
+        "SELECT COALESCE(estado, ''), COALESCE(ciudad, ''), COALESCE(segmento, ''), "
+        "COUNT(*), COUNT(valor_tasacion), COALESCE(SUM(valor_tasacion), 0), "
+        "COUNT(valor_publicacion), COALESCE(SUM(valor_publicacion), 0) "
+        "FROM inmuebles GROUP BY COALESCE(estado, ''), COALESCE(ciudad, ''), COALESCE(segmento, '')"
+    ))
+
+def _m004_busqueda_texto(conn):
+    """Índice de texto sobre direccion, emprendimiento y tipo_inmueble (ver busqueda_texto.py)"""
+    if conn.dialect.name == "postgresql":
+        # Debe coincidir con busqueda_texto.EXPRESION_TEXTO_PG para que se use el índice de trigramas
+        texto_inmueble = (
+            "(coalesce(direccion, '') || ' ' || coalesce(emprendimiento, '') || ' ' || coalesce(tipo_inmueble, ''))"
+        )
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        # Columna generada: se actualiza sola con cada INSERT/UPDATE
+        conn.execute(text(
+            "ALTER TABLE inmuebles ADD COLUMN IF NOT EXISTS busqueda tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('simple', {texto_inmueble})) STORED"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_inmuebles_busqueda ON inmuebles USING gin (busqueda)"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_inmuebles_texto_trgm "
+            f"ON inmuebles USING gin ({texto_inmueble} gin_trgm_ops)"
+        ))
+        return
+
+    # SQLite: FTS5 con contenido externo (no duplica el texto) y prefijos de 2 y 3 letras indexados
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS inmuebles_fts USING fts5("
+        "direccion, emprendimiento, tipo_inmueble, "
+        "content='inmuebles', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS inmuebles_fts_vocab USING fts5vocab(inmuebles_fts, row)"))
+    # Triggers para que el índice siga a la tabla (la forma 'delete' de FTS5 necesita los valores viejos)
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS inmuebles_fts_insert AFTER INSERT ON inmuebles BEGIN "
+        "INSERT INTO inmuebles_fts (rowid, direccion, emprendimiento, tipo_inmueble) "
+        "VALUES (new.id, new.direccion, new.emprendimiento, new.tipo_inmueble); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS inmuebles_fts_delete AFTER DELETE ON inmuebles BEGIN "
+        "INSERT INTO inmuebles_fts (inmuebles_fts, rowid, direccion, emprendimiento, tipo_inmueble) "
+        "VALUES ('delete', old.id, old.direccion, old.emprendimiento, old.tipo_inmueble); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS inmuebles_fts_update "
+        "AFTER UPDATE OF direccion, emprendimiento, tipo_inmueble ON inmuebles BEGIN "
+        "INSERT INTO inmuebles_fts (inmuebles_fts, rowid, direccion, emprendimiento, tipo_inmueble) "
+        "VALUES ('delete', old.id, old.direccion, old.emprendimiento, old.tipo_inmueble); "
+        "INSERT INTO inmuebles_fts (rowid, direccion, emprendimiento, tipo_inmueble) "
+        "VALUES (new.id, new.direccion, new.emprendimiento, new.tipo_inmueble); END"
+    ))
+    # Indexar lo que ya estaba cargado
+    conn.execute(text("INSERT INTO inmuebles_fts (inmuebles_fts) VALUES ('rebuild')"))
+
+def _m005_ubicacion(conn):
+    """Columnas lat/lon e índice espacial (ver geoespacial.py)"""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE inmuebles ADD COLUMN IF NOT EXISTS lat double precision"))
+        conn.execute(text("ALTER TABLE inmuebles ADD COLUMN IF NOT EXISTS lon double precision"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_inmuebles_ubicacion ON inmuebles USING gist (point(lon, lat))"))
+        return
+
+    conn.execute(text("ALTER TABLE inmuebles ADD COLUMN lat FLOAT"))
+    conn.execute(text("ALTER TABLE inmuebles ADD COLUMN lon FLOAT"))
+    # R-tree con un punto por inmueble geocodificado (caja de ancho cero)
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS inmuebles_geo USING rtree(id, min_lat, max_lat, min_lon, max_lon)"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS inmuebles_geo_insert AFTER INSERT ON inmuebles "
+        "WHEN new.lat IS NOT NULL AND new.lon IS NOT NULL BEGIN "
+        "INSERT INTO inmuebles_geo VALUES (new.id, new.lat, new.lat, new.lon, new.lon); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS inmuebles_geo_update AFTER UPDATE OF lat, lon ON inmuebles BEGIN "
+        "DELETE FROM inmuebles_geo WHERE id = old.id; "
+        "INSERT INTO inmuebles_geo SELECT new.id, new.lat, new.lat, new.lon, new.lon "
+        "WHERE new.lat IS NOT NULL AND new.lon IS NOT NULL; END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS inmuebles_geo_delete AFTER DELETE ON inmuebles BEGIN "
+        "DELETE FROM inmuebles_geo WHERE id = old.id; END"
+    ))
+    conn.execute(text(
+        "INSERT INTO inmuebles_geo SELECT id, lat, lat, lon, lon FROM inmuebles "
+        "WHERE lat IS NOT NULL AND lon IS NOT NULL"
+    ))
+
+def _m006_rollups_distribucion(conn):
+    """Histogramas de precio por m², spread y días a publicación, cargados con el inventario actual"""
+    metadata = MetaData()
+    rollups = Table(
+        "rollups_distribucion", metadata,
+        Column("dimension", String, primary_key=True),
+        Column("valor", String, primary_key=True),
+        Column("metrica", String, primary_key=True),
+        Column("bucket", Integer, primary_key=True),
+        Column("cantidad", Integer, nullable=False, default=0),
+    )
+    metadata.create_all(bind=conn, checkfirst=True)
+
+    # Carga inicial con los buckets tal como los definía analitica.py en esta versión (copiados
+    # acá para que la migración no cambie si cambia el módulo; "python analitica.py" recalcula)
+    inmuebles = Table(
+        "inmuebles", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("ciudad", String), Column("segmento", String), Column("emprendimiento", String),
+        Column("tipo_inmueble", String), Column("sup_cubierta", Float), Column("sup_terreno", Float),
+        Column("valor_tasacion", Float), Column("fecha_tasacion", Date),
+        Column("valor_publicacion", Float), Column("fecha_publicacion", Date),
+    )
+    metricas = {
+        "tasacion_m2_cubierta": lambda f: f.valor_tasacion / f.sup_cubierta if f.valor_tasacion and f.sup_cubierta else None,
+        "tasacion_m2_terreno": lambda f: f.valor_tasacion / f.sup_terreno if f.valor_tasacion and f.sup_terreno else None,
+        "publicacion_m2_cubierta": lambda f: f.valor_publicacion / f.sup_cubierta if f.valor_publicacion and f.sup_cubierta else None,
+        "publicacion_m2_terreno": lambda f: f.valor_publicacion / f.sup_terreno if f.valor_publicacion and f.sup_terreno else None,
+        "spread_pct": lambda f: (
+            (f.valor_publicacion / f.valor_tasacion - 1) * 100
+            if f.valor_tasacion and f.valor_publicacion is not None else None
+        ),
+        "dias_a_publicacion": lambda f: (
+            (f.fecha_publicacion - f.fecha_tasacion).days if f.fecha_tasacion and f.fecha_publicacion else None
+        ),
+    }
+    conteos = {}
+    for fila in conn.execute(select(inmuebles)):
+        grupos = {
+            "total": "Total", "ciudad": fila.ciudad, "segmento": fila.segmento,
+            "emprendimiento": fila.emprendimiento, "tipo": fila.tipo_inmueble,
+            "mes": fila.fecha_tasacion.strftime("%Y-%m") if fila.fecha_tasacion else None,
+        }
+        for metrica, calcular in metricas.items():
+            valor = calcular(fila)
+            if valor is None:
+                continue
+            if metrica.endswith("_m2_cubierta") or metrica.endswith("_m2_terreno"):
+                # Logarítmicos de 2% de ancho relativo
+                if valor <= 0:
+                    continue
+                numero = math.floor(math.log(valor) / math.log(1.02))
+            else:
+                numero = math.floor(valor / (0.5 if metrica == "spread_pct" else 1))
+            for dimension, grupo in grupos.items():
+                clave = (dimension, grupo or "Sin dato", metrica, numero)
+                conteos[clave] = conteos.get(clave, 0) + 1
+    if conteos:
+        conn.execute(rollups.insert(), [
+            {"dimension": dimension, "valor": valor, "metrica": metrica, "bucket": numero, "cantidad": cantidad}
+            for (dimension, valor, metrica, numero), cantidad in conteos.items()
+        ])
+
+def _m007_version_inmuebles(conn):
+    """Columna version para el bloqueo optimista de las transiciones de estado"""
+    conn.execute(text("ALTER TABLE inmuebles ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+def _m008_transiciones_inmuebles(conn):
+    """Registro de transiciones del flujo, solo de inserción (ver cambios.py)"""
+    metadata = MetaData()
+    Table(
+        "transiciones_inmuebles", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("inmueble_id", Integer, nullable=False),
+        Column("estado_anterior", String, nullable=True),
+        Column("estado", String, nullable=False),
+        Column("version", Integer, nullable=False),
+        Column("ocurrido_en", DateTime, nullable=False),
+        Column("cambios", Text),
+        Index("ix_transiciones_inmueble_id", "inmueble_id", "id"),
+    )
+    metadata.create_all(bind=conn, checkfirst=True)
+
+def _m009_indices_grilla(conn):
+    """Índices (columna, id) para ordenar y paginar por keyset la grilla de inventario"""
+    for columna in ("ciudad", "direccion", "valor_tasacion", "valor_publicacion", "fecha_tasacion", "fecha_publicacion"):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_inmuebles_{columna}_id ON inmuebles ({columna}, id)"))
+
+# Lista ordenada: nunca modificar una migración ya publicada, agregar una nueva
+MIGRACIONES = [
+    (1, "Esquema inicial de inmuebles", _m001_esquema_inicial),
+    (2, "Índices de búsqueda por ciudad, estado, valor y fecha", _m002_indices_busqueda),
+    (3, "Contadores materializados del inventario", _m003_contadores_inventario),
+    (4, "Búsqueda de texto en dirección, emprendimiento y tipo", _m004_busqueda_texto),
+    (5, "Ubicación (lat/lon) con índice espacial", _m005_ubicacion),
+    (6, "Histogramas de precio por m² por ciudad, segmento, emprendimiento, tipo y mes", _m006_rollups_distribucion),
+    (7, "Versión de cada inmueble para bloqueo optimista", _m007_version_inmuebles),
+    (8, "Registro de transiciones de estado para el feed de cambios", _m008_transiciones_inmuebles),
+    (9, "Índices de orden de la grilla de inventario", _m009_indices_grilla),
+]
+
+def version_actual(bind=engine) -> int:
+    """Última versión aplicada (0 si la base está vacía)"""
+    metadata_migraciones.create_all(bind=bind, checkfirst=True)
+    with bind.connect() as conn:
+        return conn.execute(select(func.max(version_esquema.c.version))).scalar() or 0
+
+def pendientes(bind=engine) -> list:
+    """Versiones que falta aplicar; a diferencia de version_actual no crea nada"""
+    with bind.connect() as conn:
+        actual = 0
+        if inspect(conn).has_table(version_esquema.name):
+            actual = conn.execute(select(func.max(version_esquema.c.version))).scalar() or 0
+    return [version for version, _, _ in MIGRACIONES if version > actual]
+
+def aplicar_migraciones(bind=engine) -> list:
+    """Aplica las migraciones pendientes, cada una en su propia transacción"""
+    actual = version_actual(bind)
+    aplicadas = []
+    for version, descripcion, migracion in MIGRACIONES:
+        if version <= actual:
+            continue
+        with bind.begin() as conn:
+            migracion(conn)
+            conn.execute(version_esquema.insert().values(
+                version=version,
+                descripcion=descripcion,
+                aplicada_en=datetime.datetime.utcnow()
+            ))
+        logger.info(f"Migración {version} aplicada: {descripcion}")
+        aplicadas.append(version)
+    return aplicadas
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    aplicadas = aplicar_migraciones()
+    if aplicadas:
+        print(f"Migraciones aplicadas: {aplicadas}")
+    else:
+        print(f"El esquema ya está en la versión {version_actual()}")
@@ -1,14 +1,31 @@
 # Definición de Tablas (Inmuebles y Usuarios)
 
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Index
 from database import Base
 import datetime
 
 class Inmueble(Base):
     __tablename__ = "inmuebles"
+    # Índices según los filtros de /inmuebles/buscar y /estadisticas/resumen
+    # (se crean con migraciones.py, no con create_all)
+    __table_args__ = (
+        Index("ix_inmuebles_estado_id", "estado", "id"),
+        Index("ix_inmuebles_ciudad_estado_valor", "ciudad", "estado", "valor_tasacion"),
+        Index("ix_inmuebles_valor_tasacion", "valor_tasacion"),
+        Index("ix_inmuebles_fecha_tasacion", "fecha_tasacion"),
+        # Orden de la grilla de inventario con el id de desempate (keyset, ver consultas.py)
+        Index("ix_inmuebles_ciudad_id", "ciudad", "id"),
+        Index("ix_inmuebles_direccion_id", "direccion", "id"),
+        Index("ix_inmuebles_valor_tasacion_id", "valor_tasacion", "id"),
+        Index("ix_inmuebles_valor_publicacion_id", "valor_publicacion", "id"),
+        Index("ix_inmuebles_fecha_tasacion_id", "fecha_tasacion", "id"),
+        Index("ix_inmuebles_fecha_publicacion_id", "fecha_publicacion", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     estado = Column(String, default="Tasación") # Tasación, Para Publicar, Publicado
+    # Bloqueo optimista: cada transición de estado la incrementa (migración 7)
+    version = Column(Integer, nullable=False, default=1)
     
     # Datos de la Planilla
     ciudad = Column(String)
@@ -18,6 +35,9 @@ class Inmueble(Base):
     direccion = Column(String)
     sup_cubierta = Column(Float)
     sup_terreno = Column(Float)
+    # Ubicación (la completa geocodificacion.py; índice espacial en la migración 5)
+    lat = Column(Float, nullable=True)
+    lon = Column(Float, nullable=True)
     
     # Etapa Tasación
     fecha_tasacion = Column(Date, default=datetime.date.today)
@@ -27,4 +47,45 @@ class Inmueble(Base):
     # Etapa Publicación
     valor_publicacion = Column(Float, nullable=True)
     link_portal = Column(String, nullable=True) # Link de Tokko/ZonaProp
-    fecha_publicacion = Column(Date, nullable=True)
\ No newline at end of file
+    fecha_publicacion = Column(Date, nullable=True)
+
+class ContadorInventario(Base):
+    """Contadores materializados por (estado, ciudad, segmento) para /estadisticas/resumen"""
+    __tablename__ = "contadores_inventario"
+
+    # Los valores nulos se guardan como "" para que la clave sea única
+    estado = Column(String, primary_key=True)
+    ciudad = Column(String, primary_key=True)
+    segmento = Column(String, primary_key=True)
+
+    cantidad = Column(Integer, nullable=False, default=0)
+    cantidad_tasacion = Column(Integer, nullable=False, default=0)
+    suma_tasacion = Column(Float, nullable=False, default=0)
+    cantidad_publicacion = Column(Integer, nullable=False, default=0)
+    suma_publicacion = Column(Float, nullable=False, default=0)
+
+class DistribucionMetrica(Base):
+    """Histogramas de USD/m², spread y días a publicación por dimensión (ver analitica.py)"""
+    __tablename__ = "rollups_distribucion"
+
+    dimension = Column(String, primary_key=True)  # total, ciudad, segmento, emprendimiento, tipo, mes
+    valor = Column(String, primary_key=True)
+    metrica = Column(String, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+
+    cantidad = Column(Integer, nullable=False, default=0)
+
+class TransicionInmueble(Base):
+    """Registro de altas y cambios de estado; solo se inserta (ver cambios.py)"""
+    __tablename__ = "transiciones_inmuebles"
+    __table_args__ = (
+        Index("ix_transiciones_inmueble_id", "inmueble_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)  # cursor de /cambios
+    inmueble_id = Column(Integer, nullable=False)
+    estado_anterior = Column(String, nullable=True)  # None en el alta
+    estado = Column(String, nullable=False)
+    version = Column(Integer, nullable=False)
+    ocurrido_en = Column(DateTime, nullable=False)
+    cambios = Column(Text)  # JSON con las columnas que cambiaron
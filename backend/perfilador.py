@@ -0,0 +1,131 @@
+# Perfil de SQL por request y log de consultas lentas
+#
+# PERFIL_SQL=0        sin perfiles (por defecto)
+# PERFIL_SQL=header   perfila las requests que mandan "X-Perfil-SQL: 1"
+# PERFIL_SQL=1        perfila todas las requests
+#
+# Las consultas que superan SLOW_QUERY_MS se registran siempre, con la ruta que las hizo.
+
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Optional
+import json
+import logging
+import os
+import threading
+import uuid
+import metricas
+
+PERFIL_SQL = os.getenv("PERFIL_SQL", "0")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
+# Cuántos perfiles se guardan para consultar en /debug/perfiles-sql
+PERFIL_MAX_GUARDADOS = int(os.getenv("PERFIL_MAX_GUARDADOS", "100"))
+# Largo máximo de la sentencia y los parámetros en el perfil y en el log
+LARGO_MAX_TEXTO = 500
+
+logger_lentas = logging.getLogger("consultas_lentas")
+
+class Perfil:
+    """Sentencias ejecutadas durante una request (solo se capturan si se pidió el perfil)"""
+    __slots__ = ("id", "scope", "sentencias")
+
+    def __init__(self, scope: dict, capturar: bool):
+        self.id = uuid.uuid4().hex[:12]
+        self.scope = scope
+        self.sentencias = [] if capturar else None
+
+    def resumen(self) -> dict:
+        total_ms = sum(sentencia["duracion_ms"] for sentencia in self.sentencias)
+        return {
+            "id": self.id,
+            "metodo": self.scope.get("method"),
+            "ruta": metricas.ruta_de(self.scope),
+            "consultas": len(self.sentencias),
+            "total_ms": round(total_ms, 3),
+        }
+
+perfil_actual: ContextVar[Optional[Perfil]] = ContextVar("perfil_sql", default=None)
+
+_guardados = OrderedDict()
+_lock_guardados = threading.Lock()
+
+def _recortar(valor) -> str:
+    texto = valor if isinstance(valor, str) else repr(valor)
+    return texto if len(texto) <= LARGO_MAX_TEXTO else texto[:LARGO_MAX_TEXTO] + "..."
+
+def _observar_consulta(sentencia, parametros, duracion: float):
+    duracion_ms = duracion * 1000
+    perfil = perfil_actual.get()
+    if perfil is not None and perfil.sentencias is not None:
+        perfil.sentencias.append({
+            "sentencia": _recortar(sentencia),
+            "parametros": _recortar(parametros),
+            "duracion_ms": round(duracion_ms, 3),
+        })
+    if SLOW_QUERY_MS and duracion_ms >= SLOW_QUERY_MS:
+        logger_lentas.warning(json.dumps({
+            "evento": "consulta_lenta",
+            "duracion_ms": round(duracion_ms, 3),
+            "metodo": perfil.scope.get("method") if perfil else None,
+            "ruta": metricas.ruta_de(perfil.scope) if perfil else None,
+            "sentencia": _recortar(sentencia),
+            "parametros": _recortar(parametros),
+        }, ensure_ascii=False))
+
+metricas.observadores_consulta.append(_observar_consulta)
+
+def _pide_perfil(scope: dict) -> bool:
+    if PERFIL_SQL == "1":
+        return True
+    if PERFIL_SQL == "header":
+        return any(nombre == b"x-perfil-sql" and valor.strip() == b"1" for nombre, valor in scope.get("headers", []))
+    return False
+
+class PerfiladorMiddleware:
+    """Asocia un Perfil a cada request y, si se pidió, devuelve el resumen en X-Perfil-SQL"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        perfil = Perfil(scope, _pide_perfil(scope))
+        token = perfil_actual.set(perfil)
+
+        async def enviar(mensaje):
+            if perfil.sentencias is not None and mensaje["type"] == "http.response.start":
+                resumen = perfil.resumen()
+                valor = f"consultas={resumen['consultas']}; total_ms={resumen['total_ms']}; id={perfil.id}"
+                mensaje["headers"] = list(mensaje.get("headers", [])) + [(b"x-perfil-sql", valor.encode())]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            perfil_actual.reset(token)
+            if perfil.sentencias is not None:
+                _guardar(perfil)
+
+def _guardar(perfil: Perfil):
+    with _lock_guardados:
+        _guardados[perfil.id] = {**perfil.resumen(), "sentencias": perfil.sentencias}
+        while len(_guardados) > PERFIL_MAX_GUARDADOS:
+            _guardados.popitem(last=False)
+
+def habilitado() -> bool:
+    return PERFIL_SQL in ("1", "header")
+
+def perfiles_recientes() -> list:
+    """Resúmenes de los últimos perfiles, del más nuevo al más viejo"""
+    with _lock_guardados:
+        return [
+            {clave: valor for clave, valor in perfil.items() if clave != "sentencias"}
+            for perfil in reversed(_guardados.values())
+        ]
+
+def obtener_perfil(id: str) -> Optional[dict]:
+    with _lock_guardados:
+        return _guardados.get(id)
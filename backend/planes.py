@@ -0,0 +1,114 @@
+# Verificación de planes de consulta: ningún filtro de búsqueda debe recorrer la tabla completa
+# y la grilla de inventario no debe ordenar aparte (cada orden tiene su índice)
+# Uso: python planes.py  (sale con código 1 si algún plan hace un full scan)
+
+from itertools import combinations
+from sqlalchemy import func, select, text
+from consultas import ORDENES_GRILLA, consulta_cola, consulta_grilla, consultas_grilla_desde, filtros_busqueda, nulos_primero
+from cambios import consulta_cambios
+from database import engine
+from migraciones import aplicar_migraciones
+import datetime
+import json
+import models
+import sys
+
+# Valores de ejemplo para cada filtro de /inmuebles/buscar
+VALORES_FILTROS = {
+    "ciudad": "Campana",
+    "estado": "Tasación",
+    "precio_min": 10000.0,
+    "precio_max": 500000.0,
+}
+
+def consultas_a_verificar():
+    """Combinaciones de filtros de búsqueda, la cola y el conteo por estado y el feed de cambios"""
+    consultas = []
+    for cantidad in range(1, len(VALORES_FILTROS) + 1):
+        for nombres in combinations(VALORES_FILTROS, cantidad):
+            filtros = filtros_busqueda(**{nombre: VALORES_FILTROS[nombre] for nombre in nombres})
+            consultas.append(("buscar: " + ", ".join(nombres), select(models.Inmueble).where(*filtros)))
+    consultas.append(("cola: estado con keyset por id", consulta_cola("Para Publicar", cursor=100).limit(50)))
+    consultas.append((
+        "resumen: conteo por estado",
+        select(func.count()).select_from(models.Inmueble).where(models.Inmueble.estado == "Tasación")
+    ))
+    consultas.append(("cambios: feed desde un cursor", consulta_cambios(desde=100, limite=500)))
+    return consultas
+
+# Última fila de una página de ejemplo para cada orden de la grilla (None: el tramo de los NULL)
+CURSORES_GRILLA = {
+    "id": 100,
+    "ciudad": "Campana",
+    "direccion": "Mitre 1234",
+    "valor_tasacion": 100000.0,
+    "valor_publicacion": None,
+    "fecha_tasacion": datetime.date(2024, 1, 1),
+    "fecha_publicacion": datetime.date(2024, 1, 1),
+}
+
+def consultas_de_grilla(dialecto: str):
+    """(nombre, consulta, es_primera_pagina) de cada orden de la grilla, en los dos sentidos.
+    La primera página recorre el índice desde el principio y corta en el LIMIT; las siguientes
+    tienen que buscar en el índice a partir del cursor"""
+    consultas = []
+    for orden in ORDENES_GRILLA:
+        for descendente in (True, False):
+            sentido = "desc" if descendente else "asc"
+            consultas.append((f"grilla: {orden} {sentido}, primera página", consulta_grilla(orden, descendente).limit(50), True))
+            desde = consultas_grilla_desde(
+                orden, descendente, [], CURSORES_GRILLA[orden], 100, nulos_primero(dialecto, descendente)
+            )
+            for tramo, consulta in enumerate(desde):
+                consultas.append((f"grilla: {orden} {sentido}, con cursor (tramo {tramo + 1})", consulta.limit(50), tramo > 0))
+    return consultas
+
+def _nodos_plan_postgres(nodo):
+    yield nodo
+    for hijo in nodo.get("Plans", []):
+        yield from _nodos_plan_postgres(hijo)
+
+def explicar(conn, consulta) -> list:
+    """Devuelve las líneas del plan; en SQLite usa EXPLAIN QUERY PLAN, en Postgres EXPLAIN (FORMAT JSON)"""
+    sql = str(consulta.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return [fila.detail for fila in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+    plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return [f"{nodo['Node Type']} {nodo.get('Relation Name', '')}".strip() for nodo in _nodos_plan_postgres(plan[0]["Plan"])]
+
+def es_full_scan(linea: str) -> bool:
+    # SQLite: "SCAN inmuebles" (o "SCAN TABLE inmuebles" en versiones viejas); Postgres: "Seq Scan"
+    return linea.startswith("SCAN") or linea.startswith("Seq Scan")
+
+def ordena_aparte(linea: str) -> bool:
+    # SQLite: "USE TEMP B-TREE FOR ORDER BY"; Postgres: nodo Sort o Incremental Sort
+    return "TEMP B-TREE" in linea or linea.startswith("Sort") or linea.startswith("Incremental Sort")
+
+def verificar_planes(bind=engine) -> list:
+    """Lista de (consulta, plan) que recorren la tabla completa o, en la grilla, ordenan aparte;
+    vacía si todas usan índices"""
+    fallas = []
+    with bind.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # Con tablas chicas Postgres prefiere el seq scan aunque exista el índice
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for nombre, consulta in consultas_a_verificar():
+            plan = explicar(conn, consulta)
+            if any(es_full_scan(linea) for linea in plan):
+                fallas.append((nombre, plan))
+        for nombre, consulta, recorre_desde_el_principio in consultas_de_grilla(conn.dialect.name):
+            plan = explicar(conn, consulta)
+            if any(ordena_aparte(linea) or (es_full_scan(linea) and not recorre_desde_el_principio) for linea in plan):
+                fallas.append((nombre, plan))
+    return fallas
+
+if __name__ == "__main__":
+    aplicar_migraciones()
+    fallas = verificar_planes()
+    for nombre, plan in fallas:
+        print(f"FULL SCAN en {nombre}: {' | '.join(plan)}")
+    if fallas:
+        sys.exit(1)
+    print(f"OK: {len(consultas_a_verificar()) + len(consultas_de_grilla(engine.dialect.name))} consultas usan índices")
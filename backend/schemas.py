@@ -3,7 +3,7 @@
 
 from pydantic import BaseModel, validator, Field
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 
 class InmuebleBase(BaseModel):
     """Esquema base para validar datos de inmuebles"""
@@ -66,10 +66,136 @@ class InmuebleResponse(InmuebleBase):
     class Config:
         from_attributes = True  # Permite trabajar con objetos SQLAlchemy
 
+class InmuebleListado(BaseModel):
+    """Fila de /inmuebles/ y /inmuebles/buscar (con ?fields= solo vienen las columnas pedidas)"""
+    id: int
+    estado: Optional[str] = None
+    ciudad: Optional[str] = None
+    segmento: Optional[str] = None
+    emprendimiento: Optional[str] = None
+    tipo_inmueble: Optional[str] = None
+    direccion: Optional[str] = None
+    sup_cubierta: Optional[float] = None
+    sup_terreno: Optional[float] = None
+    fecha_tasacion: Optional[date] = None
+    valor_tasacion: Optional[float] = None
+    link_drive: Optional[str] = None
+    valor_publicacion: Optional[float] = None
+    link_portal: Optional[str] = None
+    fecha_publicacion: Optional[date] = None
+    version: Optional[int] = Field(None, description="Enviar al preparar o publicar para detectar cambios de otro usuario")
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    distancia_km: Optional[float] = Field(None, description="Solo en búsquedas por radio o bbox")
+
+class BusquedaTextoResponse(BaseModel):
+    """Página de resultados de la búsqueda de texto, del más relevante al menos relevante"""
+    consulta: str
+    corregida: Optional[str] = Field(None, description="Consulta usada si se corrigieron errores de tipeo")
+    total: int
+    pagina: int
+    limite: int
+    items: list[InmuebleListado]
+
+class GrillaResponse(BaseModel):
+    """Página de la grilla de inventario, ordenada y filtrada en el servidor"""
+    total: Optional[int] = Field(None, description="Inmuebles que cumplen los filtros (solo en la primera página, sin cursor)")
+    limite: int
+    orden: str
+    descendente: bool
+    items: list[InmuebleListado]
+    siguiente_cursor: Optional[str] = Field(None, description="Cursor de la página siguiente; null en la última")
+
+class Comparable(BaseModel):
+    """Tasación usada como comparable, con su peso relativo (1 = idéntica y de hoy)"""
+    id: int
+    valor_tasacion: float
+    similitud: float
+
+class ValuacionResponse(BaseModel):
+    """Valor sugerido a partir de tasaciones comparables (null si no hay del mismo tipo)"""
+    valor_sugerido: Optional[float]
+    valor_m2: Optional[float] = Field(None, description="Mediana ponderada del USD/m² de los comparables")
+    rango: Optional[dict] = Field(None, description="p25 y p75 del valor estimado")
+    comparables: int
+    criterio: Optional[str] = Field(None, description="Qué comparables se usaron")
+    muestra: list[Comparable]
+
 class EstadisticasResponse(BaseModel):
     """Esquema para respuesta de estadísticas"""
     total_inmuebles: int
     por_estado: dict
+    # {"estado"|"ciudad"|"segmento": {valor: {cantidad, valor_tasacion, valor_publicacion}}}
+    desglose: dict = Field(default_factory=dict, description="Cantidades y valores por dimensión")
+    fuente: str = Field("agregado", description="agregado (GROUP BY) o contadores (tabla materializada)")
+
+class InmuebleCola(BaseModel):
+    """Campos de un inmueble en la cola de trabajo de un estado"""
+    id: int
+    direccion: Optional[str]
+    ciudad: Optional[str]
+    emprendimiento: Optional[str]
+    tipo_inmueble: Optional[str]
+    sup_cubierta: Optional[float]
+    sup_terreno: Optional[float]
+    valor_tasacion: Optional[float]
+    valor_publicacion: Optional[float]
+    version: int = Field(1, description="Enviar al preparar o publicar para detectar cambios de otro usuario")
+
+class ColaResponse(BaseModel):
+    """Página de la cola de trabajo de un estado"""
+    estado: str
+    total: int
+    items: list[InmuebleCola]
+    siguiente_cursor: Optional[int] = Field(None, description="Pasar como ?cursor= para la página siguiente")
+
+class DistribucionResponse(BaseModel):
+    """Percentiles por grupo leídos de los histogramas precalculados"""
+    agrupar: str
+    metrica: Optional[str] = Field(None, description="Métrica pedida (todas si es null)")
+    # {grupo: {metrica: {cantidad, p10, p25, mediana, p75, p90}}}
+    grupos: dict
+
+class TransicionItem(BaseModel):
+    """Un inmueble de una transición en lote"""
+    id: int
+    version: Optional[int] = Field(None, description="Versión leída; si cambió, el inmueble queda en conflictos")
+    valor_publicacion: Optional[float] = Field(None, gt=0, description="Requerido para pasar a Para Publicar")
+    link_portal: Optional[str] = Field(None, description="Requerido para pasar a Publicado")
+
+    @validator('link_portal')
+    def limpiar_link(cls, v):
+        if v is None or v.strip() == "":
+            return None
+        return v.strip()
+
+class TransicionLote(BaseModel):
+    """Pasa muchos inmuebles al mismo estado (por ejemplo, después de una carga masiva al portal)"""
+    estado: str = Field(..., description="Estado destino: Para Publicar o Publicado")
+    items: list[TransicionItem] = Field(..., min_length=1, max_length=1000)
+
+class TransicionLoteResponse(BaseModel):
+    """Resultado de una transición en lote"""
+    estado: str
+    actualizados: list[dict] = Field(description="[{id, version}] con la versión nueva")
+    conflictos: list[dict] = Field(description="[{id, estado, version}] actuales; estado null si no existe")
+
+class Transicion(BaseModel):
+    """Un alta o cambio de estado del registro de transiciones"""
+    id: int = Field(description="Cursor: pasarlo como since para seguir desde acá")
+    inmueble_id: int
+    estado_anterior: Optional[str] = Field(None, description="null en el alta")
+    estado: str
+    version: int
+    ocurrido_en: datetime
+    cambios: dict = Field(default_factory=dict, description="Columnas que cambiaron con su valor nuevo")
+
+class CambiosResponse(BaseModel):
+    """Página del feed de cambios"""
+    items: list[Transicion]
+    cursor: int = Field(description="Pasar como since en el próximo pedido")
+    hay_mas: bool = Field(description="Hay más transiciones después de esta página")
+    ultimo: int = Field(description="Id de la última transición registrada")
 
 class BusquedaParams(BaseModel):
     """Parámetros de búsqueda"""
@@ -0,0 +1,25 @@
+# Serialización JSON de las respuestas
+# Usa orjson si está instalado: serializa dict, list, date y datetime directamente en C,
+# sin pasar por jsonable_encoder. Sin orjson cae al json estándar.
+
+from pydantic import BaseModel
+import datetime
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(valor):
+    if isinstance(valor, BaseModel):
+        return valor.model_dump()
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+def a_json(datos) -> bytes:
+    """Cuerpo JSON (UTF-8) de una respuesta"""
+    if orjson is not None:
+        return orjson.dumps(datos, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(datos, default=_default, ensure_ascii=False).encode()
@@ -0,0 +1,79 @@
+# Caché de respuestas GET: ETag, 304 e invalidación por versión (cache.py)
+# Uso: python -m pytest tests  (desde la carpeta backend)
+
+import os
+import sys
+import tempfile
+
+# Base temporal: los tests nunca tocan inmobiliaria.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["CACHE_BACKEND"] = "ninguno"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+from fastapi.testclient import TestClient
+import cache
+import main
+from migraciones import aplicar_migraciones
+
+aplicar_migraciones()
+cliente = TestClient(main.app)
+
+@pytest.fixture
+def memoria():
+    # Los demás tests corren sin caché; acá se usa la LRU en proceso y se restaura al terminar
+    anterior = cache.backend
+    cache.configurar(cache.CacheMemoria())
+    yield cache.backend
+    cache.configurar(anterior)
+
+def tasar(direccion: str) -> int:
+    respuesta = cliente.post("/inmuebles/tasar", params={
+        "ciudad": "Campana", "segmento": "Ciudad", "emprendimiento": "Centro", "tipo": "Casa",
+        "direccion": direccion, "sup_cubierta": 120, "sup_terreno": 300,
+        "valor_tasacion": 130000, "link_drive": "https://drive.google.com/x",
+    })
+    assert respuesta.status_code == 200
+    return respuesta.json()["id"]
+
+def buscar(**encabezados):
+    return cliente.get("/inmuebles/buscar", params={"ciudad": "Campana"}, headers=encabezados)
+
+def test_hit_y_304_con_el_mismo_etag(memoria):
+    tasar("Rivadavia 1")
+    primera = buscar()
+    assert primera.status_code == 200
+    assert primera.headers["X-Cache"] == "MISS"
+    etag = primera.headers["ETag"]
+
+    segunda = buscar()
+    assert segunda.headers["X-Cache"] == "HIT"
+    assert segunda.headers["ETag"] == etag
+    assert segunda.json() == primera.json()
+
+    no_modificada = buscar(**{"If-None-Match": etag})
+    assert no_modificada.status_code == 304
+    assert no_modificada.content == b""
+    assert no_modificada.headers["ETag"] == etag
+
+def test_una_escritura_invalida_lo_cacheado(memoria):
+    tasar("Rivadavia 2")
+    antes = buscar()
+    assert buscar().headers["X-Cache"] == "HIT"
+
+    id = tasar("Rivadavia 3")
+    despues = buscar(**{"If-None-Match": antes.headers["ETag"]})
+    assert despues.status_code == 200
+    assert despues.headers["X-Cache"] == "MISS"
+    assert despues.headers["ETag"] != antes.headers["ETag"]
+    assert id in [inmueble["id"] for inmueble in despues.json()]
+
+    # Un cambio de estado también sube la versión
+    etag = despues.headers["ETag"]
+    assert cliente.put(f"/inmuebles/{id}/preparar-publicacion", params={"valor_pub": 150000}).status_code == 200
+    assert buscar(**{"If-None-Match": etag}).status_code == 200
+
+def test_invalidar_sube_la_version_del_espacio(memoria):
+    version = memoria.version(f"version:{cache.INVENTARIO}")
+    cache.invalidar(cache.INVENTARIO)
+    assert memoria.version(f"version:{cache.INVENTARIO}") == version + 1
@@ -0,0 +1,105 @@
+# Feed de cambios: cursor y long-poll de /cambios (cambios.py)
+# Uso: python -m pytest tests  (desde la carpeta backend)
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Base temporal: los tests nunca tocan inmobiliaria.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["CACHE_BACKEND"] = "ninguno"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+from fastapi.testclient import TestClient
+import cambios
+import consultas
+import main
+from database import SessionLocal
+from migraciones import aplicar_migraciones
+
+aplicar_migraciones()
+cliente = TestClient(main.app)
+
+TASACION = {
+    "ciudad": "Zárate", "segmento": "Ciudad", "emprendimiento": "Norte", "tipo": "Casa",
+    "sup_cubierta": 120, "sup_terreno": 300, "valor_tasacion": 130000, "link_drive": "https://drive.google.com/x",
+}
+
+@pytest.fixture(autouse=True)
+def intervalo_corto(monkeypatch):
+    monkeypatch.setattr(cambios, "CAMBIOS_INTERVALO_S", 0.05)
+
+def tasar(direccion: str) -> int:
+    respuesta = cliente.post("/inmuebles/tasar", params={**TASACION, "direccion": direccion})
+    assert respuesta.status_code == 200
+    return respuesta.json()["id"]
+
+def leer_cambios(**params) -> dict:
+    respuesta = cliente.get("/cambios", params=params)
+    assert respuesta.status_code == 200
+    return respuesta.json()
+
+def test_cursor_devuelve_exactamente_lo_nuevo():
+    ultimo = leer_cambios()["ultimo"]
+    assert leer_cambios(since=ultimo) == {"items": [], "cursor": ultimo, "hay_mas": False, "ultimo": ultimo}
+
+    id = tasar("San Martín 10")
+    assert cliente.put(f"/inmuebles/{id}/preparar-publicacion", params={"valor_pub": 150000}).status_code == 200
+
+    pagina = leer_cambios(since=ultimo)
+    assert [(item["inmueble_id"], item["estado_anterior"], item["estado"], item["version"]) for item in pagina["items"]] == [
+        (id, None, "Tasación", 1),
+        (id, "Tasación", "Para Publicar", 2),
+    ]
+    assert pagina["items"][1]["cambios"] == {"valor_publicacion": 150000}
+    assert pagina["cursor"] == pagina["ultimo"] == pagina["items"][-1]["id"]
+    assert not pagina["hay_mas"]
+
+def test_paginas_con_limite_recorren_todo_en_orden():
+    desde = leer_cambios()["ultimo"]
+    ids = [tasar(f"San Martín {2 * i + 20}") for i in range(5)]
+
+    vistos, paginas = [], 0
+    while True:
+        pagina = leer_cambios(since=desde, limite=2)
+        assert len(pagina["items"]) <= 2
+        vistos += [item["inmueble_id"] for item in pagina["items"]]
+        desde, paginas = pagina["cursor"], paginas + 1
+        if not pagina["hay_mas"]:
+            break
+    assert vistos == ids
+    assert paginas == 3
+
+def test_long_poll_sin_cambios_espera_y_vuelve_vacio():
+    ultimo = leer_cambios()["ultimo"]
+    inicio = time.monotonic()
+    pagina = leer_cambios(since=ultimo, espera=0.5)
+    assert time.monotonic() - inicio >= 0.5
+    assert pagina["items"] == []
+    assert pagina["cursor"] == ultimo
+
+def test_long_poll_responde_apenas_hay_cambios():
+    ultimo = leer_cambios()["ultimo"]
+
+    # Otra escritura (otro proceso, una importación) a mitad de la espera
+    def escribir():
+        datos = {**TASACION, "direccion": "San Martín 99"}
+        datos["tipo_inmueble"] = datos.pop("tipo")
+        with SessionLocal() as db:
+            consultas.registrar_tasacion(db, datos)
+    otra = threading.Timer(0.3, escribir)
+    otra.start()
+    inicio = time.monotonic()
+    pagina = leer_cambios(since=ultimo, espera=30)
+    otra.join()
+
+    assert time.monotonic() - inicio < 5
+    assert [item["estado"] for item in pagina["items"]] == ["Tasación"]
+
+    # Con cambios pendientes no espera
+    inicio = time.monotonic()
+    assert leer_cambios(since=ultimo, espera=30)["items"]
+    assert time.monotonic() - inicio < 1
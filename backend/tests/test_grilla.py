@@ -0,0 +1,69 @@
+# Grilla de inventario paginada por keyset sobre (orden, id) (consultas.pagina_grilla)
+# Uso: python -m pytest tests  (desde la carpeta backend)
+
+import os
+import sys
+import tempfile
+
+# Base temporal: los tests nunca tocan inmobiliaria.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["CACHE_BACKEND"] = "ninguno"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+from fastapi.testclient import TestClient
+import consultas
+import main
+from migraciones import aplicar_migraciones
+
+aplicar_migraciones()
+cliente = TestClient(main.app)
+CIUDAD = "Exaltación de la Cruz"
+
+@pytest.fixture(scope="module")
+def inventario():
+    """Valores repetidos (desempata el id) y la mitad sin publicar (valor_publicacion NULL)"""
+    ids = []
+    for i in range(23):
+        respuesta = cliente.post("/inmuebles/tasar", params={
+            "ciudad": CIUDAD, "segmento": "Ciudad", "emprendimiento": "Centro", "tipo": "Casa",
+            "direccion": f"Calle {i % 4}", "sup_cubierta": 100.0, "sup_terreno": 300.0,
+            "valor_tasacion": 100000.0 + 1000 * (i % 5), "link_drive": "https://drive.google.com/test",
+        })
+        ids.append(respuesta.json()["id"])
+    for i, id in enumerate(ids[::2]):
+        cliente.put(f"/inmuebles/{id}/preparar-publicacion", params={"valor_pub": 120000.0 + 1000 * (i % 3)})
+    return ids
+
+def recorrer(orden: str, descendente: bool, limite: int) -> list:
+    """(total de la primera página, ids de todas las páginas siguiendo siguiente_cursor)"""
+    ids, cursor, primera = [], None, None
+    while True:
+        params = {"limite": limite, "orden": orden, "descendente": str(descendente).lower(), "ciudad": CIUDAD}
+        if cursor:
+            params["cursor"] = cursor
+        respuesta = cliente.get("/inmuebles/grilla", params=params)
+        assert respuesta.status_code == 200
+        pagina = respuesta.json()
+        primera = primera or pagina
+        # El total se cuenta solo en la primera página
+        assert (pagina["total"] is None) == (cursor is not None)
+        ids += [item["id"] for item in pagina["items"]]
+        cursor = pagina["siguiente_cursor"]
+        if not cursor:
+            return primera["total"], ids
+
+@pytest.mark.parametrize("orden", consultas.ORDENES_GRILLA)
+@pytest.mark.parametrize("descendente", [True, False])
+def test_recorrer_por_cursor_da_el_mismo_orden(inventario, orden, descendente):
+    with main.database.SessionLocal() as db:
+        filtros = consultas.filtros_busqueda(ciudad=CIUDAD)
+        esperado = [fila.id for fila in db.execute(consultas.consulta_grilla(orden, descendente, filtros))]
+    total, ids = recorrer(orden, descendente, limite=5)
+    assert total == len(inventario)
+    assert ids == esperado
+
+def test_cursor_de_otro_orden_o_invalido(inventario):
+    cursor = cliente.get("/inmuebles/grilla", params={"limite": 5, "orden": "ciudad"}).json()["siguiente_cursor"]
+    assert cliente.get("/inmuebles/grilla", params={"orden": "direccion", "cursor": cursor}).status_code == 400
+    assert cliente.get("/inmuebles/grilla", params={"orden": "ciudad", "cursor": "no-es-un-cursor"}).status_code == 400
@@ -0,0 +1,60 @@
+# Importación de planillas CSV según la codificación con que se guardaron
+# Uso: python -m pytest tests  (desde la carpeta backend)
+
+import os
+import sys
+import tempfile
+
+# Base temporal: los tests nunca tocan inmobiliaria.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["CACHE_BACKEND"] = "ninguno"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.testclient import TestClient
+import importacion
+import main
+import models
+from database import SessionLocal
+from migraciones import aplicar_migraciones
+
+aplicar_migraciones()
+cliente = TestClient(main.app)
+
+ENCABEZADO = "ciudad;segmento;emprendimiento;tipo;direccion;superficie cubierta;superficie terreno;valor;link\n"
+
+def planilla(filas: int, direccion: str = "Güemes {}") -> str:
+    return ENCABEZADO + "".join(
+        f"Zárate;Ciudad;Centro;Casa;{direccion.format(i)};120,5;300;130000;https://drive.google.com/{i}\n"
+        for i in range(filas)
+    )
+
+def importar(contenido: bytes, nombre: str = "planilla.csv"):
+    return cliente.post("/inmuebles/importar", files={"archivo": (nombre, contenido, "text/csv")})
+
+def cantidad_inmuebles() -> int:
+    with SessionLocal() as db:
+        return db.query(models.Inmueble).count()
+
+def test_csv_latin1_de_excel():
+    # Más filas que un lote, con los acentos al final para que el error aparezca a mitad del stream
+    filas = importacion.TAMANIO_LOTE + 10
+    respuesta = importar(planilla(filas).encode("latin-1"))
+    assert respuesta.status_code == 200
+    assert respuesta.json()["insertadas"] == filas
+    with SessionLocal() as db:
+        ultimo = db.query(models.Inmueble).order_by(models.Inmueble.id.desc()).first()
+    assert ultimo.ciudad == "Zárate"
+    assert ultimo.direccion == f"Güemes {filas - 1}"
+
+def test_csv_utf8_con_bom():
+    respuesta = importar(planilla(3).encode("utf-8-sig"))
+    assert respuesta.status_code == 200
+    assert respuesta.json()["insertadas"] == 3
+
+def test_csv_ilegible_no_inserta_nada():
+    antes = cantidad_inmuebles()
+    # 0x81 no es UTF-8 válido ni está definido en Windows-1252; va después del primer lote
+    contenido = planilla(importacion.TAMANIO_LOTE + 10).encode("utf-8") + b"Campana;Ciudad;Centro;Casa;\x81;1;1;1;x\n"
+    respuesta = importar(contenido)
+    assert respuesta.status_code == 400
+    assert cantidad_inmuebles() == antes
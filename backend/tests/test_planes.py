@@ -0,0 +1,20 @@
+# Planes de consulta: ningún filtro de búsqueda debe recorrer la tabla completa (planes.py)
+# Uso: python -m pytest tests  (desde la carpeta backend)
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import create_engine
+from migraciones import aplicar_migraciones
+from planes import consultas_a_verificar, verificar_planes
+
+def test_ninguna_consulta_hace_full_scan():
+    # Base propia recién migrada: los índices tienen que venir de las migraciones, no de create_all
+    engine = create_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "planes.db"))
+    aplicar_migraciones(engine)
+    assert len(consultas_a_verificar()) > 0
+    assert verificar_planes(engine) == []
+    engine.dispose()
@@ -0,0 +1,91 @@
+# Bloqueo optimista: dos usuarios que mueven el mismo inmueble no se pisan
+# Uso: python -m pytest tests  (desde la carpeta backend)
+
+import os
+import sys
+import tempfile
+
+# Base temporal: los tests nunca tocan inmobiliaria.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["CACHE_BACKEND"] = "ninguno"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.testclient import TestClient
+import main
+import models
+from database import SessionLocal
+from migraciones import aplicar_migraciones
+
+aplicar_migraciones()
+cliente = TestClient(main.app)
+
+def tasar(direccion: str) -> int:
+    respuesta = cliente.post("/inmuebles/tasar", params={
+        "ciudad": "Escobar", "segmento": "Ciudad", "emprendimiento": "Centro", "tipo": "Casa",
+        "direccion": direccion, "sup_cubierta": 120, "sup_terreno": 300,
+        "valor_tasacion": 130000, "link_drive": "https://drive.google.com/x",
+    })
+    assert respuesta.status_code == 200
+    return respuesta.json()["id"]
+
+def leer(id: int) -> models.Inmueble:
+    with SessionLocal() as db:
+        return db.get(models.Inmueble, id)
+
+def preparar(id: int, version: int, valor_pub: float = 150000):
+    return cliente.put(f"/inmuebles/{id}/preparar-publicacion", params={"valor_pub": valor_pub, "version": version})
+
+def test_preparar_con_version_vieja_da_409_y_no_cambia_nada():
+    id = tasar("Lavalle 100")
+    version = leer(id).version
+
+    respuesta = preparar(id, version)
+    assert respuesta.status_code == 200
+    assert respuesta.json()["version"] == version + 1
+
+    # El segundo usuario leyó la misma versión que el primero
+    respuesta = preparar(id, version, valor_pub=99000)
+    assert respuesta.status_code == 409
+    inmueble = leer(id)
+    assert inmueble.estado == "Para Publicar"
+    assert inmueble.valor_publicacion == 150000
+    assert inmueble.version == version + 1
+
+def test_publicar_con_version_vieja_da_409():
+    id = tasar("Lavalle 200")
+    version = preparar(id, leer(id).version).json()["version"]
+
+    respuesta = cliente.put(f"/inmuebles/{id}/publicar", params={"link_portal": "https://portal/1", "version": version - 1})
+    assert respuesta.status_code == 409
+    assert leer(id).estado == "Para Publicar"
+
+    respuesta = cliente.put(f"/inmuebles/{id}/publicar", params={"link_portal": "https://portal/1", "version": version})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["version"] == version + 1
+    assert leer(id).estado == "Publicado"
+
+def test_lote_informa_conflictos_sin_frenar_a_los_demas():
+    vigente, vieja, movido = tasar("Lavalle 300"), tasar("Lavalle 301"), tasar("Lavalle 302")
+    preparar(movido, leer(movido).version)
+    inexistente = 10**9
+
+    respuesta = cliente.post("/inmuebles/transicion", json={"estado": "Para Publicar", "items": [
+        {"id": vigente, "version": leer(vigente).version, "valor_publicacion": 140000},
+        {"id": vieja, "version": leer(vieja).version + 1, "valor_publicacion": 140000},
+        {"id": movido, "valor_publicacion": 140000},
+        {"id": inexistente, "valor_publicacion": 140000},
+    ]})
+    assert respuesta.status_code == 200
+    resultado = respuesta.json()
+
+    assert resultado["actualizados"] == [{"id": vigente, "version": 2}]
+    conflictos = {conflicto["id"]: conflicto for conflicto in resultado["conflictos"]}
+    assert set(conflictos) == {vieja, movido, inexistente}
+    assert conflictos[vieja]["estado"] == "Tasación"
+    assert conflictos[vieja]["version"] == 1
+    assert conflictos[movido]["estado"] == "Para Publicar"
+    assert conflictos[inexistente]["estado"] is None
+
+    assert leer(vigente).estado == "Para Publicar"
+    assert leer(vieja).estado == "Tasación"
+    assert leer(vieja).valor_publicacion is None
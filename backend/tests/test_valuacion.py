@@ -0,0 +1,44 @@
+# Valor sugerido a partir de comparables (valuacion.py)
+# Uso: python -m pytest tests  (desde la carpeta backend)
+
+import os
+import sys
+import tempfile
+
+# Base temporal: los tests nunca tocan inmobiliaria.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["CACHE_BACKEND"] = "ninguno"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.testclient import TestClient
+import main
+from migraciones import aplicar_migraciones
+
+aplicar_migraciones()
+cliente = TestClient(main.app)
+
+def tasar(**cambios):
+    datos = {
+        "ciudad": "Pilar", "segmento": "Ciudad", "emprendimiento": "Centro", "tipo": "Casa",
+        "direccion": "Mitre 1", "sup_cubierta": 100.0, "sup_terreno": 300.0,
+        "valor_tasacion": 100000.0, "link_drive": "https://drive.google.com/test",
+    }
+    assert cliente.post("/inmuebles/tasar", params={**datos, **cambios}).status_code == 200
+
+def valuar(**params):
+    respuesta = cliente.get("/inmuebles/valuacion", params={"ciudad": "Pilar", "segmento": "Ciudad", "tipo": "Casa", **params})
+    assert respuesta.status_code == 200
+    return respuesta.json()
+
+def test_sin_superficie_de_terreno_pesa_solo_la_cubierta():
+    for i in range(6):
+        tasar(direccion=f"Mitre {i}", sup_cubierta=100.0 + 10 * i, valor_tasacion=100000.0 + 10000 * i)
+    # sup_terreno=0 es el valor por defecto del formulario
+    sugerencia = valuar(sup_cubierta=100.0, sup_terreno=0)
+    assert sugerencia["comparables"] == 6
+    similitudes = [comparable["similitud"] for comparable in sugerencia["muestra"]]
+    assert max(similitudes) == 1.0
+    assert min(similitudes) > 0.1
+    # Se pondera por cercanía: el de 100 m² y el de 110 m² pesan más que el de 150 m²
+    assert sugerencia["muestra"][0]["valor_tasacion"] == 100000.0
+    assert sugerencia["valor_m2"] == 1000.0
@@ -0,0 +1,194 @@
+# Valor sugerido de una tasación a partir de comparables ya tasados
+#
+# Las tasaciones se guardan en memoria como columnas de NumPy (una matriz de features por
+# id) y cada consulta solo trae de la base los ids nuevos. La similitud de cada comparable
+# combina superficie (en escala logarítmica), antigüedad de la tasación y segmento; la
+# sugerencia es la mediana ponderada del USD/m² de los más parecidos.
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import NamedTuple, Optional
+import datetime
+import os
+import threading
+import time
+import numpy as np
+import models
+
+# Comparables de la misma ciudad necesarios para no ampliar la búsqueda a otras ciudades
+MIN_COMPARABLES = int(os.getenv("VALUACION_MIN_COMPARABLES", "5"))
+# Cuántos de los más parecidos entran en la sugerencia
+MAX_COMPARABLES = int(os.getenv("VALUACION_MAX_COMPARABLES", "25"))
+# Días en que el peso de una tasación se reduce a la mitad
+VIDA_MEDIA_DIAS = float(os.getenv("VALUACION_VIDA_MEDIA_DIAS", "365"))
+# Diferencia de superficie (en log) a la que el peso cae a 1/e: 0.4 ~ un 50% más grande o chica
+ESCALA_SUPERFICIE = 0.4
+# Factor de peso de un comparable de otro segmento
+PESO_OTRO_SEGMENTO = 0.5
+# Cada cuánto se vuelve a leer todo (así entran también las correcciones de filas ya cargadas)
+REFRESCO_COMPLETO_S = int(os.getenv("VALUACION_REFRESCO_COMPLETO_S", "3600"))
+
+# columna de la matriz: dtype (las de texto se guardan como códigos enteros)
+COLUMNAS_MATRIZ = {
+    "id": np.int64,
+    "ciudad": np.int32,
+    "segmento": np.int32,
+    "tipo_inmueble": np.int32,
+    "sup_cubierta": np.float64,
+    "sup_terreno": np.float64,
+    "valor_tasacion": np.float64,
+    "fecha_tasacion": np.int32,  # ordinal del día
+}
+CATEGORICAS = ("ciudad", "segmento", "tipo_inmueble")
+
+class Instantanea(NamedTuple):
+    """Columnas y códigos de un mismo momento de la matriz: una consulta trabaja solo con esto,
+    así un refresco concurrente no le mezcla códigos nuevos con arrays viejos (o al revés)"""
+    arrays: dict
+    codigos: dict
+
+class MatrizComparables:
+    """Features de todas las tasaciones con valor, en arrays que crecen duplicando su capacidad"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.cantidad = 0
+        self.ultimo_id = 0
+        self.codigos = {columna: {} for columna in CATEGORICAS}
+        self._arrays = {nombre: np.empty(0, dtype=dtype) for nombre, dtype in COLUMNAS_MATRIZ.items()}
+        self._leida_en = time.monotonic()
+
+    def _agregar(self, filas: list):
+        nueva_cantidad = self.cantidad + len(filas)
+        if nueva_cantidad > len(self._arrays["id"]):
+            capacidad = max(nueva_cantidad, 2 * len(self._arrays["id"]), 1024)
+            for nombre, array in self._arrays.items():
+                ampliado = np.empty(capacidad, dtype=array.dtype)
+                ampliado[:self.cantidad] = array[:self.cantidad]
+                self._arrays[nombre] = ampliado
+        columnas = dict(zip(COLUMNAS_MATRIZ, zip(*filas)))
+        # Los diccionarios de códigos no se modifican: si aparece un valor nuevo se reemplazan
+        # por una copia, porque las instantáneas ya entregadas siguen usando los anteriores
+        codigos = dict(self.codigos)
+        for nombre in CATEGORICAS:
+            nuevos = set(columnas[nombre]) - codigos[nombre].keys()
+            if nuevos:
+                codigos[nombre] = {**codigos[nombre]}
+                for valor in columnas[nombre]:
+                    codigos[nombre].setdefault(valor, len(codigos[nombre]))
+            columnas[nombre] = [codigos[nombre][valor] for valor in columnas[nombre]]
+        self.codigos = codigos
+        columnas["fecha_tasacion"] = [fecha.toordinal() if fecha else 0 for fecha in columnas["fecha_tasacion"]]
+        for nombre in ("sup_cubierta", "sup_terreno"):
+            columnas[nombre] = [valor or 0.0 for valor in columnas[nombre]]
+        for nombre, dtype in COLUMNAS_MATRIZ.items():
+            self._arrays[nombre][self.cantidad:nueva_cantidad] = np.asarray(columnas[nombre], dtype=dtype)
+        self.cantidad = nueva_cantidad
+        self.ultimo_id = int(self._arrays["id"][nueva_cantidad - 1])
+
+    def actualizar(self, db: Session) -> Instantanea:
+        """Trae de la base solo las tasaciones nuevas y devuelve una instantánea de solo lectura"""
+        with self._lock:
+            if time.monotonic() - self._leida_en > REFRESCO_COMPLETO_S:
+                self._reiniciar()
+            tabla = models.Inmueble.__table__
+            filas = db.execute(
+                select(*(tabla.c[nombre] for nombre in COLUMNAS_MATRIZ))
+                .where(tabla.c.id > self.ultimo_id, tabla.c.valor_tasacion > 0)
+                .order_by(tabla.c.id)
+            ).all()
+            if filas:
+                self._agregar(filas)
+            # Las vistas quedan válidas: lo que se agregue después va más allá de self.cantidad
+            # o a arrays nuevos, y _reiniciar también crea arrays nuevos
+            arrays = {}
+            for nombre, array in self._arrays.items():
+                arrays[nombre] = array[:self.cantidad]
+                arrays[nombre].flags.writeable = False
+            return Instantanea(arrays, self.codigos)
+
+matriz = MatrizComparables()
+
+def _percentil_ponderado(valores: np.ndarray, pesos: np.ndarray, q: float) -> float:
+    orden = np.argsort(valores)
+    acumulado = np.cumsum(pesos[orden])
+    return float(valores[orden][np.searchsorted(acumulado, q * acumulado[-1])])
+
+def sugerir(
+    db: Session,
+    ciudad: str,
+    segmento: str,
+    tipo_inmueble: str,
+    sup_cubierta: float,
+    sup_terreno: float,
+    fecha: Optional[datetime.date] = None,
+) -> dict:
+    """Valor sugerido, rango intercuartil y los comparables más parecidos"""
+    m, codigos = matriz.actualizar(db)
+    respuesta = {"valor_sugerido": None, "valor_m2": None, "rango": None, "comparables": 0, "criterio": None, "muestra": []}
+
+    codigo_tipo = codigos["tipo_inmueble"].get(tipo_inmueble)
+    if codigo_tipo is None:
+        return respuesta
+    # Se compara por la superficie cubierta, o por la del terreno si no tiene (lotes)
+    superficie = "sup_cubierta" if sup_cubierta > 0 else "sup_terreno"
+    superficie_propia = sup_cubierta if sup_cubierta > 0 else sup_terreno
+
+    candidatos = m["tipo_inmueble"] == codigo_tipo
+    if superficie_propia > 0:
+        candidatos &= m[superficie] > 0
+    misma_ciudad = candidatos & (m["ciudad"] == codigos["ciudad"].get(ciudad, -1))
+    if np.count_nonzero(misma_ciudad) >= MIN_COMPARABLES:
+        candidatos, respuesta["criterio"] = misma_ciudad, "misma ciudad y tipo"
+    else:
+        respuesta["criterio"] = "mismo tipo, todas las ciudades"
+    indices = np.flatnonzero(candidatos)
+    if len(indices) == 0:
+        return respuesta
+
+    # Cada superficie suma solo si la tienen los dos: un 0 (dato no cargado, o el terreno de un
+    # departamento) contra 300 m² daría una distancia que anula el peso de todos los comparables
+    distancia = np.zeros(len(indices))
+    for nombre, propia in (("sup_cubierta", sup_cubierta), ("sup_terreno", sup_terreno)):
+        if propia > 0:
+            otra = m[nombre][indices]
+            distancia += np.where(otra > 0, np.abs(np.log1p(otra) - np.log1p(propia)), 0.0)
+    edad_dias = np.maximum((fecha or datetime.date.today()).toordinal() - m["fecha_tasacion"][indices], 0)
+    pesos = (
+        np.exp(-((distancia / ESCALA_SUPERFICIE) ** 2))
+        * np.exp2(-edad_dias / VIDA_MEDIA_DIAS)
+        * np.where(m["segmento"][indices] == codigos["segmento"].get(segmento, -1), 1.0, PESO_OTRO_SEGMENTO)
+    )
+    if len(indices) > MAX_COMPARABLES:
+        mejores = np.argpartition(-pesos, MAX_COMPARABLES)[:MAX_COMPARABLES]
+        indices, pesos = indices[mejores], pesos[mejores]
+    if pesos.sum() <= 0:
+        pesos = np.ones_like(pesos)
+
+    valores = m["valor_tasacion"][indices]
+    if superficie_propia > 0:
+        por_m2 = valores / m[superficie][indices]
+        valor_m2 = _percentil_ponderado(por_m2, pesos, 0.5)
+        respuesta["valor_m2"] = round(valor_m2, 2)
+        respuesta["valor_sugerido"] = round(valor_m2 * superficie_propia, -2)
+        respuesta["rango"] = {
+            "p25": round(_percentil_ponderado(por_m2, pesos, 0.25) * superficie_propia, -2),
+            "p75": round(_percentil_ponderado(por_m2, pesos, 0.75) * superficie_propia, -2),
+        }
+    else:
+        respuesta["valor_sugerido"] = round(_percentil_ponderado(valores, pesos, 0.5), -2)
+        respuesta["rango"] = {
+            "p25": round(_percentil_ponderado(valores, pesos, 0.25), -2),
+            "p75": round(_percentil_ponderado(valores, pesos, 0.75), -2),
+        }
+
+    orden = np.argsort(-pesos)[:5]
+    respuesta["comparables"] = int(len(indices))
+    respuesta["muestra"] = [
+        {"id": int(m["id"][indices[i]]), "valor_tasacion": float(valores[i]), "similitud": round(float(pesos[i]), 3)}
+        for i in orden
+    ]
+    return respuesta
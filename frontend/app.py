@@ -1,12 +1,55 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import extra_streamlit_components as stx
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import os
+import threading
+import time
 
 # --- CONFIGURACIÓN ---
 API_URL = os.getenv("API_URL", "https://cadema-base.onrender.com")
+# Propiedades por página en la pestaña Publicar
+TAMANIO_PAGINA_COLA = 50
+# Resultados que se muestran de una búsqueda por texto
+TAMANIO_PAGINA_BUSQUEDA = 100
+# Tamaños de página de la grilla de Inventario (la API ordena, filtra y pagina)
+TAMANIOS_PAGINA_INVENTARIO = [25, 50, 100, 200]
+CIUDADES = ["Campana", "Zarate", "Escobar", "Los Cardales"]
+ESTADOS = ["Tasación", "Para Publicar", "Publicado"]
+# Columnas por las que la API puede ordenar la grilla: etiqueta del selector
+ORDENES_INVENTARIO = {
+    "id": "Carga (ID)",
+    "fecha_tasacion": "Fecha de tasación",
+    "valor_tasacion": "Valor de tasación",
+    "valor_publicacion": "Valor de publicación",
+    "fecha_publicacion": "Fecha de publicación",
+    "ciudad": "Ciudad",
+    "direccion": "Dirección",
+}
+# Columnas que devuelve /inmuebles/grilla y sus tipos en el DataFrame (no los que infiere pandas)
+COLUMNAS_GRILLA = [
+    "id", "estado", "ciudad", "direccion", "tipo_inmueble",
+    "valor_tasacion", "valor_publicacion", "fecha_tasacion", "fecha_publicacion",
+]
+TIPOS_GRILLA = {
+    "id": "int64",
+    "estado_visual": "category",
+    "ciudad": "category",
+    "tipo_inmueble": "category",
+    "valor_tasacion": "float64",
+    "valor_publicacion": "float64",
+}
+FECHAS_GRILLA = ["fecha_tasacion", "fecha_publicacion"]
+# Segundos que se reutiliza una lectura de la API antes de volver a pedirla
+LECTURAS_TTL = int(os.getenv("LECTURAS_TTL", "30"))
+# Reintentos de los GET ante fallas de conexión o 502/503/504 (con espera exponencial)
+HTTP_REINTENTOS = int(os.getenv("HTTP_REINTENTOS", "3"))
 
 st.set_page_config(
     page_title="Cadema - Gestión Inmobiliaria", 
@@ -21,29 +64,59 @@ def get_cookie_manager():
     """Inicializa el manejador de cookies una sola vez"""
     return stx.CookieManager()
 
+ESTADOS_CONFIG = {
+    "Tasación": {"emoji": "🟡", "color": "orange"},
+    "Para Publicar": {"emoji": "🟠", "color": "blue"},
+    "Publicado": {"emoji": "🟢", "color": "green"}
+}
+ETIQUETAS_ESTADO = {estado: f"{config['emoji']} {estado}" for estado, config in ESTADOS_CONFIG.items()}
+
 def mostrar_estado(estado):
     """Muestra el estado con emoji y color"""
-    estados_config = {
-        "Tasación": {"emoji": "🟡", "color": "orange"},
-        "Para Publicar": {"emoji": "🟠", "color": "blue"},
-        "Publicado": {"emoji": "🟢", "color": "green"}
-    }
-    config = estados_config.get(estado, {"emoji": "⚪", "color": "gray"})
-    return f"{config['emoji']} {estado}"
+    return ETIQUETAS_ESTADO.get(estado, f"⚪ {estado}")
+
+def columna_estado(serie):
+    """mostrar_estado para una columna entera: se calcula una vez por estado distinto y se aplica con .map"""
+    return serie.map({estado: mostrar_estado(estado) for estado in serie.unique()})
+
+def grilla_a_dataframe(items):
+    """DataFrame de una página de la grilla con tipos fijos: categorías, float64 y fechas"""
+    df = pd.DataFrame.from_records(items, columns=COLUMNAS_GRILLA)
+    df["estado_visual"] = columna_estado(df["estado"])
+    df = df.astype(TIPOS_GRILLA)
+    for columna in FECHAS_GRILLA:
+        df[columna] = pd.to_datetime(df[columna], format="%Y-%m-%d", errors="coerce")
+    return df
+
+@st.cache_resource
+def get_http_session():
+    """Sesión HTTP compartida entre reruns: mantiene las conexiones abiertas (keep-alive)"""
+    sesion = requests.Session()
+    # Solo los GET se reintentan ante errores del servidor: un POST/PUT repetido podría duplicar la operación
+    reintentos = Retry(
+        total=HTTP_REINTENTOS,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=reintentos)
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
 
 def hacer_request(metodo, endpoint, **kwargs):
     """Función centralizada para hacer requests con manejo de errores"""
     url = f"{API_URL}{endpoint}"
     try:
-        if metodo == "GET":
-            response = requests.get(url, timeout=10, **kwargs)
-        elif metodo == "POST":
-            response = requests.post(url, timeout=10, **kwargs)
-        elif metodo == "PUT":
-            response = requests.put(url, timeout=10, **kwargs)
+        response = get_http_session().request(metodo, url, timeout=10, **kwargs)
         
         response.raise_for_status()
-        return {"success": True, "data": response.json()}
+        resultado = {"success": True, "data": response.json()}
+        if metodo != "GET":
+            # Una escritura exitosa deja viejas las lecturas memorizadas
+            _leer_cacheado.clear()
+        return resultado
     
     except requests.exceptions.Timeout:
         return {"success": False, "error": "⏱️ El servidor tardó demasiado en responder. Intenta nuevamente."}
@@ -55,11 +128,217 @@ def hacer_request(metodo, endpoint, **kwargs):
         elif e.response.status_code == 400:
             detalle = e.response.json().get("detail", "Datos inválidos")
             return {"success": False, "error": f"⚠️ {detalle}"}
+        elif e.response.status_code == 409:
+            # Otro usuario movió el inmueble entre que se cargó la pantalla y se confirmó
+            detalle = e.response.json().get("detail", "El inmueble fue modificado por otro usuario")
+            return {"success": False, "error": f"🔄 {detalle}. Actualizá la página."}
         else:
             return {"success": False, "error": f"❌ Error del servidor ({e.response.status_code})"}
     except Exception as e:
         return {"success": False, "error": f"❌ Error inesperado: {str(e)}"}
 
+class _LecturaFallida(Exception):
+    """Lleva el resultado de un GET fallido fuera de la caché (st.cache_data no guarda excepciones)"""
+    def __init__(self, resultado):
+        super().__init__(resultado["error"])
+        self.resultado = resultado
+
+@st.cache_data(ttl=LECTURAS_TTL, show_spinner=False)
+def _leer_cacheado(endpoint, params):
+    resultado = hacer_request("GET", endpoint, params=params)
+    if not resultado["success"]:
+        raise _LecturaFallida(resultado)
+    # Cuándo se pidió al servidor: lo memorizado de reruns anteriores queda con un valor viejo
+    resultado["leido_en"] = time.monotonic()
+    return resultado
+
+def leer(endpoint, params=None):
+    """GET memorizado por LECTURAS_TTL segundos; los errores no se memorizan"""
+    try:
+        return _leer_cacheado(endpoint, params or {})
+    except _LecturaFallida as e:
+        return e.resultado
+
+def leer_sin_memorizar(endpoint, params=None):
+    return hacer_request("GET", endpoint, params=params)
+
+def lectura_cambios():
+    """Lectura de /cambios para cargar_en_paralelo: alcanza con pedir una transición desde el rerun anterior"""
+    return ("/cambios", {"since": st.session_state.get('cambios_cursor') or 0, "limite": 1})
+
+def aplicar_cambios(resultado):
+    """Descarta las lecturas memorizadas si hubo altas o cambios de estado (aunque sean de otro
+    usuario) desde el rerun anterior. Devuelve si hubo; si no, las lecturas se reutilizan hasta LECTURAS_TTL."""
+    if not resultado["success"]:
+        return False
+    hubo = st.session_state.get('cambios_cursor') is not None and bool(resultado["data"]["items"])
+    if hubo:
+        _leer_cacheado.clear()
+    st.session_state['cambios_cursor'] = resultado["data"]["ultimo"]
+    return hubo
+
+def cargar_en_paralelo(lecturas, sin_memorizar=()):
+    """Lanza todas las lecturas {nombre: (endpoint, params)} a la vez y devuelve
+    (nombre, resultado) a medida que van llegando; las de `sin_memorizar` van siempre al servidor"""
+    # Los hilos necesitan el contexto del rerun para usar la caché de Streamlit
+    contexto = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=len(lecturas),
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), contexto),
+    ) as pool:
+        futuros = {
+            pool.submit(leer_sin_memorizar if nombre in sin_memorizar else leer, endpoint, params): nombre
+            for nombre, (endpoint, params) in lecturas.items()
+        }
+        for futuro in as_completed(futuros):
+            yield futuros[futuro], futuro.result()
+
+# --- SECCIONES CON DATOS DE LA API ---
+
+def mostrar_resumen(resultado):
+    """Métricas rápidas de la barra lateral"""
+    if resultado["success"]:
+        stats = resultado["data"]
+        st.metric("Total Inmuebles", stats["total_inmuebles"])
+        for estado, cantidad in stats["por_estado"].items():
+            st.metric(mostrar_estado(estado), cantidad)
+
+def mostrar_inventario(resultado, filtros):
+    """Página de la grilla del inventario, su paginación y la descarga (con los mismos filtros)"""
+    if resultado["success"]:
+        grilla = resultado["data"]
+        cursores = st.session_state['inventario_cursores']
+        if grilla["total"] is not None:
+            # El total llega solo con la primera página (las siguientes se piden por cursor)
+            st.session_state['inventario_total'] = grilla["total"]
+        total = st.session_state.get('inventario_total')
+        pagina = len(cursores)
+        if grilla["items"]:
+            df = grilla_a_dataframe(grilla["items"])
+            
+            # Seleccionar y ordenar columnas para mostrar
+            columnas_mostrar = ['id', 'estado_visual', 'ciudad', 'direccion', 
+                               'tipo_inmueble', 'valor_tasacion', 'valor_publicacion', 
+                               'fecha_tasacion', 'fecha_publicacion']
+            
+            st.dataframe(
+                df[columnas_mostrar], 
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "estado_visual": "Estado",
+                    "valor_tasacion": st.column_config.NumberColumn(
+                        "Tasación (USD)",
+                        format="$%.2f"
+                    ),
+                    "valor_publicacion": st.column_config.NumberColumn(
+                        "Publicación (USD)",
+                        format="$%.2f"
+                    ),
+                    "fecha_tasacion": st.column_config.DateColumn("Fecha tasación", format="DD/MM/YYYY"),
+                    "fecha_publicacion": st.column_config.DateColumn("Fecha publicación", format="DD/MM/YYYY"),
+                }
+            )
+            
+            col_ant, col_pagina, col_sig = st.columns([1, 2, 1])
+            with col_ant:
+                if pagina > 1:
+                    if st.button("⬅️ Anterior", key="inventario_anterior", use_container_width=True):
+                        cursores.pop()
+                        st.rerun()
+            with col_pagina:
+                if total is not None:
+                    paginas = max(pagina, -(-total // grilla["limite"]))
+                    st.caption(f"Página {pagina} de {paginas} · {total} propiedades")
+                else:
+                    st.caption(f"Página {pagina}")
+            with col_sig:
+                if grilla["siguiente_cursor"]:
+                    if st.button("Siguiente ➡️", key="inventario_siguiente", use_container_width=True):
+                        cursores.append(grilla["siguiente_cursor"])
+                        st.rerun()
+            
+            # Descarga: el backend genera el archivo en streaming desde la base
+            col_csv, col_parquet = st.columns(2)
+            with col_csv:
+                st.link_button("📥 Descargar CSV", f"{API_URL}/inmuebles/exportar?{urlencode({'formato': 'csv', **filtros})}")
+            with col_parquet:
+                st.link_button("📥 Descargar Parquet", f"{API_URL}/inmuebles/exportar?{urlencode({'formato': 'parquet', **filtros})}")
+        elif pagina > 1:
+            # La página quedó vacía (el inventario cambió): volver a la anterior
+            cursores.pop()
+            st.rerun()
+        elif filtros:
+            st.info("📭 No hay propiedades con esos filtros")
+        else:
+            st.info("📭 No hay propiedades registradas aún")
+    else:
+        st.error(resultado["error"])
+
+def mostrar_cola(resultado):
+    """Tarjetas de la cola "Para Publicar" con su paginación"""
+    if resultado["success"]:
+        # El backend ya devuelve solo los que están "Para Publicar"
+        cola = resultado["data"]
+        pendientes = cola["items"]
+        
+        if pendientes:
+            st.info(f"📋 Hay {cola['total']} propiedades pendientes de publicación")
+            
+            for prop in pendientes:
+                with st.expander(f"📌 {prop['direccion']} - {prop['ciudad']} (${prop.get('valor_publicacion', 'N/A'):,.2f})"):
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        st.write("**Detalles:**")
+                        st.write(f"- Tipo: {prop['tipo_inmueble']}")
+                        st.write(f"- Emprendimiento: {prop['emprendimiento']}")
+                        st.write(f"- Sup. Cubierta: {prop['sup_cubierta']} m²")
+                        st.write(f"- Sup. Terreno: {prop['sup_terreno']} m²")
+                    
+                    with col2:
+                        link_portal = st.text_input(
+                            "Link del Portal Inmobiliario",
+                            key=f"link_{prop['id']}",
+                            placeholder="https://tokko.com/... o https://zonaprop.com/..."
+                        )
+                        
+                        if st.button("✅ Confirmar Publicación", key=f"btn_{prop['id']}"):
+                            if not link_portal or link_portal.strip() == "":
+                                st.error("⚠️ Debes ingresar el link del portal")
+                            else:
+                                resultado_pub = hacer_request(
+                                    "PUT", 
+                                    f"/inmuebles/{prop['id']}/publicar",
+                                    params={"link_portal": link_portal, "version": prop["version"]}
+                                )
+                                
+                                if resultado_pub["success"]:
+                                    st.success("✅ Propiedad publicada exitosamente")
+                                    st.rerun()
+                                else:
+                                    st.error(resultado_pub["error"])
+            
+            col_ant, col_sig = st.columns(2)
+            with col_ant:
+                if len(st.session_state['cola_cursores']) > 1:
+                    if st.button("⬅️ Anterior", key="cola_anterior", use_container_width=True):
+                        st.session_state['cola_cursores'].pop()
+                        st.rerun()
+            with col_sig:
+                if cola["siguiente_cursor"] is not None:
+                    if st.button("Siguiente ➡️", key="cola_siguiente", use_container_width=True):
+                        st.session_state['cola_cursores'].append(cola["siguiente_cursor"])
+                        st.rerun()
+        elif len(st.session_state['cola_cursores']) > 1:
+            # La página quedó vacía (se publicó lo último): volver a la anterior
+            st.session_state['cola_cursores'].pop()
+            st.rerun()
+        else:
+            st.success("✨ No hay propiedades pendientes de publicación")
+    else:
+        st.error(resultado["error"])
+
 # --- INICIALIZACIÓN ---
 cookie_manager = get_cookie_manager()
 
@@ -105,6 +384,9 @@ if not st.session_state['logged_in']:
             st.info("💡 Usuario demo: admin / 1234")
 else:
     # --- INTERFAZ PRINCIPAL ---
+    # Primero se arma el esqueleto con un lugar reservado para cada sección con datos;
+    # al final las lecturas salen todas juntas (también la de /cambios) y cada sección se
+    # dibuja apenas llega la suya.
     
     # Encabezado
     st.title("🏠 Cadema - Sistema de Gestión Inmobiliaria")
@@ -115,12 +397,8 @@ else:
         
         # Estadísticas rápidas
         st.subheader("📊 Resumen")
-        resultado = hacer_request("GET", "/estadisticas/resumen")
-        if resultado["success"]:
-            stats = resultado["data"]
-            st.metric("Total Inmuebles", stats["total_inmuebles"])
-            for estado, cantidad in stats["por_estado"].items():
-                st.metric(mostrar_estado(estado), cantidad)
+        lugar_resumen = st.empty()
+        lugar_resumen.caption("⏳ Cargando...")
         
         st.divider()
         
@@ -142,63 +420,72 @@ else:
     with tab_lista:
         st.subheader("Inventario General de Propiedades")
         
-        col1, col2 = st.columns([3, 1])
+        # Solo se pide la página visible: cambiar un filtro, el orden o el tamaño vuelve a la primera
+        # Cursor de cada página visitada (None es la primera), como en la cola de publicación
+        if 'inventario_cursores' not in st.session_state:
+            st.session_state['inventario_cursores'] = [None]
+        
+        def volver_a_primera_pagina():
+            st.session_state['inventario_cursores'] = [None]
+        
+        col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 1, 1])
+        with col1:
+            ciudad_inv = st.selectbox("Ciudad", ["Todas"] + CIUDADES, key="inventario_ciudad", on_change=volver_a_primera_pagina)
         with col2:
+            estado_inv = st.selectbox("Estado", ["Todos"] + ESTADOS, key="inventario_estado", on_change=volver_a_primera_pagina)
+        with col3:
+            orden_inv = st.selectbox(
+                "Ordenar por",
+                list(ORDENES_INVENTARIO),
+                format_func=ORDENES_INVENTARIO.get,
+                key="inventario_orden",
+                on_change=volver_a_primera_pagina
+            )
+            descendente_inv = st.toggle("Mayor a menor", value=True, key="inventario_descendente", on_change=volver_a_primera_pagina)
+        with col4:
+            tamanio_inv = st.selectbox(
+                "Por página",
+                TAMANIOS_PAGINA_INVENTARIO,
+                index=1,
+                key="inventario_tamanio",
+                on_change=volver_a_primera_pagina
+            )
+        with col5:
+            st.write("")
             if st.button("🔄 Actualizar", use_container_width=True):
+                _leer_cacheado.clear()
                 st.rerun()
         
-        resultado = hacer_request("GET", "/inmuebles/")
+        filtros_inventario = {}
+        if ciudad_inv != "Todas":
+            filtros_inventario["ciudad"] = ciudad_inv
+        if estado_inv != "Todos":
+            filtros_inventario["estado"] = estado_inv
+        params_inventario = {
+            "limite": tamanio_inv,
+            "orden": orden_inv,
+            "descendente": "true" if descendente_inv else "false",
+            **filtros_inventario,
+        }
+        if st.session_state['inventario_cursores'][-1] is not None:
+            params_inventario["cursor"] = st.session_state['inventario_cursores'][-1]
         
-        if resultado["success"]:
-            datos = resultado["data"]
-            if datos:
-                df = pd.DataFrame(datos)
-                
-                # Formatear columnas
-                df['estado_visual'] = df['estado'].apply(mostrar_estado)
-                
-                # Seleccionar y ordenar columnas para mostrar
-                columnas_mostrar = ['id', 'estado_visual', 'ciudad', 'direccion', 
-                                   'tipo_inmueble', 'valor_tasacion', 'valor_publicacion', 
-                                   'fecha_tasacion', 'fecha_publicacion']
-                
-                df_display = df[[col for col in columnas_mostrar if col in df.columns]]
-                
-                st.dataframe(
-                    df_display, 
-                    use_container_width=True,
-                    hide_index=True,
-                    column_config={
-                        "estado_visual": "Estado",
-                        "valor_tasacion": st.column_config.NumberColumn(
-                            "Tasación (USD)",
-                            format="$%.2f"
-                        ),
-                        "valor_publicacion": st.column_config.NumberColumn(
-                            "Publicación (USD)",
-                            format="$%.2f"
-                        )
-                    }
-                )
-                
-                # Opción de descarga
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    label="📥 Descargar CSV",
-                    data=csv,
-                    file_name=f"inventario_cadema_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
-            else:
-                st.info("📭 No hay propiedades registradas aún")
-        else:
-            st.error(resultado["error"])
+        lugar_inventario = st.empty()
+        lugar_inventario.caption("⏳ Cargando inventario...")
 
     # --- TAB 2: NUEVA TASACIÓN ---
     with tab_tasar:
         st.subheader("Registrar Nueva Tasación")
         
-        with st.form("form_tasacion", clear_on_submit=True):
+        # El formulario no se limpia solo (así "Sugerir valor" conserva lo cargado): al guardar
+        # se cambia su clave y los campos vuelven a empezar vacíos
+        if 'form_tasacion_n' not in st.session_state:
+            st.session_state['form_tasacion_n'] = 0
+        if 'tasacion_guardada' in st.session_state:
+            st.success(f"✅ {st.session_state.pop('tasacion_guardada')}")
+            st.balloons()
+        
+        with st.form(f"form_tasacion_{st.session_state['form_tasacion_n']}"):
             col1, col2 = st.columns(2)
             
             with col1:
@@ -253,9 +540,31 @@ else:
             st.caption("* Campos obligatorios")
             
             col_btn1, col_btn2 = st.columns(2)
+            with col_btn1:
+                sugerir = st.form_submit_button("💡 Sugerir Valor", use_container_width=True)
             with col_btn2:
                 submitted = st.form_submit_button("💾 Guardar Tasación", use_container_width=True)
             
+            if sugerir:
+                resultado = leer("/inmuebles/valuacion", {
+                    "ciudad": ciudad,
+                    "segmento": segmento,
+                    "tipo": tipo,
+                    "sup_cubierta": sup_c,
+                    "sup_terreno": sup_t,
+                })
+                if not resultado["success"]:
+                    st.error(resultado["error"])
+                elif resultado["data"]["valor_sugerido"] is None:
+                    st.warning("No hay tasaciones comparables de ese tipo todavía")
+                else:
+                    sugerencia = resultado["data"]
+                    st.info(
+                        f"💡 Valor sugerido: **${sugerencia['valor_sugerido']:,.0f}** "
+                        f"(rango ${sugerencia['rango']['p25']:,.0f} - ${sugerencia['rango']['p75']:,.0f}), "
+                        f"según {sugerencia['comparables']} comparables ({sugerencia['criterio']})"
+                    )
+            
             if submitted:
                 # Validación básica
                 if not all([ciudad, segmento, emprendimiento, direccion, tipo, drive]):
@@ -278,8 +587,9 @@ else:
                     resultado = hacer_request("POST", "/inmuebles/tasar", params=payload)
                     
                     if resultado["success"]:
-                        st.success(f"✅ {resultado['data']['mensaje']}")
-                        st.balloons()
+                        st.session_state['tasacion_guardada'] = resultado['data']['mensaje']
+                        st.session_state['form_tasacion_n'] += 1
+                        st.rerun()
                     else:
                         st.error(resultado["error"])
 
@@ -287,68 +597,36 @@ else:
     with tab_publicar:
         st.subheader("Gestión de Publicaciones")
         
-        resultado = hacer_request("GET", "/inmuebles/")
+        # Cursores de las páginas visitadas de la cola (el primero es None: desde el principio)
+        if 'cola_cursores' not in st.session_state:
+            st.session_state['cola_cursores'] = [None]
         
-        if resultado["success"]:
-            # Filtrar los que están "Para Publicar"
-            pendientes = [i for i in resultado["data"] if i['estado'] == "Para Publicar"]
-            
-            if pendientes:
-                st.info(f"📋 Hay {len(pendientes)} propiedades pendientes de publicación")
-                
-                for prop in pendientes:
-                    with st.expander(f"📌 {prop['direccion']} - {prop['ciudad']} (${prop.get('valor_publicacion', 'N/A'):,.2f})"):
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            st.write("**Detalles:**")
-                            st.write(f"- Tipo: {prop['tipo_inmueble']}")
-                            st.write(f"- Emprendimiento: {prop['emprendimiento']}")
-                            st.write(f"- Sup. Cubierta: {prop['sup_cubierta']} m²")
-                            st.write(f"- Sup. Terreno: {prop['sup_terreno']} m²")
-                        
-                        with col2:
-                            link_portal = st.text_input(
-                                "Link del Portal Inmobiliario",
-                                key=f"link_{prop['id']}",
-                                placeholder="https://tokko.com/... o https://zonaprop.com/..."
-                            )
-                            
-                            if st.button("✅ Confirmar Publicación", key=f"btn_{prop['id']}"):
-                                if not link_portal or link_portal.strip() == "":
-                                    st.error("⚠️ Debes ingresar el link del portal")
-                                else:
-                                    resultado_pub = hacer_request(
-                                        "PUT", 
-                                        f"/inmuebles/{prop['id']}/publicar",
-                                        params={"link_portal": link_portal}
-                                    )
-                                    
-                                    if resultado_pub["success"]:
-                                        st.success("✅ Propiedad publicada exitosamente")
-                                        st.rerun()
-                                    else:
-                                        st.error(resultado_pub["error"])
-            else:
-                st.success("✨ No hay propiedades pendientes de publicación")
-        else:
-            st.error(resultado["error"])
+        params_cola = {"estado": "Para Publicar", "limite": TAMANIO_PAGINA_COLA}
+        if st.session_state['cola_cursores'][-1] is not None:
+            params_cola["cursor"] = st.session_state['cola_cursores'][-1]
+        
+        lugar_cola = st.empty()
+        lugar_cola.caption("⏳ Cargando cola de publicación...")
 
     # --- TAB 4: BÚSQUEDA AVANZADA ---
     with tab_buscar:
         st.subheader("🔍 Búsqueda Avanzada")
         
         with st.form("form_busqueda"):
+            texto_busq = st.text_input(
+                "Texto",
+                placeholder="Dirección, emprendimiento o tipo (ej: Lote 45, Acacias)"
+            )
             col1, col2, col3 = st.columns(3)
             
             with col1:
                 ciudad_busq = st.selectbox(
                     "Ciudad",
-                    ["Todas", "Campana", "Zarate", "Escobar", "Los Cardales"]
+                    ["Todas"] + CIUDADES
                 )
                 estado_busq = st.selectbox(
                     "Estado",
-                    ["Todos", "Tasación", "Para Publicar", "Publicado"]
+                    ["Todos"] + ESTADOS
                 )
             
             with col2:
@@ -357,6 +635,12 @@ else:
                     min_value=0.0,
                     step=10000.0
                 )
+                cerca_de = st.number_input(
+                    "Cerca del inmueble (ID)",
+                    min_value=0,
+                    step=1,
+                    help="Busca alrededor de un inmueble ya geocodificado (0 = sin usar)"
+                )
             
             with col3:
                 precio_max = st.number_input(
@@ -364,6 +648,12 @@ else:
                     min_value=0.0,
                     step=10000.0
                 )
+                radio_km = st.number_input(
+                    "Radio (km)",
+                    min_value=0.1,
+                    value=2.0,
+                    step=0.5
+                )
             
             buscar = st.form_submit_button("🔍 Buscar", use_container_width=True)
             
@@ -377,17 +667,73 @@ else:
                     params["precio_min"] = precio_min
                 if precio_max > 0:
                     params["precio_max"] = precio_max
+                if cerca_de > 0:
+                    # Resultados ordenados por distancia (columna distancia_km)
+                    params["cerca_de"] = cerca_de
+                    params["radio_km"] = radio_km
                 
-                resultado = hacer_request("GET", "/inmuebles/buscar", params=params)
+                if texto_busq.strip():
+                    # Búsqueda por texto: resultados por relevancia (los precios no se aplican)
+                    params = {clave: valor for clave, valor in params.items() if clave in ("ciudad", "estado")}
+                    params.update(q=texto_busq.strip(), limite=TAMANIO_PAGINA_BUSQUEDA)
+                    resultado = leer("/inmuebles/buscar-texto", params)
+                    if resultado["success"]:
+                        respuesta = resultado["data"]
+                        if respuesta["corregida"]:
+                            st.info(f"🔤 Mostrando resultados para: **{respuesta['corregida']}**")
+                        if respuesta["total"] > len(respuesta["items"]):
+                            st.caption(f"Se muestran los {len(respuesta['items'])} más relevantes de {respuesta['total']}")
+                        resultado = {"success": True, "data": respuesta["items"]}
+                else:
+                    resultado = leer("/inmuebles/buscar", params)
                 
                 if resultado["success"]:
                     datos = resultado["data"]
                     if datos:
                         st.success(f"✅ Se encontraron {len(datos)} resultados")
                         df = pd.DataFrame(datos)
-                        df['estado_visual'] = df['estado'].apply(mostrar_estado)
+                        df['estado_visual'] = columna_estado(df['estado'])
                         st.dataframe(df, use_container_width=True, hide_index=True)
                     else:
                         st.warning("No se encontraron resultados con esos criterios")
                 else:
-                    st.error(resultado["error"])
\ No newline at end of file
+                    st.error(resultado["error"])
+
+    # --- CARGA DE DATOS ---
+    secciones = {
+        # Solo la página visible de la grilla: memoria y render dependen del tamaño de página
+        "inventario": (
+            ("/inmuebles/grilla", params_inventario),
+            lugar_inventario,
+            lambda resultado: mostrar_inventario(resultado, filtros_inventario),
+        ),
+        "resumen": (("/estadisticas/resumen", None), lugar_resumen, mostrar_resumen),
+        "cola": (("/inmuebles/cola", params_cola), lugar_cola, mostrar_cola),
+    }
+    lecturas = {nombre: lectura for nombre, (lectura, _, _) in secciones.items()}
+
+    def dibujar(nombre, resultado):
+        # Cada sección se dibuja una sola vez por rerun: sus widgets tienen keys fijas
+        _, lugar, mostrar = secciones[nombre]
+        with lugar.container():
+            mostrar(resultado)
+
+    # Lo recién pedido al servidor se dibuja apenas llega; lo memorizado de reruns anteriores
+    # espera a saber si /cambios lo dejó viejo (sin cambios, se dibuja en cuanto se sabe)
+    inicio_carga = time.monotonic()
+    hubo_cambios, en_espera = None, {}
+    for nombre, resultado in cargar_en_paralelo({**lecturas, "cambios": lectura_cambios()}, sin_memorizar={"cambios"}):
+        if nombre == "cambios":
+            hubo_cambios = aplicar_cambios(resultado)
+            if not hubo_cambios:
+                for pendiente, memorizado in en_espera.items():
+                    dibujar(pendiente, memorizado)
+                en_espera.clear()
+        elif hubo_cambios is False or resultado.get("leido_en", inicio_carga) >= inicio_carga:
+            dibujar(nombre, resultado)
+        else:
+            en_espera[nombre] = resultado
+    if en_espera:
+        # Hubo cambios y esto salió de la caché recién descartada: se vuelve a pedir antes de dibujarlo
+        for nombre, resultado in cargar_en_paralelo({nombre: lecturas[nombre] for nombre in en_espera}):
+            dibujar(nombre, resultado)
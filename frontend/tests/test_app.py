@@ -0,0 +1,81 @@
+# Carga de la interfaz principal contra un backend real (con base temporal)
+# Uso: python -m pytest tests  (desde la carpeta frontend; requiere las dependencias del backend)
+
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+import requests
+
+FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BACKEND = os.path.join(FRONTEND, "..", "backend")
+
+# Base temporal: los tests nunca tocan inmobiliaria.db
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["CACHE_BACKEND"] = "ninguno"
+sys.path.insert(0, BACKEND)
+
+from streamlit.testing.v1 import AppTest
+import uvicorn
+
+TASACION = {
+    "ciudad": "Campana", "segmento": "Ciudad", "emprendimiento": "Centro", "tipo": "Casa",
+    "direccion": "Mitre 1234", "sup_cubierta": 120.0, "sup_terreno": 300.0,
+    "valor_tasacion": 130000.0, "link_drive": "https://drive.google.com/test",
+}
+
+@pytest.fixture(scope="module")
+def api():
+    import main
+    from migraciones import aplicar_migraciones
+    aplicar_migraciones()
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        puerto = s.getsockname()[1]
+    servidor = uvicorn.Server(uvicorn.Config(main.app, port=puerto, log_level="warning"))
+    hilo = threading.Thread(target=servidor.run, daemon=True)
+    hilo.start()
+    while not servidor.started:
+        time.sleep(0.01)
+    os.environ["API_URL"] = f"http://127.0.0.1:{puerto}"
+    yield os.environ["API_URL"]
+    servidor.should_exit = True
+    hilo.join()
+
+def correr(cursor=None) -> AppTest:
+    """Un rerun con sesión iniciada; la caché de lecturas (st.cache_data) es del proceso y se comparte"""
+    app = AppTest.from_file(os.path.join(FRONTEND, "app.py"), default_timeout=30)
+    app.session_state["logged_in"] = True
+    app.session_state["user"] = "admin"
+    if cursor is not None:
+        app.session_state["cambios_cursor"] = cursor
+    app.run()
+    return app
+
+def errores(app: AppTest) -> list:
+    # El aviso de extra_streamlit_components sobre get_cookie_manager no es de esta prueba
+    return [e.value for e in app.exception if "get_cookie_manager" not in e.value]
+
+def total_inmuebles(app: AppTest) -> str:
+    return next(metrica.value for metrica in app.metric if metrica.label == "Total Inmuebles")
+
+def test_cambios_de_otro_usuario_con_lecturas_memorizadas(api):
+    id = requests.post(f"{api}/inmuebles/tasar", params=TASACION).json()["id"]
+    requests.put(f"{api}/inmuebles/{id}/preparar-publicacion", params={"valor_pub": 150000})
+
+    primera = correr()
+    assert errores(primera) == []
+    assert total_inmuebles(primera) == "1"
+
+    # Otro usuario carga una tasación: la caché de este frontend no se entera
+    requests.post(f"{api}/inmuebles/tasar", params={**TASACION, "direccion": "Belgrano 55"})
+    segunda = correr(primera.session_state["cambios_cursor"])
+    # La cola (con keys fijas como link_{id}) y el resto se dibujan una sola vez y ya actualizados
+    assert errores(segunda) == []
+    assert total_inmuebles(segunda) == "2"
+    assert segunda.session_state["cambios_cursor"] > primera.session_state["cambios_cursor"]
+    assert segunda.text_input(key=f"link_{id}") is not None